@@ -1,144 +1,5 @@
-import asyncio
 import platform
-import pygame
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
+from ultra4k.launcher import run
 
-# Constants
-FPS = 60
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-
-# Code from Codebase 1: Utilities (adapted to avoid file I/O)
-def get_current_directory():
-    return ""  # Placeholder, no file system access in Pyodide
-
-def list_files(path):
-    return ["char1.npy", "stage1.npy"]  # Simulated file list
-
-# Code from Codebase 2: Data Processing (adapted for in-memory data)
-def normalize_data(data):
-    return (data - np.min(data)) / (np.max(data) - np.min(data))
-
-class DataLoader:
-    def __init__(self, file_path):
-        self.file_path = file_path
-
-    def load_data(self):
-        # Simulated data instead of file loading
-        if "char" in self.file_path:
-            return {
-                'position': [100, 500],
-                'velocity': [0, 0],
-                'health': 100
-            }
-        elif "stage" in self.file_path:
-            return {
-                'platforms': [pygame.Rect(0, 550, 800, 50)]
-            }
-
-# Code from Codebase 3: Machine Learning
-def split_data(X, y, test_size=0.2):
-    return train_test_split(X, y, test_size=test_size)
-
-def train_model(X_train, y_train):
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    return model
-
-# Game classes
-class Character:
-    def __init__(self, data):
-        self.position = data['position']
-        self.velocity = data['velocity']
-        self.health = data['health']
-        self.rect = pygame.Rect(self.position[0], self.position[1], 50, 50)
-
-    def move(self, dx, dy):
-        self.position[0] += dx
-        self.position[1] += dy
-        self.rect.topleft = self.position
-
-class Stage:
-    def __init__(self, data):
-        self.platforms = data['platforms']
-
-    def draw(self, screen):
-        for platform in self.platforms:
-            pygame.draw.rect(screen, (255, 255, 255), platform)
-
-# Global variables
-screen = None
-player = None
-ai = None
-stage = None
-ai_model = None
-
-def setup():
-    global screen, player, ai, stage, ai_model
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Smash Melee Engine")
-
-    # Load simulated data
-    char_loader = DataLoader("char1.npy")
-    stage_loader = DataLoader("stage1.npy")
-    char_data = char_loader.load_data()
-    stage_data = stage_loader.load_data()
-
-    # Create game objects
-    player = Character(char_data)
-    ai = Character({'position': [600, 500], 'velocity': [0, 0], 'health': 100})
-    stage = Stage(stage_data)
-
-    # Train simple AI model
-    X_train = np.array([[100, 500], [200, 500], [300, 500], [400, 500]])
-    y_train = np.array([0, 0, 1, 1])  # 0: move left, 1: move right
-    ai_model = train_model(X_train, y_train)
-
-async def update_loop():
-    global screen, player, ai, stage, ai_model
-
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            return False
-
-    # Player input
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT]:
-        player.move(-5, 0)
-    if keys[pygame.K_RIGHT]:
-        player.move(5, 0)
-
-    # AI decision
-    ai_input = [player.position[0], player.position[1]]
-    ai_action = ai_model.predict([ai_input])[0]
-    if ai_action < 0.5:
-        ai.move(-3, 0)
-    else:
-        ai.move(3, 0)
-
-    # Render
-    screen.fill((0, 0, 0))  # Clear screen
-    stage.draw(screen)
-    pygame.draw.rect(screen, (255, 0, 0), player.rect)  # Player (red)
-    pygame.draw.rect(screen, (0, 0, 255), ai.rect)     # AI (blue)
-    pygame.display.flip()
-
-    return True
-
-async def main():
-    setup()
-    running = True
-    while running:
-        running = await update_loop()
-        await asyncio.sleep(1.0 / FPS)
-    pygame.quit()
-
-if platform.system() == "Emscripten":
-    asyncio.ensure_future(main())
-else:
-    if __name__ == "__main__":
-        asyncio.run(main())
+if platform.system() == "Emscripten" or __name__ == "__main__":
+    run("smash4k")
@@ -1,37 +1,5 @@
-import pygame
-import sys
+import platform
+from ultra4k.launcher import run
 
-# Initialize pygame
-pygame.init()
-
-# Constants
-SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-FPS = 60
-
-# Set up display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('Smash Engine Pygame Port')
-
-# Clock for FPS control
-clock = pygame.time.Clock()
-
-# Game Loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Clear the screen
-    screen.fill((0, 0, 0))
-
-    # TODO: Add game logic and rendering here
-
-    # Update display
-    pygame.display.flip()
-
-    # Maintain FPS
-    clock.tick(FPS)
-
-pygame.quit()
-sys.exit()
+if platform.system() == "Emscripten" or __name__ == "__main__":
+    run("ultrasmash")
@@ -0,0 +1,44 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from ultra4k import collision
+from ultra4k import fixedpoint
+
+# A 20 px soft platform like battlefield's middle one, and a main stage below it
+SOFT = {'rect': pygame.Rect(150, 250, 300, 20), 'type': 'soft'}
+MAIN = {'rect': pygame.Rect(50, 400, 500, 40), 'type': 'main'}
+
+def _fixed(left, top, dx, dy, platforms):
+    s = fixedpoint.SCALE
+    return fixedpoint.sweep_platforms(left * s, top * s, 40 * s, 50 * s, dx * s, dy * s, platforms)
+
+@pytest.mark.parametrize("top, dy", [(198, 75), (150, 120), (199, 200)])
+def test_fast_fall_lands_on_a_thin_platform(top, dy):
+    """A fall that starts above the platform and ends below it in one frame still lands on it"""
+    assert top + 50 + dy > SOFT['rect'].bottom  # the end position is past the platform entirely
+    platform, face, t = collision.sweep_platforms(200, top, 40, 50, 0, dy, [MAIN, SOFT])
+    assert platform is SOFT and face == collision.FLOOR
+    assert t == pytest.approx((SOFT['rect'].top - top - 50) / dy)
+    assert _fixed(200, top, 0, dy, [MAIN, SOFT]) == (SOFT, fixedpoint.FLOOR)
+
+def test_fall_lands_where_the_box_is_at_impact():
+    # Drifting right while falling, the box lands only if it is still over the right end at the moment of impact
+    platform, _, t = collision.sweep_platforms(420, 190, 40, 50, 100, 100, [SOFT])
+    assert platform is SOFT and t == pytest.approx(0.1)
+    assert collision.sweep_platforms(420, 100, 40, 50, 100, 200, [SOFT]) == (None, 0, 1.0)
+
+def test_ceiling_hit():
+    platform, face, t = collision.sweep_platforms(200, 280, 40, 50, 0, -30, [SOFT, MAIN])
+    assert platform is SOFT and face == collision.CEILING
+    assert t == pytest.approx(1 / 3)
+    assert _fixed(200, 280, 0, -30, [SOFT, MAIN]) == (SOFT, fixedpoint.CEILING)
+
+def test_moving_away_or_short_of_a_platform_misses():
+    assert collision.sweep_platforms(200, 190, 40, 50, 0, 5, [SOFT]) == (None, 0, 1.0)
+    assert collision.sweep_platforms(200, 280, 40, 50, 0, 30, [SOFT]) == (None, 0, 1.0)
+    assert collision.sweep_platforms(200, 150, 40, 50, 0, -60, [SOFT]) == (None, 0, 1.0)
@@ -0,0 +1,60 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from ultra4k import combos
+from ultra4k import engine
+
+def _match():
+    game_state = engine.GameState()
+    game_state.current_stage_name = "final_destination"
+    game_state.combos = combos.ComboTracker()
+    game_state.reset()
+    game_state.combos.reset(game_state.fighters)
+    return game_state
+
+def _hit(game_state, knockback):
+    game_state.land_hit(game_state.player, game_state.ai, "jab", 3, knockback, 1.0, 0.0, True)
+
+def _escapes(game_state):
+    return game_state.combos.stats[game_state.player.slot].escapes
+
+def test_zero_knockback_hit_is_not_an_escape():
+    game_state = _match()
+    _hit(game_state, 20)
+    game_state.combos.update(game_state.fighters, 1)
+    assert game_state.ai.hitstun > 1
+    _hit(game_state, 0)
+    assert game_state.ai.hitstun == 0
+    game_state.combos.update(game_state.fighters, 2)
+    assert _escapes(game_state) == 0
+
+def test_tech_and_ledge_grab_are_escapes():
+    game_state = _match()
+    victim = game_state.ai
+    for frame, escape in enumerate(("tech", "ledge")):
+        _hit(game_state, 20)
+        game_state.combos.update(game_state.fighters, 2 * frame)
+        victim.hitstun = 0
+        if escape == "tech":
+            victim.tech_cooldown = engine.TECH_COOLDOWN
+        else:
+            victim.ledge_grab = True
+        game_state.combos.update(game_state.fighters, 2 * frame + 1)
+        victim.ledge_grab = False
+    assert _escapes(game_state) == 2
+
+def test_respawn_is_not_an_escape():
+    game_state = _match()
+    victim = game_state.ai
+    _hit(game_state, 20)
+    game_state.combos.update(game_state.fighters, 1)
+    victim.position[0] = game_state.stage.blast_zones['right'] + 10
+    frame = 2
+    while victim.stocks == 4 or victim.respawn_timer > 0:
+        victim.update(game_state.stage)
+        game_state.combos.update(game_state.fighters, frame)
+        frame += 1
+    assert victim.hitstun == 0
+    assert _escapes(game_state) == 0
@@ -0,0 +1,66 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import zlib
+
+import numpy as np
+
+from ultra4k import corpus
+from ultra4k import replay
+
+def _damage(source, target, offset, data):
+    with open(source, "rb") as f:
+        blob = bytearray(f.read())
+    blob[offset:offset + len(data)] = data
+    with open(target, "wb") as f:
+        f.write(blob)
+
+def test_damaged_replays_are_skipped(tmp_path):
+    good = str(tmp_path / "good.u4r")
+    replay.record_match(good, stocks=99, frames=600, interval=120)
+    _, offset, length = replay.Replay(good).index[2]
+    # A segment whose compressed stream is garbage, and one that inflates fine but is cut short
+    _damage(good, str(tmp_path / "zlib.u4r"), offset + 8, b"\xff" * 16)
+    with open(good, "rb") as f:
+        f.seek(offset)
+        short = zlib.compress(zlib.decompress(f.read(length))[:40])
+    with open(good, "rb") as f:
+        blob = f.read()
+    with open(tmp_path / "short.u4r", "wb") as f:
+        f.write(blob[:offset] + short.ljust(length, b"\0") + blob[offset + length:])
+    (tmp_path / "garbage.u4r").write_bytes(b"not a replay")
+    skipped = []
+    index = corpus.Corpus(str(tmp_path / "corpus"))
+    index.index_replays(sorted(str(p) for p in tmp_path.glob("*.u4r")), workers=1,
+                        log=lambda line: skipped.append(line) if line.startswith("skipped") else None)
+    assert sorted(os.path.basename(line.split(":")[0].split()[1]) for line in skipped) == ["garbage.u4r", "short.u4r", "zlib.u4r"]
+    assert list(index.manifest['replays']) == [os.path.abspath(good)]
+
+def test_append_writes_only_new_segments_and_queries_span_them(tmp_path):
+    rng = np.random.default_rng(0)
+    index = corpus.Corpus(str(tmp_path))
+    chunks = []
+    first_files = None
+    for match in range(corpus.FANOUT + 2):
+        rows = np.zeros(int(rng.integers(50, 200)), dtype=corpus.CORPUS_DTYPE)
+        rows['match'] = match
+        rows['kind'] = rng.integers(0, len(corpus.current_names()['kinds']), len(rows))
+        rows['damage'] = rng.random(len(rows)) * 200
+        index.append(rows, {f"replay-{match}": {'match': match}})
+        chunks.append(rows)
+        if match == 0:
+            first_files = {path: os.stat(path).st_mtime_ns for path in tmp_path.glob("segments/*/*.npy")}
+        elif match < corpus.FANOUT - 1:
+            # Until FANOUT segments merge, a commit leaves the earlier segments' files alone
+            assert all(os.stat(path).st_mtime_ns == mtime for path, mtime in first_files.items())
+    # The first FANOUT commits merged into one segment, the last two are still their own
+    assert [segment.level for segment in index.segments] == [1, 0, 0]
+    events = np.concatenate(chunks)
+    index = corpus.Corpus(str(tmp_path))
+    assert len(index) == len(events)
+    expected = np.flatnonzero((events['kind'] == 1) & (events['damage'] >= 50) & (events['damage'] < 120))
+    assert np.array_equal(index.select(kind=1, damage=(50, 120)), expected)
+    assert np.array_equal(index.values('match', kind=1, damage=(50, 120)), events['match'][expected])
+    assert sorted(os.listdir(tmp_path / "segments")) == sorted(os.path.basename(segment.path) for segment in index.segments)
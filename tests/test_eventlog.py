@@ -0,0 +1,55 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from ultra4k import eventlog
+
+class Fighter:
+    def __init__(self, slot, character):
+        self.slot = slot
+        self.character = character
+        self.damage = 0.0
+        self.position = [0.0, 0.0]
+
+def _record(log, fox, falco, frames):
+    for frame in range(frames):
+        log.frame = frame
+        fox.damage = frame * 0.5
+        fox.position[:] = [frame, -frame]
+        log.emit(eventlog.EVENT_HIT, fox, falco, "jab", frame * 0.25)
+
+def test_columns_round_trip_and_reopen_appends(tmp_path):
+    directory = str(tmp_path)
+    names = {'characters': ("fox", "falco"), 'stages': ("battlefield",), 'moves': ("jab",)}
+    fox, falco = Fighter(0, "fox"), Fighter(1, "falco")
+    log = eventlog.EventLog(directory, batch_size=16, **names)
+    log.begin_match("battlefield")
+    _record(log, fox, falco, 40)  # two full batches and a partial one
+    log.close()
+
+    columns = eventlog.load_events(directory)
+    assert set(columns) == set(eventlog.EVENT_DTYPE.names)
+    assert all(len(column) == 40 and column.dtype == eventlog.EVENT_DTYPE[name] for name, column in columns.items())
+    assert columns['frame'].tolist() == list(range(40))
+    assert set(columns['match'].tolist()) == {0}
+    assert set(columns['kind'].tolist()) == {eventlog.EVENT_HIT}
+    assert set(columns['char'].tolist()) == {0} and set(columns['attacker'].tolist()) == {1}
+    assert set(columns['move'].tolist()) == {0} and set(columns['stage'].tolist()) == {0}
+    assert np.array_equal(columns['damage'], np.arange(40) * 0.5)
+    assert np.array_equal(columns['value'], np.arange(40) * 0.25)
+    assert np.array_equal(columns['x'], np.arange(40)) and np.array_equal(columns['y'], -np.arange(40))
+    assert eventlog.load_names(directory)['characters'] == ["fox", "falco"]
+
+    # Reopening appends to the same columns and numbers matches after the last one on disk
+    log = eventlog.EventLog(directory, batch_size=16, **names)
+    log.begin_match("final_destination")
+    _record(log, fox, falco, 5)
+    log.close()
+    columns = {name: np.load(os.path.join(directory, name + ".npy")) for name in eventlog.EVENT_DTYPE.names}
+    assert all(len(column) == 45 for column in columns.values())
+    assert columns['match'].tolist() == [0] * 40 + [1] * 5
+    assert columns['stage'][40:].tolist() == [eventlog.NO_CODE] * 5
+    assert columns['frame'][40:].tolist() == list(range(5))
@@ -0,0 +1,33 @@
+import math
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+from ultra4k import engine
+from ultra4k import fixedpoint
+from ultra4k import trig
+
+@pytest.mark.parametrize("seed", fixedpoint.CHECK_SEEDS)
+def test_matches_golden_digests(seed):
+    """Fixed-point matches are bit-identical to the recorded sequence, on any machine and interpreter"""
+    sequence = fixedpoint.digest_sequence(seed)
+    for i, (digest, expected) in enumerate(zip(sequence, fixedpoint.GOLDEN[seed])):
+        assert digest == expected, f"diverged by frame {(i + 1) * fixedpoint.GOLDEN_EVERY}"
+    assert len(sequence) == len(fixedpoint.GOLDEN[seed])
+
+def test_trig_tables():
+    for step in range(trig.STEPS):
+        radians = step / trig.STEPS * 2 * math.pi
+        assert abs(trig.SINE[step] - math.sin(radians) * trig.SCALE) <= 0.5 + 1e-6
+        assert abs(trig.COSINE[step] - math.cos(radians) * trig.SCALE) <= 0.5 + 1e-6
+    assert trig.atan2(0, 0) == 0
+    assert [trig.atan2(y, x) for x, y in ((1, 0), (1, 1), (0, 1), (-1, 0), (0, -1), (-1, -1))] == [0, 450, 900, 1800, -900, -1350]
+
+def test_di_rotation_matches_libm():
+    for x, y in ((1, 0), (-1, 0), (0.6, 0.8), (-0.6, -0.8)):
+        cos_di, sin_di = engine.di_rotation(x, y)
+        angle = math.atan2(y, x) * engine.DI_INFLUENCE
+        assert abs(cos_di - math.cos(angle)) < 1e-3 and abs(sin_di - math.sin(angle)) < 1e-3
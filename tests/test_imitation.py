@@ -0,0 +1,29 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from ultra4k import imitation
+
+def test_unbounded_query_finds_the_exact_neighbors(tmp_path):
+    """With small leaves and no leaf budget the search matches a scan of the query's group"""
+    rng = np.random.default_rng(0)
+    features = np.zeros((5000, len(imitation.FEATURES)), dtype=np.float32)
+    features[:, :imitation.CONTINUOUS] = rng.normal(0, 50, (5000, imitation.CONTINUOUS))
+    features[:, imitation.CONTINUOUS] = rng.integers(0, 2, 5000)
+    imitation.build_index(features, np.zeros(5000, dtype=np.uint8), str(tmp_path), leaf_size=16)
+    tree = imitation.KDTree(str(tmp_path))
+    for sample in features[rng.integers(0, 5000, 20)]:
+        sample[:imitation.CONTINUOUS] += 1
+        # Each situation's states are one contiguous block of rows: its tree's root range
+        root = tree.context_root[int(imitation.contexts(sample))]
+        start, end = tree.start[root], tree.end[root]
+        q = (sample[:imitation.CONTINUOUS] - tree.offset) / tree.scale
+        distances = ((np.asarray(tree.points, dtype=np.float64) - q) ** 2).sum(axis=1)
+        exact = np.sort(distances[start:end])[imitation.NEIGHBORS - 1]
+        found = tree.query(sample, max_leaves=10 ** 6)
+        assert len(found) == imitation.NEIGHBORS
+        assert np.all((start <= found) & (found < end))
+        assert distances[found].max() <= exact * (1 + 1e-4) + 1e-6
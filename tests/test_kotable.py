@@ -0,0 +1,19 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from ultra4k import engine
+from ultra4k import kotable
+
+def test_fighter_facing_the_ledge_grabs_it_instead_of_falling():
+    """Knocked off dreamland's left ledge, only the fighter facing the ledge catches it"""
+    stage = engine.STAGE_DATA["dreamland"]
+    left, top, _, _ = next(p['rect'] for p in stage['platforms'] if p['type'] == 'main')
+    fall_speed = engine.CHARACTER_STATS["falco"]['fall_speed']
+    ones = np.ones(2)
+    ko = kotable.simulate_launches(stage, ones * left, ones * (top - kotable.FIGHTER_HEIGHT), ones * -6, ones * -4,
+                                   ones * fall_speed, np.array([False, True]))
+    assert ko.tolist() == [False, True]
@@ -0,0 +1,48 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from ultra4k import online
+
+class BurstRing(online.ObservationRing):
+    """Ring whose producer writes `burst` more rows right after pop_all first reads head"""
+
+    burst = 0
+
+    @property
+    def head(self):
+        head = self._head
+        if self.burst:
+            burst, self.burst = self.burst, 0
+            for _ in range(burst):
+                self.push(np.full(2, self._head), self._head)
+        return head
+
+    @head.setter
+    def head(self, value):
+        self._head = value
+
+def _fill(ring, count):
+    for _ in range(count):
+        ring.push(np.full(2, ring.head), ring.head)
+
+def test_rows_written_during_a_copy_wait_for_the_next_pop():
+    ring = BurstRing(2, size=4)
+    _fill(ring, 2)
+    ring.burst = 1
+    assert ring.pop_all()[:, -1].tolist() == [0, 1]
+    assert ring.pop_all()[:, -1].tolist() == [2]
+    assert ring.dropped == 0
+
+def test_rows_lapped_during_a_copy_are_dropped():
+    ring = BurstRing(2, size=4)
+    _fill(ring, 3)
+    ring.burst = 6  # the producer overwrites every slot the consumer is copying
+    assert len(ring.pop_all()) == 0
+    rows = ring.pop_all()
+    assert (rows == rows[:, :1]).all()
+    assert rows[:, -1].tolist() == [6, 7, 8]
+    assert len(rows) + ring.dropped == 9
@@ -0,0 +1,11 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from ultra4k import profiling
+
+def test_steady_state_frames_stay_within_the_allocation_budgets():
+    retained, transient, growth = profiling.measure_allocations()
+    assert retained <= profiling.RETAINED_BUDGET, growth
+    assert transient <= profiling.TRANSIENT_BUDGET
@@ -0,0 +1,47 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import random
+
+import numpy as np
+import pygame
+
+from ultra4k.projectiles import ProjectilePool
+
+PLATFORMS = [{'rect': pygame.Rect(0, 360, 600, 40)}, {'rect': pygame.Rect(150, 250, 300, 20)},
+             {'rect': pygame.Rect(100, 221, 64, 6)}]
+BLAST = {'left': -100, 'right': 700, 'top': -100, 'bottom': 550}
+
+def _pool():
+    pool = ProjectilePool()
+    pool.set_stage(PLATFORMS, BLAST)
+    return pool, pool.register("laser", "laser", 3, 0, 1.0, 0.0, (255, 0, 0))
+
+def test_box_overlapping_a_neighbouring_cell_hits_its_platform():
+    pool, spec = _pool()
+    # The thin platform starts one pixel into its cell; this box's center is two pixels above that cell
+    assert (221 - pool.origin_y) % pool.cell_size == 1
+    pool.spawn(130, 218, 0, 0, 18, 12, 60, 0, spec)
+    pool.update([])
+    assert pool.count == 0
+
+def test_platform_hits_match_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        pool, spec = _pool()
+        for _ in range(300):
+            pool.spawn(rng.uniform(-80, 680), rng.uniform(-80, 530), rng.uniform(-12, 12), rng.uniform(-12, 12),
+                       rng.uniform(2, 40), rng.uniform(2, 40), 60, 0, spec)
+        n = pool.count
+        x = pool.x[:n] + pool.vx[:n]
+        y = pool.y[:n] + pool.vy[:n]
+        hw, hh = pool.half_w[:n], pool.half_h[:n]
+        expected = np.zeros(n, dtype=bool)
+        for platform in PLATFORMS:
+            r = platform['rect']
+            expected |= (x - hw < r.right) & (x + hw > r.left) & (y - hh < r.bottom) & (y + hh > r.top)
+        survivors = sorted(zip(x[~expected].round(6), y[~expected].round(6)))
+        pool.update([])
+        assert sorted(zip(pool.x[:pool.count].round(6), pool.y[:pool.count].round(6))) == survivors
@@ -0,0 +1,11 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from ultra4k import quality
+
+def test_simulation_identical_at_every_quality_level():
+    same, results = quality.check_identical(frames=600)
+    assert len(results) == len(quality.LEVELS)
+    assert same, results
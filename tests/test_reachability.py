@@ -0,0 +1,40 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import threading
+
+from ultra4k import engine
+from ultra4k import reachability
+
+def test_graph_agrees_with_the_engine():
+    """Routes and recoveries from the vectorized simulation land where a real Character does"""
+    # Dreamland's main platform stops short of the screen edges, so it has recovery entries as well as routes
+    routes, route_frames, recovery = reachability.build_graph(engine.STAGE_DATA["dreamland"], engine.CHARACTER_STATS["fox"])
+    assert (routes >= 0).any() and (recovery >= 0).any()
+    graph = reachability.ReachabilityGraph({"dreamland/fox/routes": routes, "dreamland/fox/route_frames": route_frames,
+                                            "dreamland/fox/recovery": recovery})
+    assert reachability.verify(samples=60, graph=graph) == 0
+
+def test_missing_cache_is_not_built(tmp_path):
+    assert reachability.ReachabilityGraph.load(str(tmp_path / "reachability.npz"), build=False) is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_concurrent_builders_do_not_share_a_temporary_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "reachability.npz")
+    tables = {"battlefield/fox/routes": reachability.np.zeros((1, 1, 1), dtype=reachability.np.int16)}
+    gate = threading.Barrier(2)
+
+    def build_all():
+        gate.wait()  # both builders write at the same moment
+        return tables
+
+    monkeypatch.setattr(reachability, "build_all", build_all)
+    threads = [threading.Thread(target=reachability.ReachabilityGraph.load, args=(path,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(os.listdir(tmp_path)) == ["reachability.npz"]
+    assert reachability.ReachabilityGraph.load(path, build=False).tables.keys() == tables.keys()
@@ -0,0 +1,40 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import zlib
+
+import pytest
+
+from ultra4k import replay
+from ultra4k import savestate
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("replay") / "match.u4r")
+    frames, _ = replay.record_match(path, stocks=99, frames=900, interval=120)
+    return path, frames
+
+def test_verify(recorded):
+    path, frames = recorded
+    player = replay.ReplayPlayer(replay.Replay(path))
+    assert player.last_frame == frames
+    assert player.verify() == 0
+    player.seek(frames // 2)
+    player.step(-5)
+    assert player.frame == frames // 2 - 5
+    assert player.mismatches == 0
+
+def test_keyframes_are_save_states(recorded):
+    """Segments hold data only: a keyframe in the savestate layout and the packed frame records"""
+    path, _ = recorded
+    replay_file = replay.Replay(path)
+    _, offset, length = replay_file.index[1]
+    with open(path, "rb") as f:
+        f.seek(offset)
+        blob = zlib.decompress(f.read(length))
+    size, = replay.KEYFRAME.unpack_from(blob, 0)
+    keyframe = blob[replay.KEYFRAME.size:replay.KEYFRAME.size + size]
+    assert savestate.read_header(keyframe) == ("battlefield", replay_file.meta['player_character'],
+                                               replay_file.meta['ai_character'], False)
@@ -0,0 +1,69 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+from ultra4k import engine
+from ultra4k import fixedpoint
+from ultra4k import profiling
+from ultra4k import savestate
+
+def _fighter_state(fighter):
+    """Every Character field as comparable plain values"""
+    state = {}
+    for name, value in vars(fighter).items():
+        if name in savestate.REFERENCE_FIELDS or name in savestate.DERIVED_FIELDS:
+            continue
+        assert name in savestate.SAVED_FIELDS or name in savestate.STATIC_FIELDS, \
+            f"Character.{name} is not covered by the save-state format"
+        if name in ("current_move", "last_attacker"):
+            value = (value.name if name == "current_move" else value.slot) if value is not None else None
+        elif hasattr(value, "copy"):
+            value = value.copy()
+        state[name] = tuple(value) if isinstance(value, (list, engine.pygame.Rect)) else value
+    state['moves_state'] = {name: (m.current_frame, tuple(m.hitbox), m.hitboxes is not engine.NO_HITBOXES,
+                                   sorted(t.slot for t in m.hit_targets)) for name, m in fighter.move_cache.items()}
+    return state
+
+def _game_state(game_state):
+    pool = game_state.projectiles
+    return {
+        'timer': game_state.game_timer, 'over': game_state.game_over, 'winner': game_state.winner,
+        'rng': game_state.stage.rng.getstate(),
+        'fighters': [_fighter_state(f) for f in game_state.fighters],
+        'projectiles': [tuple(float(getattr(pool, name)[i]) for name in savestate.PROJECTILE_COLUMNS) +
+                        (int(pool.life[i]), int(pool.owner[i]), pool.specs[pool.spec[i]]) for i in range(pool.count)],
+    }
+
+@pytest.mark.parametrize("character_class", [None, fixedpoint.FixedCharacter], ids=["float", "fixed-point"])
+def test_round_trip(character_class, frames=3000, every=7):
+    """Mid-match states saved and loaded into a fresh GameState come back field for field"""
+    play = profiling.SelfPlay(0, stage="final_destination", character_class=character_class)
+    fresh = engine.GameState()
+    for frame in range(frames):
+        play.step()
+        if frame % every:
+            continue
+        savestate.loads(fresh, savestate.dumps(play.game_state))
+        assert fixedpoint.checksum(fresh) == fixedpoint.checksum(play.game_state), f"frame {frame}"
+        expected, actual = _game_state(play.game_state), _game_state(fresh)
+        for key in ('timer', 'over', 'winner', 'rng', 'projectiles'):
+            assert actual[key] == expected[key], f"frame {frame} {key}"
+        for slot, (a, b) in enumerate(zip(expected['fighters'], actual['fighters'])):
+            assert b == a, f"frame {frame} fighter {slot}"
+
+def test_slot_files(tmp_path):
+    play = profiling.SelfPlay(0)
+    for _ in range(300):
+        play.step()
+    assert savestate.used_slots(tmp_path) == []
+    assert not savestate.load(play.game_state, 3, tmp_path)
+    savestate.save(play.game_state, 3, tmp_path)
+    assert savestate.used_slots(tmp_path) == [3]
+    expected = fixedpoint.checksum(play.game_state)
+    for _ in range(60):
+        play.step()
+    assert savestate.load(play.game_state, 3, tmp_path)
+    assert fixedpoint.checksum(play.game_state) == expected
@@ -0,0 +1,6 @@
+"""Ultra4k Smash: an import-safe game engine package.
+
+Importing ultra4k or any of its modules never initializes pygame or opens a
+window; game modes do that in their setup(), started through
+ultra4k.launcher (``python -m ultra4k [mode]``).
+"""
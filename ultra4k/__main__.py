@@ -0,0 +1,3 @@
+from ultra4k.launcher import main
+
+main()
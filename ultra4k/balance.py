@@ -0,0 +1,236 @@
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ultra4k import engine
+from ultra4k import profiling
+
+CACHE_PATH = "balance_cache.jsonl"
+BEST_PATH = "balance_best.json"
+CHARACTERS = tuple(engine.CHARACTER_STATS)
+STAGES = tuple(engine.STAGE_DATA)
+PAIRS = tuple(itertools.combinations(CHARACTERS, 2))
+BALANCE_STATS = ("weight", "fall_speed", "dash_speed", "damage", "knockback", "cooldown")
+MAX_SCALE = 2.0           # every parameter stays within [1 / MAX_SCALE, MAX_SCALE] times its hand-tuned value
+ROUND_SEEDS = 4           # matches per side per pair in one evaluation round
+MAX_ROUNDS = 8
+STOP_Z = 2.5              # how many standard errors a matchup must be off before a candidate is cut
+POPULATION = 8
+PARENTS = 3
+BASE_STATS = copy.deepcopy(engine.CHARACTER_STATS)
+BASE_AI_PARAMS = dict(engine.AI_PARAMS)
+
+# Candidate parameters are log multipliers on the hand-tuned values. MeleeAI params are per character, the CPU
+# playing a character using its own: shared by both sides they could not move a matchup toward 50%
+PARAMETERS = tuple(f"{c}.{stat}" for c in CHARACTERS for stat in BALANCE_STATS) + \
+    tuple(f"{c}.ai.{name}" for c in CHARACTERS for name in BASE_AI_PARAMS)
+
+def _base_key():
+    blob = json.dumps([BASE_STATS, BASE_AI_PARAMS, PARAMETERS, ROUND_SEEDS], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+def candidate_key(candidate):
+    blob = json.dumps([_base_key(), [round(candidate[name], 3) for name in PARAMETERS]])
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def apply_candidate(candidate):
+    """Install a candidate into engine.CHARACTER_STATS and return its MeleeAI params per character"""
+    for character, base in BASE_STATS.items():
+        stats = copy.deepcopy(base)
+        scale = {stat: math.exp(candidate[f"{character}.{stat}"]) for stat in BALANCE_STATS}
+        for stat in ("weight", "fall_speed", "dash_speed"):
+            stats[stat] = base[stat] * scale[stat]
+        for move in stats["moves"].values():
+            move["damage"] = move["damage"] * scale["damage"]
+            move["knockback"] = move["knockback"] * scale["knockback"]
+            move["frame_data"]["cooldown"] = max(1, round(move["frame_data"]["cooldown"] * scale["cooldown"]))
+        engine.CHARACTER_STATS[character] = stats
+    return {character: {name: min(1.0, value * math.exp(candidate[f"{character}.ai.{name}"])) for name, value in BASE_AI_PARAMS.items()}
+            for character in CHARACTERS}
+
+def play(candidate, first, second, stage, seed):
+    """Worker: one headless match; returns (first character won, CPU seconds)"""
+    start = time.process_time()
+    ai_params = apply_candidate(candidate)
+    winner, _ = profiling.SelfPlay(seed, first, second, stage, ai_params[second], player_params=ai_params[first]).play_match()
+    return winner == "player", time.process_time() - start
+
+class Evaluation:
+    """Running win counts for one candidate, per unordered character pair"""
+
+    def __init__(self, candidate):
+        self.candidate = candidate
+        self.key = candidate_key(candidate)
+        self.wins = dict.fromkeys(PAIRS, 0)
+        self.games = dict.fromkeys(PAIRS, 0)
+        self.rounds = 0
+        self.stopped = False
+
+    def record(self, pair, first_won):
+        self.wins[pair] += first_won
+        self.games[pair] += 1
+
+    def win_rate(self, pair):
+        return self.wins[pair] / self.games[pair]
+
+    def loss(self):
+        """Mean squared distance of each matchup's win rate from 50%, bias-corrected for sampling noise"""
+        total = 0.0
+        for pair in PAIRS:
+            n = self.games[pair]
+            if not n:
+                return math.inf
+            p = self.win_rate(pair)
+            total += (p - 0.5) ** 2 - p * (1 - p) / max(n - 1, 1)
+        return total / len(PAIRS)
+
+    def clearly_worse(self, best_loss):
+        # Any single matchup that is off by more than STOP_Z standard errors bounds the loss from below
+        for pair in PAIRS:
+            gap = abs(self.win_rate(pair) - 0.5) - STOP_Z * math.sqrt(0.25 / self.games[pair])
+            if gap > 0 and gap * gap / len(PAIRS) > best_loss:
+                return True
+        return False
+
+def round_matches(round_index):
+    """The matches of one round; every candidate plays the same seeds so they are compared fairly"""
+    matches = []
+    for pair in PAIRS:
+        for j in range(ROUND_SEEDS):
+            seed = round_index * 1000 + j
+            stage = STAGES[(round_index + j) % len(STAGES)]
+            # Each seed is played from both sides so the player/CPU slot cannot bias a matchup
+            matches.append((pair, False, stage, seed))
+            matches.append((pair, True, stage, seed))
+    return matches
+
+class Cache:
+    """Append-only on-disk record of every match played, so an interrupted search resumes for free"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.results = {}
+        self.cpu_seconds = 0.0
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.results[tuple(entry["match"])] = entry["first_won"]
+                    self.cpu_seconds += entry["cpu"]
+        self.file = open(path, "a")
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, first_won, cpu):
+        self.results[key] = first_won
+        self.cpu_seconds += cpu
+        self.file.write(json.dumps({"match": list(key), "first_won": first_won, "cpu": cpu}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def evaluate(evaluations, pool, cache, best_loss, budget):
+    """Play rounds for every live candidate in parallel until each finishes or is cut"""
+    while True:
+        live = [e for e in evaluations if not e.stopped and e.rounds < MAX_ROUNDS]
+        if not live or cache.cpu_seconds >= budget:
+            return
+        futures = []
+        for evaluation in live:
+            for pair, swapped, stage, seed in round_matches(evaluation.rounds):
+                key = (evaluation.key, *pair, int(swapped), stage, seed)
+                first_won = cache.get(key)
+                if first_won is None:
+                    first, second = (pair[1], pair[0]) if swapped else pair
+                    future = pool.submit(play, evaluation.candidate, first, second, stage, seed)
+                else:
+                    future = None
+                futures.append((evaluation, pair, swapped, key, first_won, future))
+        for evaluation, pair, swapped, key, first_won, future in futures:
+            if future is not None:
+                won, cpu = future.result()
+                first_won = won != swapped
+                cache.put(key, first_won, cpu)
+            evaluation.record(pair, first_won)
+        for evaluation in live:
+            evaluation.rounds += 1
+            if evaluation.clearly_worse(best_loss):
+                evaluation.stopped = True
+
+def search(cpu_hours=1.0, workers=None, seed=0, cache_path=CACHE_PATH, log=print):
+    """Evolution strategy over PARAMETERS that drives every matchup toward a 50% win rate
+
+    Each generation samples POPULATION candidates around the mean, plays them
+    with early stopping, then moves the mean to the best PARENTS and adapts the
+    step size with the 1/5th success rule. Stops when the CPU budget (counting
+    matches already in the cache) is spent. Returns the best Evaluation.
+    """
+    rng = random.Random(seed)
+    budget = cpu_hours * 3600
+    cache = Cache(cache_path)
+    mean = dict.fromkeys(PARAMETERS, 0.0)
+    sigma = 0.1
+    limit = math.log(MAX_SCALE)
+    best = Evaluation(dict(mean))
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            evaluate([best], pool, cache, math.inf, budget)
+            generation = 0
+            while cache.cpu_seconds < budget:
+                candidates = [{name: round(min(limit, max(-limit, mean[name] + rng.gauss(0, sigma))), 3) for name in PARAMETERS}
+                              for _ in range(POPULATION)]
+                evaluations = [Evaluation(c) for c in candidates]
+                evaluate(evaluations, pool, cache, best.loss(), budget)
+                finished = sorted((e for e in evaluations if e.rounds == MAX_ROUNDS or e.stopped), key=Evaluation.loss)
+                if not finished:
+                    break
+                improved = [e for e in finished if not e.stopped and e.loss() < best.loss()]
+                if improved:
+                    best = improved[0]
+                sigma *= 1.2 if len(improved) * 5 >= POPULATION else 0.85
+                parents = finished[:PARENTS]
+                mean = {name: sum(e.candidate[name] for e in parents) / len(parents) for name in PARAMETERS}
+                generation += 1
+                rates = ", ".join(f"{a}/{b} {best.win_rate((a, b)):.0%}" for a, b in PAIRS)
+                log(f"generation {generation}: best loss {best.loss():.4f} ({rates}), sigma {sigma:.3f}, "
+                    f"{sum(e.stopped for e in evaluations)}/{POPULATION} cut early, {cache.cpu_seconds / 3600:.2f} CPU hours")
+    finally:
+        cache.close()
+    return best
+
+def save_best(evaluation, path=BEST_PATH):
+    """Write the winning multipliers and the stats they produce"""
+    ai_params = apply_candidate(evaluation.candidate)
+    result = {
+        "multipliers": {name: round(math.exp(value), 3) for name, value in evaluation.candidate.items()},
+        "win_rates": {f"{a}/{b}": evaluation.win_rate((a, b)) for a, b in PAIRS},
+        "character_stats": {c: engine.CHARACTER_STATS[c] for c in CHARACTERS},
+        "ai_params": ai_params,
+    }
+    engine.CHARACTER_STATS.update(copy.deepcopy(BASE_STATS))
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search character stats and AI params for 50% matchups")
+    parser.add_argument("--cpu-hours", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--out", default=BEST_PATH)
+    args = parser.parse_args(argv)
+    best = search(args.cpu_hours, args.workers, args.seed, args.cache)
+    save_best(best, args.out)
+    print(f"best loss {best.loss():.4f} written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import collections
+import sys
+import time
+
+from ultra4k import eventlog
+
+PUNISH_RESET_FRAMES = 45  # frames a victim must be out of hitstun before the punish on them ends
+RECENT_PUNISHES = 8       # finished punishes kept for display; older ones only survive in the totals
+
+class Punish:
+    """One opening: every hit an attacker lands on a victim until the victim gets away or dies"""
+
+    __slots__ = ("attacker", "victim", "start_frame", "end_frame", "start_percent", "hits", "damage",
+                 "longest", "last_move", "killed")
+
+    def __init__(self, attacker, victim, frame, percent):
+        self.attacker = attacker
+        self.victim = victim
+        self.start_frame = frame
+        self.end_frame = frame
+        self.start_percent = percent
+        self.hits = 0
+        self.damage = 0.0
+        self.longest = 0
+        self.last_move = None
+        self.killed = False
+
+class PunishStats:
+    """Running totals for one attacker; constant size however long the match runs"""
+
+    __slots__ = ("openings", "punishes", "hits", "damage", "kills", "longest", "combos", "combo_hits", "escapes")
+
+    def __init__(self):
+        self.openings = 0
+        self.punishes = 0
+        self.hits = 0
+        self.damage = 0.0
+        self.kills = 0
+        self.longest = 0
+        self.combos = 0      # true combos of two or more hits
+        self.combo_hits = 0
+        self.escapes = 0     # combos the victim ended early by teching or grabbing the ledge
+
+    def damage_per_opening(self):
+        return self.damage / self.punishes if self.punishes else 0.0
+
+    def hits_per_combo(self):
+        return self.combo_hits / self.combos if self.combos else 0.0
+
+    def summary(self):
+        return {'openings': self.openings, 'punishes': self.punishes, 'hits': self.hits, 'damage': round(self.damage, 1),
+                'damage_per_opening': round(self.damage_per_opening(), 1), 'kills': self.kills,
+                'kill_conversion': round(self.kills / self.punishes, 3) if self.punishes else 0.0,
+                'longest_combo': self.longest, 'hits_per_combo': round(self.hits_per_combo(), 2), 'escapes': self.escapes}
+
+class ComboTracker:
+    """Incremental combo and punish detection driven by GameState
+
+    land_hit() reports every hit that connects and update() looks at each
+    fighter's hitstun, on_ground and stocks once per frame, so the work per
+    frame is constant and nothing is re-scanned. A combo is a run of hits each
+    landing before the victim's hitstun from the previous one ran out; a punish
+    is everything landed on one opening, ending once the victim has been free
+    for PUNISH_RESET_FRAMES, hits back, or loses the stock.
+    """
+
+    def __init__(self, slots=2):
+        self.events = None
+        self.fighters = ()
+        self.frame = 0
+        self.stats = [PunishStats() for _ in range(slots)]
+        self.punishes = [None] * slots      # open punish on each victim
+        self.combo = [0] * slots            # hits in the victim's current combo
+        self.free_frames = [0] * slots
+        self.hitstun = [0] * slots
+        self.tech_cooldown = [0] * slots    # a tech restarts the cooldown, so a rise means the fighter just teched
+        self.stocks = [0] * slots
+        self.recent = collections.deque(maxlen=RECENT_PUNISHES)
+
+    def reset(self, fighters, events=None):
+        self.__init__(len(self.stats))
+        self.events = events
+        self.fighters = fighters
+        for fighter in fighters:
+            self.stocks[fighter.slot] = fighter.stocks
+            self.tech_cooldown[fighter.slot] = fighter.tech_cooldown
+
+    def hit(self, attacker, victim, move_name, damage):
+        """A hit connected (called from GameState.land_hit after knockback is applied)"""
+        slot = victim.slot
+        reversal = self.punishes[attacker.slot]
+        if reversal is not None and reversal.attacker == victim.slot:
+            self._end(attacker, reversal)
+        punish = self.punishes[slot]
+        if punish is None or punish.attacker != attacker.slot:
+            if punish is not None:
+                self._end(victim, punish)
+            punish = self.punishes[slot] = Punish(attacker.slot, slot, self.frame, victim.damage - damage)
+            self.stats[attacker.slot].openings += 1
+            self.combo[slot] = 0
+        # hitstun holds the value from the end of the previous frame, before this hit replaced it
+        self.combo[slot] = self.combo[slot] + 1 if self.hitstun[slot] > 0 else 1
+        punish.hits += 1
+        punish.damage += damage
+        punish.last_move = move_name
+        punish.end_frame = self.frame
+        punish.longest = max(punish.longest, self.combo[slot])
+        self.free_frames[slot] = 0
+
+    def update(self, fighters, frame):
+        """Advance one frame after hits are resolved"""
+        self.frame = frame
+        for fighter in fighters:
+            slot = fighter.slot
+            punish = self.punishes[slot]
+            hitstun = fighter.hitstun
+            if fighter.stocks < self.stocks[slot]:
+                if punish is not None:
+                    punish.killed = True
+                    self._end(fighter, punish)
+                    punish = None
+                self._end_combo(slot, None)
+                hitstun = 0
+            elif self.hitstun[slot] > 0 and hitstun <= 0:
+                # Only the victim's own way out is an escape. A zero-knockback hit and a respawn clear
+                # hitstun too, and jump() is refused during hitstun, so that leaves a tech or a ledge grab
+                escaped = fighter.ledge_grab or fighter.tech_cooldown > self.tech_cooldown[slot]
+                self._end_combo(slot, punish if escaped else None)
+            self.stocks[slot] = fighter.stocks
+            self.hitstun[slot] = hitstun
+            self.tech_cooldown[slot] = fighter.tech_cooldown
+            if punish is not None and hitstun <= 0:
+                self.free_frames[slot] += 1
+                if self.free_frames[slot] >= PUNISH_RESET_FRAMES:
+                    self._end(fighter, punish)
+
+    def _end_combo(self, slot, escaped_from):
+        combo = self.combo[slot]
+        punish = self.punishes[slot]
+        if combo >= 2 and punish is not None:
+            stats = self.stats[punish.attacker]
+            stats.combos += 1
+            stats.combo_hits += combo
+        if escaped_from is not None:
+            self.stats[escaped_from.attacker].escapes += 1
+        self.combo[slot] = 0
+
+    def _end(self, victim, punish):
+        if self.combo[victim.slot]:
+            self._end_combo(victim.slot, None)
+        self.punishes[victim.slot] = None
+        self.free_frames[victim.slot] = 0
+        stats = self.stats[punish.attacker]
+        stats.punishes += 1
+        stats.hits += punish.hits
+        stats.damage += punish.damage
+        stats.kills += punish.killed
+        stats.longest = max(stats.longest, punish.longest)
+        self.recent.append(punish)
+        if self.events is not None:
+            self.events.emit(eventlog.EVENT_PUNISH, victim, self.fighters[punish.attacker], punish.last_move, punish.damage)
+
+    def finish(self, fighters):
+        """Close every open punish when the match ends"""
+        for fighter in fighters:
+            punish = self.punishes[fighter.slot]
+            if punish is not None:
+                self._end(fighter, punish)
+
+    def live_combo(self, slot):
+        """Hits in the combo currently being landed on slot, for the HUD"""
+        return self.combo[slot]
+
+    def summary(self):
+        return [stats.summary() for stats in self.stats]
+
+def analyze(path):
+    """Batch mode: run a tracker over a whole replay; returns (per-fighter summary, recent punishes, frames per second)"""
+    from ultra4k import replay
+    player = replay.ReplayPlayer(replay.Replay(path))
+    game_state = player.game_state
+    tracker = game_state.combos = ComboTracker(len(game_state.fighters))
+    tracker.reset(game_state.fighters)
+    start = time.perf_counter()
+    player.verify()
+    elapsed = time.perf_counter() - start
+    tracker.finish(game_state.fighters)
+    return tracker.summary(), list(tracker.recent), player.last_frame / elapsed
+
+def benchmark(frames=20000):
+    """Per-frame cost of the tracker itself, fed by a headless CPU-vs-CPU match"""
+    from ultra4k import profiling
+    play = profiling.SelfPlay(0)
+    game_state = play.game_state
+    for fighter in game_state.fighters:
+        fighter.stocks = 99
+    tracker = game_state.combos = ComboTracker(len(game_state.fighters))
+    tracker.reset(game_state.fighters)
+    start = time.perf_counter()
+    for _ in range(frames):
+        play.step()
+    with_tracker = time.perf_counter() - start
+    update = tracker.update
+    fighters = game_state.fighters
+    start = time.perf_counter()
+    for frame in range(frames):
+        update(fighters, frame)
+    update_only = time.perf_counter() - start
+    return tracker.summary(), with_tracker / frames * 1e6, update_only / frames * 1e6
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        summary, recent, fps = analyze(sys.argv[1])
+        print(f"{fps:.0f} frames/s")
+    else:
+        summary, frame_us, update_us = benchmark()
+        print(f"{frame_us:.1f} us per simulated frame including the tracker, tracker.update alone {update_us:.2f} us")
+    for label, stats in zip(("P1", "CPU"), summary):
+        print(label, stats)
@@ -0,0 +1,438 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ultra4k import engine
+from ultra4k import eventlog
+
+CORPUS_VERSION = 2
+CHUNK = 64  # replays indexed per commit, so an interrupted run keeps everything before it
+FANOUT = 8  # segments of one level merged into a single segment of the next
+
+# Replay events plus the time the match was recorded, one .npy column per field
+CORPUS_DTYPE = np.dtype(eventlog.EVENT_DTYPE.descr + [('time', '<f8')])
+# Columns whose values are names; queries may use the name instead of the code
+NAMED_COLUMNS = {'kind': 'kinds', 'char': 'characters', 'attacker': 'characters', 'move': 'moves', 'stage': 'stages'}
+
+# Directory layout:
+#   segments/<first row>-<rows>/  one commit's events, or a merge of several commits' events:
+#     <column>.npy                every event's value for that column, in indexing order
+#     <column>.sorted.npy         the column's values sorted
+#     <column>.order.npy          the corpus row each sorted value came from
+#   manifest.json                 indexed replays, the code tables and the live segments with their levels; written last, so it is the commit point
+
+def current_names():
+    return {'kinds': list(eventlog.EVENT_NAMES), 'characters': list(engine.CHARACTER_STATS),
+            'stages': list(engine.STAGE_DATA), 'moves': list(engine.MOVE_NAMES)}
+
+class EventBuffer:
+    """In-memory stand-in for eventlog.EventLog that keeps one match's events as tuples"""
+
+    def __init__(self, names):
+        self.frame = 0
+        self.stage = eventlog.NO_CODE
+        self.char_codes = {name: i for i, name in enumerate(names['characters'])}
+        self.stage_codes = {name: i for i, name in enumerate(names['stages'])}
+        self.move_codes = {name: i for i, name in enumerate(names['moves'])}
+        self.rows = []
+
+    def begin_match(self, stage_name):
+        self.frame = 0
+        self.stage = self.stage_codes.get(stage_name, eventlog.NO_CODE)
+
+    def emit(self, kind, fighter, attacker=None, move=None, value=0.0):
+        self.rows.append((
+            self.frame, 0, kind, fighter.slot,
+            self.char_codes.get(fighter.character, eventlog.NO_CODE),
+            eventlog.NO_CODE if attacker is None else self.char_codes.get(attacker.character, eventlog.NO_CODE),
+            eventlog.NO_CODE if move is None else self.move_codes.get(move, eventlog.NO_CODE),
+            self.stage, fighter.damage, value, fighter.position[0], fighter.position[1], 0.0,
+        ))
+
+def extract_events(path):
+    """Worker: re-simulate one replay with an event sink and combo tracker attached; returns (events, info) or (None, error)"""
+    from ultra4k import combos
+    from ultra4k import replay
+    try:
+        recording = replay.Replay(path)
+        player = replay.ReplayPlayer(recording)
+        events = EventBuffer(current_names())
+        game_state = player.game_state
+        game_state.events = events
+        for fighter in game_state.fighters:
+            fighter.events = events
+        events.begin_match(recording.meta['stage'])
+        game_state.combos = combos.ComboTracker(len(game_state.fighters))
+        game_state.combos.reset(game_state.fighters, events)
+        # Segments are only decoded as verify() reaches them, so damage past the header shows up here
+        mismatches = player.verify()
+    except replay.DAMAGED as error:
+        return None, f"{type(error).__name__}: {error}"
+    game_state.combos.finish(game_state.fighters)
+    meta = recording.meta
+    info = {
+        'stage': meta['stage'], 'characters': [meta['player_character'], meta['ai_character']],
+        'frames': recording.frame_count, 'mismatches': mismatches,
+        'recorded': meta.get('recorded', os.path.getmtime(path)),
+    }
+    return np.array(events.rows, dtype=CORPUS_DTYPE), info
+
+def _segment_path(directory, first, rows):
+    return os.path.join(directory, "segments", f"{first:012d}-{rows}")
+
+def _write_segment(directory, first, columns):
+    """Write rows first.. as a new segment, sorting each column into its own index"""
+    rows = len(columns[CORPUS_DTYPE.names[0]])
+    path = _segment_path(directory, first, rows)
+    os.makedirs(path)
+    for name in CORPUS_DTYPE.names:
+        values = np.ascontiguousarray(columns[name])
+        # Stable, and a merge's input is a few already-sorted runs, which the stable sort exploits
+        order = np.argsort(values, kind='stable')
+        np.save(os.path.join(path, f"{name}.npy"), values)
+        np.save(os.path.join(path, f"{name}.sorted.npy"), values[order])
+        np.save(os.path.join(path, f"{name}.order.npy"), (order + first).astype(np.uint32))
+
+class Segment:
+    """Memory-mapped columns and sorted indexes for one contiguous run of corpus rows"""
+
+    def __init__(self, directory, first, rows, level):
+        self.first = first
+        self.rows = rows
+        self.level = level  # merges its rows have been through
+        self.path = _segment_path(directory, first, rows)
+        self.columns = {}
+        self.sorted = {}
+        self.order = {}
+        for name in CORPUS_DTYPE.names:
+            self.columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+            self.sorted[name] = np.load(os.path.join(self.path, f"{name}.sorted.npy"), mmap_mode='r')
+            self.order[name] = np.load(os.path.join(self.path, f"{name}.order.npy"), mmap_mode='r')
+
+class Corpus:
+    """Memory-mapped event columns from many replays, with a sorted index per column
+
+    Each commit writes its events as a segment of their own, so appending costs
+    the new rows only. Queries search every segment's indexes. A commit's
+    segment starts at level 0 and FANOUT segments of one level are merged into
+    one of the next, like carrying in a base-FANOUT counter, which keeps the
+    segment count logarithmic in the commits and rewrites each row only that
+    many times.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        path = os.path.join(directory, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if self.manifest['version'] != CORPUS_VERSION:
+                raise ValueError(f"{directory!r} is a version {self.manifest['version']} corpus; rebuild it")
+        else:
+            self.manifest = {'version': CORPUS_VERSION, 'names': current_names(), 'rows': 0, 'replays': {}, 'segments': []}
+        self.names = self.manifest['names']
+        self.codes = {column: {name: i for i, name in enumerate(self.names[table])} for column, table in NAMED_COLUMNS.items()}
+        self.segments = [Segment(directory, first, rows, level) for first, rows, level in self.manifest['segments']]
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    # Indexing
+    def append(self, events, replays):
+        """Add events (CORPUS_DTYPE rows) and their replays' manifest entries in one commit"""
+        os.makedirs(os.path.join(self.directory, "segments"), exist_ok=True)
+        self._remove_unlisted()  # left by a commit interrupted before its manifest
+        first_row = self.manifest['rows']
+        segments = list(self.segments)
+        if len(events):
+            _write_segment(self.directory, first_row, events)
+            segments.append(Segment(self.directory, first_row, len(events), 0))
+        while len(segments) >= FANOUT and len({segment.level for segment in segments[-FANOUT:]}) == 1:
+            run = segments[-FANOUT:]
+            _write_segment(self.directory, run[0].first,
+                           {name: np.concatenate([segment.columns[name] for segment in run]) for name in CORPUS_DTYPE.names})
+            segments[-FANOUT:] = [Segment(self.directory, run[0].first, sum(segment.rows for segment in run), run[0].level + 1)]
+        self.manifest['rows'] = first_row + len(events)
+        self.manifest['replays'].update(replays)
+        self.manifest['segments'] = [[segment.first, segment.rows, segment.level] for segment in segments]
+        _save_json(os.path.join(self.directory, "manifest.json"), self.manifest)
+        self.segments = segments
+        # Merged segments are only removed once the manifest no longer lists them
+        self._remove_unlisted()
+
+    def _remove_unlisted(self):
+        live = {os.path.basename(segment.path) for segment in self.segments}
+        for name in set(os.listdir(os.path.join(self.directory, "segments"))) - live:
+            shutil.rmtree(os.path.join(self.directory, "segments", name), ignore_errors=True)
+
+    def index_replays(self, paths, workers=None, log=print):
+        """Extract events from every replay not yet in the corpus, in parallel; returns events added"""
+        names = current_names()
+        # New names may be appended (a new event kind, say); existing codes must not move
+        if any(names[table][:len(known)] != known for table, known in self.names.items()):
+            raise ValueError(f"{self.directory!r} was built with different characters, stages or moves; rebuild it")
+        self.names.update(names)
+        todo = sorted(os.path.abspath(p) for p in paths if os.path.abspath(p) not in self.manifest['replays'])
+        added = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(workers) as pool:
+            for i in range(0, len(todo), CHUNK):
+                chunk = todo[i:i + CHUNK]
+                batch = []
+                replays = {}
+                match = len(self.manifest['replays'])
+                for path, (events, info) in zip(chunk, pool.map(extract_events, chunk)):
+                    if events is None:
+                        log(f"skipped {path}: {info}")
+                        continue
+                    events['match'] = match
+                    events['time'] = info['recorded']
+                    info['match'] = match
+                    replays[path] = info
+                    batch.append(events)
+                    match += 1
+                if replays:
+                    events = np.concatenate(batch)
+                    self.append(events, replays)
+                    added += len(events)
+                log(f"{min(i + CHUNK, len(todo))}/{len(todo)} replays, {len(self)} events, {time.perf_counter() - start:.1f}s")
+        return added
+
+    # Queries
+    def _code(self, column, value):
+        if isinstance(value, str):
+            codes = self.codes.get(column, {})
+            if value not in codes:
+                raise KeyError(f"unknown {column} {value!r}")
+            return codes[value]
+        return value
+
+    def _ranges(self, values, column, condition):
+        """Slices of one segment's sorted index for the column that satisfy one condition
+
+        A condition is a value (or name), a (low, high) tuple with inclusive low,
+        exclusive high and None for an open end, or a list of values to match any of.
+        """
+        if isinstance(condition, tuple):
+            low, high = condition
+            start = 0 if low is None else np.searchsorted(values, _needle(values, low), side='left')
+            stop = len(values) if high is None else np.searchsorted(values, _needle(values, high), side='left')
+            return [(start, max(start, stop))]
+        if isinstance(condition, (list, set, frozenset)):
+            return [r for value in condition for r in self._ranges(values, column, value)]
+        code = _needle(values, self._code(column, condition))
+        return [(np.searchsorted(values, code, side='left'), np.searchsorted(values, code, side='right'))]
+
+    def _gather(self, column, rows):
+        """The column's values at ascending corpus rows, read from the segments holding them"""
+        bounds = np.searchsorted(rows, [segment.first for segment in self.segments] + [len(self)])
+        parts = [segment.columns[column][rows[lo:hi] - segment.first]
+                 for segment, lo, hi in zip(self.segments, bounds, bounds[1:]) if hi > lo]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, CORPUS_DTYPE[column])
+
+    def _matches(self, column, condition, rows):
+        values = self._gather(column, rows)
+        if isinstance(condition, tuple):
+            low, high = condition
+            mask = np.ones(len(values), dtype=bool)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values < high
+            return mask
+        if isinstance(condition, (list, set, frozenset)):
+            return np.isin(values, [self._code(column, value) for value in condition])
+        return values == self._code(column, condition)
+
+    def select(self, since=None, **conditions):
+        """Row numbers of every event matching all conditions, in indexing order
+
+        The most selective condition is answered from its sorted indexes; the rest
+        are checked only on those rows. since=seconds keeps events recorded that
+        recently, e.g. since=7 * 86400 for the last week.
+        """
+        if since is not None:
+            conditions['time'] = (time.time() - since, None)
+        for column in conditions:
+            if column not in CORPUS_DTYPE.names:
+                raise KeyError(f"no column {column!r}; columns are {', '.join(CORPUS_DTYPE.names)}")
+        if not conditions:
+            return np.arange(len(self))
+        ranges = {column: [(segment, r) for segment in self.segments for r in self._ranges(segment.sorted[column], column, condition)]
+                  for column, condition in conditions.items()}
+        driver = min(ranges, key=lambda column: sum(stop - start for _, (start, stop) in ranges[column]))
+        parts = [segment.order[driver][start:stop] for segment, (start, stop) in ranges[driver]]
+        rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, np.uint32)
+        for column, condition in conditions.items():
+            if column != driver and len(rows):
+                rows = rows[self._matches(column, condition, rows)]
+        return rows
+
+    def count(self, since=None, **conditions):
+        return len(self.select(since, **conditions))
+
+    def values(self, column, since=None, **conditions):
+        return self._gather(column, self.select(since, **conditions))
+
+    def count_by(self, column, since=None, **conditions):
+        """Events matching the conditions, counted per value of column (names where the column has them, None for no code)"""
+        counts = np.bincount(self.values(column, since, **conditions).astype(np.int64))
+        table = self.names[NAMED_COLUMNS[column]] if column in NAMED_COLUMNS else None
+        result = {}
+        for code in np.flatnonzero(counts):
+            if code == eventlog.NO_CODE:
+                name = None
+            else:
+                name = table[code] if table is not None and code < len(table) else int(code)
+            result[name] = int(counts[code])
+        return result
+
+    def mean(self, column, since=None, **conditions):
+        values = self.values(column, since, **conditions)
+        return float(values.mean()) if len(values) else float('nan')
+
+    def replay_paths(self, rows):
+        """Replay file of each row, for jumping from a query result to the match"""
+        by_match = {info['match']: path for path, info in self.manifest['replays'].items()}
+        rows = np.asarray(rows)
+        order = np.argsort(rows)
+        matches = np.empty(len(rows), CORPUS_DTYPE['match'])
+        matches[order] = self._gather('match', rows[order])
+        return [by_match.get(int(match)) for match in matches]
+
+def _needle(values, value):
+    """value in the sorted column's own dtype when that is exact; otherwise searchsorted converts the whole column"""
+    try:
+        cast = values.dtype.type(value)
+    except (OverflowError, ValueError):
+        return value
+    return cast if cast == value else value
+
+def _save_json(path, value):
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(value, f)
+    os.replace(temporary, path)
+
+def replay_files(paths):
+    """Expand directories into the .u4r replays inside them"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                yield from (os.path.join(root, name) for name in names if name.endswith(".u4r"))
+        else:
+            yield path
+
+def parse_condition(text):
+    """column=value, column=low:high (either end may be empty) or column=a,b,c"""
+    column, _, value = text.partition("=")
+
+    def scalar(part):
+        try:
+            return float(part) if "." in part else int(part)
+        except ValueError:
+            return part
+
+    if ":" in value:
+        low, high = value.split(":", 1)
+        return column, (scalar(low) if low else None, scalar(high) if high else None)
+    if "," in value:
+        return column, [scalar(part) for part in value.split(",")]
+    return column, scalar(value)
+
+def benchmark(directory="benchmark_corpus", events=2_000_000, queries=50):
+    """Fill a corpus with synthetic events in chunks, then time representative queries"""
+    rng = np.random.default_rng(0)
+    names = current_names()
+    shutil.rmtree(directory, ignore_errors=True)
+    corpus = Corpus(directory)
+    chunks = FANOUT + 4  # enough for one merge, and queries then search the merged segment and four more
+    chunk = events // chunks
+    append_times = []
+    now = time.time()
+    for c in range(chunks):
+        rows = np.zeros(chunk, dtype=CORPUS_DTYPE)
+        rows['match'] = c * 1000 + rng.integers(0, 1000, chunk)
+        rows['frame'] = rng.integers(0, 28800, chunk)
+        rows['kind'] = rng.choice(len(names['kinds']), chunk, p=(0.58, 0.2, 0.02, 0.08, 0.06, 0.04, 0.02))
+        rows['slot'] = rng.integers(0, 2, chunk)
+        rows['char'] = rng.integers(0, len(names['characters']), chunk)
+        rows['attacker'] = rng.integers(0, len(names['characters']), chunk)
+        rows['move'] = rng.integers(0, len(names['moves']), chunk)
+        rows['stage'] = rows['match'] % len(names['stages'])
+        rows['damage'] = rng.gamma(2.0, 40.0, chunk)
+        rows['value'] = rng.random(chunk) * 20
+        rows['time'] = now - (rows['match'] % 1000) * 3600 - c * 86400 * 2
+        start = time.perf_counter()
+        corpus.append(rows, {f"synthetic-{c}": {'match': c, 'rows': chunk}})
+        append_times.append(time.perf_counter() - start)
+    corpus = Corpus(directory)
+    examples = {
+        "falco fsmash KOs on dreamland above 100%":
+            dict(kind="ko", attacker="falco", move="fsmash", stage="dreamland", damage=(100, None)),
+        "shield breaks in the last week": dict(kind="shield_break", since=7 * 86400),
+        "fox hits taken between 50% and 80%": dict(kind="hit", char="fox", damage=(50, 80)),
+    }
+    report = {'events': len(corpus), 'append_s': (sorted(append_times)[len(append_times) // 2], max(append_times)),
+              'segments': len(corpus.segments), 'queries': {}}
+    for label, conditions in examples.items():
+        timings = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            found = corpus.count(**conditions)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        report['queries'][label] = (found, timings[len(timings) // 2] * 1000, timings[-1] * 1000)
+    start = time.perf_counter()
+    by_move = corpus.count_by("move", kind="ko", attacker="falco")
+    report['count_by_ms'] = (time.perf_counter() - start) * 1000
+    report['ko_moves'] = sorted(by_move.items(), key=lambda item: -item[1])[:3]
+    del corpus
+    shutil.rmtree(directory, ignore_errors=True)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ultra4k.corpus", description="Index replays and query their events")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="add new replays to a corpus")
+    index.add_argument("corpus")
+    index.add_argument("replays", nargs="+", help="replay files or directories of them")
+    index.add_argument("--workers", type=int, default=None)
+    query = commands.add_parser("query", help="count events, e.g. kind=ko attacker=falco move=fsmash damage=100:")
+    query.add_argument("corpus")
+    query.add_argument("conditions", nargs="*", help="column=value, column=low:high or column=a,b")
+    query.add_argument("--since-days", type=float, default=None)
+    query.add_argument("--by", default=None, help="count per value of this column")
+    commands.add_parser("benchmark", help="time queries over a synthetic corpus of two million events")
+    args = parser.parse_args(argv)
+    if args.command == "index":
+        corpus = Corpus(args.corpus)
+        added = corpus.index_replays(list(replay_files(args.replays)), args.workers)
+        print(f"{added} events added, {len(corpus)} in {args.corpus}")
+    elif args.command == "query":
+        corpus = Corpus(args.corpus)
+        conditions = dict(parse_condition(text) for text in args.conditions)
+        since = args.since_days * 86400 if args.since_days is not None else None
+        start = time.perf_counter()
+        if args.by:
+            result = corpus.count_by(args.by, since, **conditions)
+        else:
+            result = corpus.count(since, **conditions)
+        print(f"{result} ({(time.perf_counter() - start) * 1000:.2f} ms over {len(corpus)} events)")
+    else:
+        report = benchmark()
+        print(f"{report['events']} events in {report['segments']} segments, chunk append p50 {report['append_s'][0]:.2f}s, "
+              f"max {report['append_s'][1]:.2f}s (the one that merged)")
+        for label, (found, p50, worst) in report['queries'].items():
+            print(f"{label}: {found} events, p50/max {p50:.2f}/{worst:.2f} ms")
+        print(f"falco KOs by move in {report['count_by_ms']:.2f} ms: {report['ko_moves']}")
+
+if __name__ == "__main__":
+    main()
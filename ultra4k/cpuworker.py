@@ -0,0 +1,282 @@
+import atexit
+import multiprocessing
+import platform
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from ultra4k import engine
+from ultra4k import imitation
+
+AVAILABLE = platform.system() != "Emscripten"  # the browser build has no processes; the CPU stays inline there
+WAKE_TIMEOUT = 0.1      # seconds the worker waits for a snapshot before checking whether it should stop
+START_TIMEOUT = 30.0    # seconds close() allows a worker that never got ready before giving up on it
+CHECK_EVERY = 60        # frames between checks that a worker missing its deadlines is still alive
+STAGES = tuple(engine.STAGE_DATA)
+CHARACTERS = tuple(engine.CHARACTER_STATS)
+
+# Control words, int64: written by one side each
+PUBLISHED = 0     # game loop: sequence number of the newest snapshot
+ANSWER = 1        # worker: (sequence << ANSWER_SHIFT) | action code, one aligned store so it is never torn
+READY = 2         # worker: 1 once the model is loaded
+STOP = 3          # game loop: 1 to shut the worker down
+DECISIONS = 4     # worker: snapshots answered
+DECIDE_NS = 5     # worker: total nanoseconds spent in predict()
+CONTROL_WORDS = 8
+ANSWER_SHIFT = 16
+
+# Action code bits: the imitation recorder's actions, upb, and whether and which way the CPU turned
+ACTION_BITS = imitation.ACTIONS + ("upb",)
+FACE_SET = 1 << len(ACTION_BITS)
+FACE_RIGHT = FACE_SET << 1
+# Held actions repeat when the worker misses a frame; presses (jump, attack, ...) would double up, so they don't
+HELD = sum(1 << ACTION_BITS.index(name) for name in ("move_left", "move_right", "shield"))
+
+# Snapshot, float64: the stage, then these fields for the player and the CPU
+FIGHTER_FIELDS = ("left", "top", "width", "height", "vx", "vy", "damage", "on_ground", "hitstun", "attacking",
+                  "shielding", "respawn_timer", "jumps_left", "facing_right", "character")
+SNAPSHOT = 1 + 2 * len(FIGHTER_FIELDS)
+
+class FighterView:
+    """The parts of a Character the CPU models read, rebuilt from a snapshot in the worker"""
+
+    __slots__ = ("rect", "velocity", "width", "height", "damage", "on_ground", "hitstun", "attacking", "shielding",
+                 "respawn_timer", "jumps_left", "facing_right", "character")
+
+    def __init__(self):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.velocity = [0.0, 0.0]
+
+    def load(self, row):
+        left, top, width, height, vx, vy, damage, on_ground, hitstun, attacking, shielding, respawn, jumps, facing, character = row
+        self.rect.update(int(left), int(top), int(width), int(height))
+        self.width = int(width)
+        self.height = int(height)
+        self.velocity[0] = vx
+        self.velocity[1] = vy
+        self.damage = damage
+        self.on_ground = bool(on_ground)
+        self.hitstun = int(hitstun)
+        self.attacking = bool(attacking)
+        self.shielding = bool(shielding)
+        self.respawn_timer = int(respawn)
+        self.jumps_left = int(jumps)
+        self.facing_right = bool(facing)
+        self.character = CHARACTERS[int(character)]
+
+def write_fighter(fighter, out):
+    rect = fighter.rect
+    out[:] = (rect.left, rect.top, rect.width, rect.height, fighter.velocity[0], fighter.velocity[1], fighter.damage,
+              fighter.on_ground, fighter.hitstun, fighter.attacking, fighter.shielding, fighter.respawn_timer,
+              fighter.jumps_left, fighter.facing_right, CHARACTERS.index(fighter.character))
+
+def encode(actions, facing_before, facing_after):
+    code = 0
+    for bit, name in enumerate(ACTION_BITS):
+        if actions.get(name):
+            code |= 1 << bit
+    if facing_after != facing_before:
+        code |= FACE_SET | (FACE_RIGHT if facing_after else 0)
+    return code
+
+class Thinking:
+    """Wraps a model with extra busy work per decision, standing in for search or inference in benchmarks"""
+
+    def __init__(self, model, seconds):
+        self.model = model
+        self.seconds = seconds
+
+    def predict(self, game_state):
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            pass
+        return self.model.predict(game_state)
+
+def make_model(cpu_mode, navigation, think=0.0):
+    """The CPU model setup() would build inline"""
+    if cpu_mode == "imitation":
+        model = imitation.ImitationAI(imitation.INDEX_DIR)
+    else:
+        model = engine.navigating_ai_model(navigation)
+    return Thinking(model, think) if think else model
+
+def _buffers(memory):
+    control = np.ndarray(CONTROL_WORDS, dtype=np.int64, buffer=memory.buf)
+    slots = np.ndarray((2, SNAPSHOT), dtype=np.float64, buffer=memory.buf, offset=CONTROL_WORDS * 8)
+    return control, slots
+
+def _run(name, wake, cpu_mode, navigation, think):
+    """Worker process: answer the newest snapshot each time the game loop publishes one"""
+    memory = shared_memory.SharedMemory(name)
+    control, slots = _buffers(memory)
+    model = make_model(cpu_mode, navigation, think)
+    player, ai = FighterView(), FighterView()
+    view = {'player': player, 'ai': ai, 'stage': None}
+    answered = 0
+    row = np.zeros(SNAPSHOT)
+    control[READY] = 1
+    while not control[STOP]:
+        wake.acquire(timeout=WAKE_TIMEOUT)
+        sequence = int(control[PUBLISHED])
+        if sequence == answered:
+            continue
+        row[:] = slots[sequence & 1]
+        if control[PUBLISHED] != sequence:
+            continue  # the game loop moved on while we copied; take the newer snapshot instead
+        view['stage'] = STAGES[int(row[0])]
+        player.load(row[1:1 + len(FIGHTER_FIELDS)])
+        ai.load(row[1 + len(FIGHTER_FIELDS):])
+        facing = ai.facing_right
+        start = time.perf_counter_ns()
+        actions = model.predict(view)
+        control[DECIDE_NS] += time.perf_counter_ns() - start
+        control[ANSWER] = sequence << ANSWER_SHIFT | encode(actions, facing, ai.facing_right)
+        control[DECISIONS] += 1
+        answered = sequence
+    del control, slots
+    memory.close()
+
+class RemoteCPU:
+    """Runs the CPU opponent's model in a worker process with one frame of latency
+
+    predict() has the same signature as the inline models, so update_loop
+    calls it the same way. Each call takes the worker's answer to the
+    previous frame's snapshot from shared memory, writes this frame's
+    snapshot into the other half of a double buffer, bumps the sequence
+    number and wakes the worker; nothing in it waits on the worker. If the
+    answer isn't there yet the frame is a deadline miss and the CPU keeps
+    holding what it held last frame; an answer that turns up late is still
+    used once it arrives.
+    """
+
+    def __init__(self, cpu_mode="melee", navigation=True, think=0.0):
+        self.cpu_mode = cpu_mode
+        self.navigation = navigation
+        self.think = think
+        self.memory = None
+        self.process = None
+        self.wake = None
+        self.sequence = 0
+        self.code = 0
+        self.applied = 0
+        self.actions = dict.fromkeys(ACTION_BITS, False)
+        self.frames = 0
+        self.misses = 0
+        self.inline = None  # the model run in-process if the worker dies
+
+    def start(self):
+        # spawn rather than fork: the child must not inherit the game's SDL window and event loop
+        context = multiprocessing.get_context("spawn")
+        self.memory = shared_memory.SharedMemory(create=True, size=CONTROL_WORDS * 8 + 2 * SNAPSHOT * 8)
+        self.control, self.slots = _buffers(self.memory)
+        self.control[:] = 0
+        self.wake = context.Semaphore(0)
+        self.process = context.Process(target=_run, args=(self.memory.name, self.wake, self.cpu_mode, self.navigation, self.think),
+                                       name="cpu-worker", daemon=True)
+        try:
+            self.process.start()
+        except BaseException:
+            self.process = None
+            del self.control, self.slots
+            self.memory.close()
+            self.memory.unlink()
+            raise
+        # Shared memory outlives the process unless unlinked, so clean up even if main() never gets to
+        atexit.register(self.close)
+        return self
+
+    def ready(self):
+        return bool(self.control[READY])
+
+    def predict(self, game_state):
+        """Actions for this frame, decided from last frame's snapshot; never blocks"""
+        if self.inline is not None:
+            return self.inline.predict(game_state)
+        control = self.control
+        answer = int(control[ANSWER])
+        answered, code = answer >> ANSWER_SHIFT, answer & ((1 << ANSWER_SHIFT) - 1)
+        if self.sequence and answered != self.sequence:
+            if control[READY]:
+                self.misses += 1
+            if self.frames % CHECK_EVERY == 0 and not self.process.is_alive():
+                print(f"CPU worker exited with code {self.process.exitcode}; deciding in-process from now on")
+                self.inline = make_model(self.cpu_mode, self.navigation, self.think)
+                return self.inline.predict(game_state)
+        if answered > self.applied:
+            # A late answer is still a decision not acted on yet, so it is used in full
+            self.code = code
+            if code & FACE_SET:
+                game_state['ai'].facing_right = bool(code & FACE_RIGHT)
+        else:
+            self.code &= HELD
+        self.applied = max(self.applied, answered)
+        self.frames += 1
+        for bit, name in enumerate(ACTION_BITS):
+            self.actions[name] = bool(self.code >> bit & 1)
+        sequence = self.sequence + 1
+        slot = self.slots[sequence & 1]
+        slot[0] = STAGES.index(game_state['stage'])
+        write_fighter(game_state['player'], slot[1:1 + len(FIGHTER_FIELDS)])
+        write_fighter(game_state['ai'], slot[1 + len(FIGHTER_FIELDS):])
+        control[PUBLISHED] = self.sequence = sequence
+        self.wake.release()
+        return self.actions
+
+    def decide_seconds(self):
+        """Mean time the worker's model spends on one decision"""
+        decisions = int(self.control[DECISIONS])
+        return int(self.control[DECIDE_NS]) / decisions / 1e9 if decisions else 0.0
+
+    def close(self):
+        if self.process is None:
+            return
+        atexit.unregister(self.close)
+        self.control[STOP] = 1
+        self.wake.release()
+        self.process.join(START_TIMEOUT if not self.control[READY] else 1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+        del self.control, self.slots
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+def benchmark(frames=1200, fps=60, think=0.008):
+    """Frame times with the CPU inline and through the worker, for the stock model and one thinking for think seconds"""
+    from ultra4k import profiling
+    results = {}
+    for seconds in (0.0, think):
+        for where in ("inline", "worker"):
+            play = profiling.SelfPlay(0)
+            game_state = play.game_state
+            for fighter in game_state.fighters:
+                fighter.stocks = 99
+            if where == "inline":
+                model = make_model("melee", True, seconds)
+            else:
+                model = RemoteCPU("melee", True, seconds).start()
+                while not model.ready():
+                    time.sleep(0.01)
+            times = []
+            for frame in range(frames):
+                start = time.perf_counter()
+                engine.apply_ai_actions(game_state.ai, model.predict(game_state.ai_view))
+                game_state.update()
+                times.append(time.perf_counter() - start)
+                # Leave the rest of the frame idle like the paced game loop does
+                time.sleep(max(0.0, 1 / fps - times[-1]))
+            times.sort()
+            result = {'p50_ms': times[frames // 2] * 1000, 'p99_ms': times[frames * 99 // 100] * 1000}
+            if where == "worker":
+                result.update(misses=model.misses, decide_ms=model.decide_seconds() * 1000)
+                model.close()
+            results[f"{where}, think {seconds * 1000:g} ms"] = result
+    return results
+
+if __name__ == "__main__":
+    for label, result in benchmark().items():
+        print(label, {key: round(value, 3) for key, value in result.items()})
@@ -0,0 +1,1334 @@
+import os
+import pygame
+import random
+import math
+import time
+from ultra4k import combos
+from ultra4k import eventlog
+from ultra4k import imitation
+from ultra4k import pacing
+from ultra4k import quality
+from ultra4k import reachability
+from ultra4k import startup
+from ultra4k import trig
+from ultra4k.collision import sweep_platforms, FLOOR, CEILING
+from ultra4k.presenter import Presenter
+from ultra4k.projectiles import ProjectilePool
+
+# Constants
+FPS = 60
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = 400
+DISPLAY_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)  # Window size; the game is scaled up in integer steps, e.g. (3840, 2160)
+GRAVITY = 0.5
+JUMP_STRENGTH = -10
+PLAYER_SPEED = 4
+AI_SPEED = 2.5
+ATTACK_DURATION = 15
+ATTACK_COOLDOWN = 30
+ATTACK_RANGE = 30
+ATTACK_SIZE = (60, 50)
+
+# Advanced mechanics constants
+DASH_SPEED = 7
+DASH_DURATION = 15
+AIR_ACCELERATION = 0.2
+AIR_FRICTION = 0.05
+GROUND_FRICTION = 0.15
+FASTFALL_MULTIPLIER = 2
+SHIELD_HEALTH_MAX = 100
+SHIELD_DECAY_RATE = 0.5
+SHIELD_REGEN_RATE = 0.2
+SHIELD_STUN = 10
+HITSTUN_MULTIPLIER = 0.4
+DI_INFLUENCE = 0.2
+L_CANCEL_REDUCTION = 0.5
+LEDGE_GRAB_RANGE = 20
+LEDGE_RELEASE_SPEED = 2
+TECH_WINDOW = 20
+TECH_COOLDOWN = 40
+EVENT_LOG_DIR = None  # Set to a directory to record match events as .npy columns
+RECORD_DIR = None  # Set to a directory to record the human's states and actions for the imitation CPU
+REPLAY_DIR = None  # Set to a directory to save every match as a seekable replay (see replay.py)
+CPU_MODE = "melee"  # "imitation" plays like the recordings indexed in imitation.INDEX_DIR
+CPU_PROCESS = False  # Decide the CPU's actions in a worker process, one frame behind (see cpuworker.py)
+FIXED_POINT = False  # Integer fixed-point Character physics (fixedpoint.FixedCharacter) for lockstep play and replay checks
+AI_NAVIGATION = True  # MeleeAI routes between platforms and recovers using reachability.CACHE_PATH
+COMBO_STATS = True  # Live combo counters and end-of-match punish stats (see combos.py)
+KO_PERCENTS = True  # Show the percent each fighter can be KO'd at from where it stands, from kotable.CACHE_PATH
+METRICS_PORT = None  # Set to a port to serve Prometheus metrics on localhost while main() runs (see metrics.py)
+RENDER_THREAD = False  # Draw on a second thread one frame behind the simulation; pays off on multi-core machines (see pipeline.py)
+QUALITY_GOVERNOR = True  # Shed visual work (hitboxes, HUD redraws, render scale) when frames run over budget
+HUD_HEIGHT = 90  # Rows of the screen the HUD draws into
+SAVE_STATE_KEYS = True  # F5 saves and F9 loads the selected save-state slot, F6/F7 pick the slot (see savestate.py)
+
+# Character stats (simplified from Melee)
+CHARACTER_STATS = {
+    "fox": {
+        "weight": 75,
+        "fall_speed": 0.7,
+        "jump_height": -12,
+        "air_speed": 0.25,
+        "dash_speed": 8,
+        "color": (255, 128, 0),  # Orange
+        "moves": {
+            "jab": {"damage": 3, "knockback": 2, "angle": 45, "frame_data": {"startup": 2, "active": 2, "cooldown": 10}},
+            "ftilt": {"damage": 7, "knockback": 5, "angle": 30, "frame_data": {"startup": 5, "active": 3, "cooldown": 15}},
+            "fsmash": {"damage": 15, "knockback": 12, "angle": 45, "frame_data": {"startup": 10, "active": 3, "cooldown": 25}},
+            "nair": {"damage": 5, "knockback": 3, "angle": 45, "frame_data": {"startup": 4, "active": 5, "cooldown": 15}},
+            "fair": {"damage": 9, "knockback": 6, "angle": 30, "frame_data": {"startup": 6, "active": 4, "cooldown": 20}},
+            "upb": {"damage": 15, "knockback": 8, "angle": 80, "frame_data": {"startup": 8, "active": 5, "cooldown": 30}},
+            "shine": {"damage": 5, "knockback": 1, "angle": 0, "frame_data": {"startup": 1, "active": 1, "cooldown": 15}},
+            "laser": {"damage": 3, "knockback": 0, "angle": 0, "frame_data": {"startup": 4, "active": 1, "cooldown": 8},
+                      "projectile": {"speed": 14, "lifetime": 45, "size": [18, 4], "color": (255, 60, 60)}}
+        }
+    },
+    "falco": {
+        "weight": 80,
+        "fall_speed": 0.65,
+        "jump_height": -13,
+        "air_speed": 0.2,
+        "dash_speed": 7.5,
+        "color": (0, 0, 255),  # Blue
+        "moves": {
+            "jab": {"damage": 3, "knockback": 2, "angle": 45, "frame_data": {"startup": 2, "active": 2, "cooldown": 10}},
+            "ftilt": {"damage": 8, "knockback": 6, "angle": 30, "frame_data": {"startup": 5, "active": 3, "cooldown": 15}},
+            "fsmash": {"damage": 14, "knockback": 13, "angle": 45, "frame_data": {"startup": 11, "active": 3, "cooldown": 25}},
+            "nair": {"damage": 6, "knockback": 4, "angle": 45, "frame_data": {"startup": 4, "active": 5, "cooldown": 15}},
+            "fair": {"damage": 10, "knockback": 7, "angle": 30, "frame_data": {"startup": 6, "active": 4, "cooldown": 20}},
+            "upb": {"damage": 14, "knockback": 7, "angle": 80, "frame_data": {"startup": 9, "active": 5, "cooldown": 30}},
+            "shine": {"damage": 6, "knockback": 0, "angle": 90, "frame_data": {"startup": 1, "active": 1, "cooldown": 15}},
+            "laser": {"damage": 3, "knockback": 2, "angle": 0, "frame_data": {"startup": 6, "active": 1, "cooldown": 12},
+                      "projectile": {"speed": 10, "lifetime": 60, "size": [24, 4], "color": (255, 60, 60)}}
+        }
+    },
+    "marth": {
+        "weight": 85,
+        "fall_speed": 0.5,
+        "jump_height": -11,
+        "air_speed": 0.18,
+        "dash_speed": 7,
+        "color": (0, 0, 128),  # Dark blue
+        "moves": {
+            "jab": {"damage": 4, "knockback": 2, "angle": 45, "frame_data": {"startup": 4, "active": 2, "cooldown": 10}},
+            "ftilt": {"damage": 9, "knockback": 6, "angle": 30, "frame_data": {"startup": 7, "active": 3, "cooldown": 15}},
+            "fsmash": {"damage": 16, "knockback": 14, "angle": 45, "frame_data": {"startup": 12, "active": 3, "cooldown": 25}},
+            "nair": {"damage": 6, "knockback": 4, "angle": 45, "frame_data": {"startup": 6, "active": 5, "cooldown": 15}},
+            "fair": {"damage": 11, "knockback": 8, "angle": 30, "frame_data": {"startup": 7, "active": 4, "cooldown": 20}},
+            "upb": {"damage": 13, "knockback": 6, "angle": 80, "frame_data": {"startup": 10, "active": 5, "cooldown": 30}},
+            "counter": {"damage": 8, "knockback": 7, "angle": 45, "frame_data": {"startup": 5, "active": 6, "cooldown": 30}}
+        }
+    }
+}
+
+MOVE_NAMES = ("jab", "ftilt", "fsmash", "nair", "fair", "upb", "shine", "counter", "laser")
+
+# Hitbox (width, height, anchor) per move; "front" boxes extend from the side the owner faces
+HITBOX_SHAPES = {
+    "jab": (40, 30, "front"),
+    "ftilt": (60, 40, "front"),
+    "fsmash": (80, 50, "front"),
+    "nair": (100, 100, "center"),
+    "fair": (60, 40, "front"),
+    "upb": (50, 70, "above"),
+    "shine": (80, 80, "center"),
+    "counter": (60, 80, "center"),
+}
+NO_HITBOXES = ()
+AI_STRATEGIES = ("approach", "retreat", "defend")
+
+# MeleeAI behavior probabilities (per decision or per frame)
+AI_PARAMS = {
+    "random_strategy": 0.7,  # chance a new strategy is drawn at random instead of "approach"
+    "approach_jump": 0.05,
+    "approach_dash": 0.02,
+    "retreat_jump": 0.1,
+    "defend_shield": 0.3,
+    "defend_move": 0.2,
+    "special": 0.02,
+}
+FONTS = {}
+
+# Stage data
+STAGE_DATA = {
+    "battlefield": {
+        "platforms": [
+            {"rect": [0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40], "type": "main"},  # Main platform
+            {"rect": [150, SCREEN_HEIGHT - 150, 300, 20], "type": "soft"},  # Middle platform
+            {"rect": [50, SCREEN_HEIGHT - 250, 150, 20], "type": "soft"},  # Left platform
+            {"rect": [SCREEN_WIDTH - 200, SCREEN_HEIGHT - 250, 150, 20], "type": "soft"}  # Right platform
+        ],
+        "blast_zones": {
+            "left": -100,
+            "right": SCREEN_WIDTH + 100,
+            "top": -100,
+            "bottom": SCREEN_HEIGHT + 150
+        },
+        "spawn_points": [[150, 100], [450, 100]],
+        "background_color": (20, 20, 50)
+    },
+    "final_destination": {
+        "platforms": [
+            {"rect": [0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40], "type": "main"}  # Only main platform
+        ],
+        "blast_zones": {
+            "left": -100,
+            "right": SCREEN_WIDTH + 100,
+            "top": -100,
+            "bottom": SCREEN_HEIGHT + 150
+        },
+        "spawn_points": [[150, 100], [450, 100]],
+        "background_color": (40, 0, 60)
+    },
+    "dreamland": {
+        "platforms": [
+            {"rect": [50, SCREEN_HEIGHT - 40, SCREEN_WIDTH - 100, 40], "type": "main"},  # Main platform
+            {"rect": [200, SCREEN_HEIGHT - 160, 200, 20], "type": "soft"},  # Middle platform
+            {"rect": [100, SCREEN_HEIGHT - 240, 120, 20], "type": "soft"},  # Left platform
+            {"rect": [SCREEN_WIDTH - 220, SCREEN_HEIGHT - 240, 120, 20], "type": "soft"}  # Right platform
+        ],
+        "blast_zones": {
+            "left": -120,
+            "right": SCREEN_WIDTH + 120,
+            "top": -120,
+            "bottom": SCREEN_HEIGHT + 180
+        },
+        "spawn_points": [[150, 100], [450, 100]],
+        "background_color": (100, 200, 255)
+    }
+}
+
+# Utility functions
+def calculate_knockback(base_kb, damage, weight, scaling=1.0):
+    """Calculate knockback based on damage, weight and scaling"""
+    return base_kb * (1 + (damage / 100)) * (1 / (weight / 100)) * scaling
+
+def calculate_hitstun(knockback):
+    """Calculate hitstun frames based on knockback"""
+    return int(knockback * HITSTUN_MULTIPLIER)
+
+ANGLE_VECTORS = {}
+DI_ROTATIONS = {}
+
+def angle_vector(degrees):
+    """Return the cached (cos, sin) of a launch angle in degrees, from the integer trig tables"""
+    vector = ANGLE_VECTORS.get(degrees)
+    if vector is None:
+        vector = ANGLE_VECTORS[degrees] = trig.vector(round(degrees * trig.STEPS_PER_DEGREE))
+    return vector
+
+def di_rotation(di_x, di_y):
+    """Return the cached (cos, sin) of the rotation a DI direction applies to knockback
+
+    Built from the integer trig tables rather than libm, so knockback with DI
+    is bit-identical on every machine.
+    """
+    rotation = DI_ROTATIONS.get((di_x, di_y))
+    if rotation is None:
+        direction = trig.atan2(round(di_y * trig.SCALE), round(di_x * trig.SCALE))
+        rotation = DI_ROTATIONS[(di_x, di_y)] = trig.vector(round(direction * DI_INFLUENCE))
+    return rotation
+
+def apply_di(kb_x, kb_y, di_x, di_y):
+    """Apply directional influence to knockback"""
+    cos_di, sin_di = di_rotation(di_x, di_y)
+    return kb_x * cos_di - kb_y * sin_di, kb_x * sin_di + kb_y * cos_di
+
+class DataLoader:
+    def __init__(self, name, is_char=True):
+        self.name = name
+        self.is_char = is_char
+
+    def load_data(self):
+        if self.is_char:
+            if self.name in CHARACTER_STATS:
+                char_stats = CHARACTER_STATS[self.name]
+                position = [100 if self.name == "fox" else 450, SCREEN_HEIGHT - 100]
+                return {
+                    'position': position,
+                    'velocity': [0, 0],
+                    'health': 0,
+                    'stocks': 4,
+                    'width': 40,
+                    'height': 50,
+                    'on_ground': False,
+                    'attacking': False,
+                    'attack_timer': 0,
+                    'attack_cooldown_timer': 0,
+                    'facing_right': True,
+                    'character': self.name,
+                    'weight': char_stats['weight'],
+                    'fall_speed': char_stats['fall_speed'],
+                    'jump_height': char_stats['jump_height'],
+                    'air_speed': char_stats['air_speed'],
+                    'dash_speed': char_stats['dash_speed'],
+                    'color': char_stats['color'],
+                    'moves': char_stats['moves'],
+                    'jumps_left': 2,
+                    'dash_timer': 0,
+                    'shield_health': SHIELD_HEALTH_MAX,
+                    'shielding': False,
+                    'shield_stun': 0,
+                    'hitstun': 0,
+                    'fastfalling': False,
+                    'tech_window': 0,
+                    'tech_cooldown': 0,
+                    'ledge_grab': False,
+                    'ledge_cooldown': 0,
+                    'current_move': None,
+                    'move_frame': 0,
+                    'l_canceling': False,
+                    'di_direction': [0, 0]
+                }
+            else:
+                return {
+                    'position': [100, SCREEN_HEIGHT - 100],
+                    'velocity': [0, 0],
+                    'health': 0,
+                    'stocks': 4,
+                    'width': 40,
+                    'height': 50,
+                    'on_ground': False,
+                    'attacking': False,
+                    'attack_timer': 0,
+                    'attack_cooldown_timer': 0,
+                    'facing_right': True,
+                    'character': "generic",
+                    'weight': 80,
+                    'fall_speed': 0.6,
+                    'jump_height': -11,
+                    'air_speed': 0.2,
+                    'dash_speed': 7,
+                    'color': (255, 0, 0),
+                    'jumps_left': 2,
+                    'dash_timer': 0,
+                    'shield_health': SHIELD_HEALTH_MAX,
+                    'shielding': False,
+                    'shield_stun': 0,
+                    'hitstun': 0,
+                    'fastfalling': False,
+                    'tech_window': 0,
+                    'tech_cooldown': 0,
+                    'ledge_grab': False,
+                    'ledge_cooldown': 0,
+                    'current_move': None,
+                    'move_frame': 0,
+                    'l_canceling': False,
+                    'di_direction': [0, 0]
+                }
+        else:
+            if self.name in STAGE_DATA:
+                stage_data = STAGE_DATA[self.name]
+                platforms = [{'rect': pygame.Rect(p['rect']), 'type': p['type']} for p in stage_data['platforms']]
+                return {
+                    'platforms': platforms,
+                    'blast_zones': stage_data['blast_zones'],
+                    'spawn_points': stage_data['spawn_points'],
+                    'background_color': stage_data['background_color']
+                }
+            else:
+                return {
+                    'platforms': [{'rect': pygame.Rect(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40), 'type': 'main'}],
+                    'blast_zones': {'left': -100, 'right': SCREEN_WIDTH + 100, 'top': -100, 'bottom': SCREEN_HEIGHT + 150},
+                    'spawn_points': [[150, 100], [450, 100]],
+                    'background_color': (20, 20, 50)
+                }
+
+def navigating_ai_model(navigation=True, params=None):
+    """MeleeAI with the reachability graph when it is cached; otherwise it uses its jump heuristic while the graph builds"""
+    if not navigation:
+        return train_simple_ai_model(params)
+    model = train_simple_ai_model(params, reach=reachability.ReachabilityGraph.load(build=False))
+    if model.reach is None:
+        reachability.build_in_background(lambda graph: setattr(model, "reach", graph))
+    return model
+
+def train_simple_ai_model(params=None, reach=None):
+    class MeleeAI:
+        def __init__(self):
+            self.params = dict(AI_PARAMS, **(params or {}))
+            self.reach = reach
+            self.decision_cooldown = 0
+            self.current_strategy = "approach"
+            self.strategy_timer = 0
+            self.plan = None
+            self.plan_frame = 0
+            self.plan_airborne = False
+            self.actions = {'move_left': False, 'move_right': False, 'jump': False, 'attack': False, 'shield': False, 'dash': False, 'special': False, 'upb': False}
+
+        def start_plan(self, ai, program):
+            self.plan = program
+            self.plan_frame = 0
+            self.plan_airborne = not ai.on_ground
+            # The graph simulated each program facing the way it drifts
+            ai.facing_right = program[0] >= 0
+
+        def follow_plan(self, ai, actions):
+            """Play the next frame of the current route or recovery; False once it is over"""
+            if self.plan_airborne and ai.on_ground or ai.hitstun > 0 or ai.respawn_timer > 0 \
+               or self.plan_frame >= reachability.SIM_FRAMES:
+                self.plan = None
+                return False
+            reachability.program_actions(self.plan, self.plan_frame, actions)
+            self.plan_frame += 1
+            self.plan_airborne = self.plan_airborne or not ai.on_ground
+            return True
+
+        def predict(self, game_state):
+            player = game_state['player']
+            ai = game_state['ai']
+            params = self.params
+            if self.decision_cooldown > 0:
+                self.decision_cooldown -= 1
+            if self.strategy_timer > 0:
+                self.strategy_timer -= 1
+            else:
+                self.current_strategy = random.choice(AI_STRATEGIES) if random.random() < params['random_strategy'] else "approach"
+                self.strategy_timer = random.randint(30, 120)
+            dist_x = player.rect.centerx - ai.rect.centerx
+            dist_y = player.rect.centery - ai.rect.centery
+            dist = math.sqrt(dist_x**2 + dist_y**2)
+            actions = self.actions
+            for action in actions:
+                actions[action] = False
+            reach = self.reach
+            if reach is not None:
+                if self.plan is not None and self.follow_plan(ai, actions):
+                    return actions
+                stage = game_state['stage']
+                main = reach.main_platform(stage)
+                # Out of hitstun beside the main platform: pick the fastest way back onto it
+                if not ai.on_ground and ai.hitstun <= 0 and not ai.attacking and (ai.rect.right < main.left or ai.rect.left > main.right):
+                    program = reach.recovery(stage, ai.character, ai.rect.left, ai.rect.top,
+                                             ai.velocity[0], ai.velocity[1], ai.jumps_left)
+                    if program is not None:
+                        self.start_plan(ai, program)
+                        self.follow_plan(ai, actions)
+                        return actions
+            if self.current_strategy == "approach":
+                if dist_x < -20:
+                    actions['move_left'] = True
+                    ai.facing_right = False
+                elif dist_x > 20:
+                    actions['move_right'] = True
+                    ai.facing_right = True
+                if dist_y < -50 and ai.on_ground:
+                    program = None
+                    if reach is not None and player.on_ground:
+                        platform = reach.standing_on(stage, ai)
+                        target = reach.standing_on(stage, player)
+                        if platform >= 0 and target >= 0:
+                            program = reach.route(stage, ai.character, platform, ai.rect.centerx, target)
+                    if program is not None:
+                        self.start_plan(ai, program)
+                        self.follow_plan(ai, actions)
+                        return actions
+                    if random.random() < params['approach_jump']:
+                        actions['jump'] = True
+                if abs(dist_x) < ATTACK_RANGE + player.width and abs(dist_y) < ai.height:
+                    actions['attack'] = True
+                if abs(dist_x) > 100 and random.random() < params['approach_dash']:
+                    actions['dash'] = True
+            elif self.current_strategy == "retreat":
+                if dist_x < 0:
+                    actions['move_right'] = True
+                    ai.facing_right = True
+                else:
+                    actions['move_left'] = True
+                    ai.facing_right = False
+                if random.random() < params['retreat_jump']:
+                    actions['jump'] = True
+                if player.attacking and dist < 100:
+                    actions['shield'] = True
+            elif self.current_strategy == "defend":
+                if dist < 150 and random.random() < params['defend_shield']:
+                    actions['shield'] = True
+                if random.random() < params['defend_move']:
+                    actions['move_left' if random.random() < 0.5 else 'move_right'] = True
+                    ai.facing_right = not actions['move_left']
+                if dist < 60:
+                    actions['attack'] = True
+            if random.random() < params['special']:
+                actions['special'] = True
+            return actions
+    return MeleeAI()
+
+class Move:
+    def __init__(self, name, data, owner):
+        self.name = name
+        self.damage = data['damage']
+        self.knockback = data['knockback']
+        self.cos_angle, self.sin_angle = angle_vector(data['angle'])
+        self.frame_data = data['frame_data']
+        self.projectile = data.get('projectile')
+        self.owner = owner
+        self.current_frame = 0
+        self.shape = HITBOX_SHAPES.get(name)
+        self.hitbox = pygame.Rect(0, 0, 0, 0)
+        self.active_hitboxes = [self.hitbox]
+        self.hitboxes = NO_HITBOXES
+        self.hit_targets = set()
+        self.spec = None
+
+    def restart(self):
+        """Rewind to frame 0 so the same Move object can be performed again"""
+        self.current_frame = 0
+        self.hitboxes = NO_HITBOXES
+        self.hit_targets.clear()
+
+    def update(self):
+        self.current_frame += 1
+        self.hitboxes = NO_HITBOXES
+        if self.projectile and self.current_frame == self.frame_data['startup'] and self.owner.projectiles is not None:
+            self.fire()
+        if self.shape and self.frame_data['startup'] <= self.current_frame < self.frame_data['startup'] + self.frame_data['active']:
+            width, height, anchor = self.shape
+            rect = self.owner.rect
+            if anchor == "front":
+                x = rect.right if self.owner.facing_right else rect.left - width
+                y = rect.centery - height // 2
+            elif anchor == "above":
+                x = rect.centerx - width // 2
+                y = rect.top - height
+            else:
+                x = rect.centerx - width // 2
+                y = rect.centery - height // 2
+            self.hitbox.update(x, y, width, height)
+            self.hitboxes = self.active_hitboxes
+        return self.current_frame >= self.frame_data['startup'] + self.frame_data['active'] + self.frame_data['cooldown']
+
+    def fire(self):
+        owner = self.owner
+        width, height = self.projectile['size']
+        direction = 1 if owner.facing_right else -1
+        if self.spec is None:
+            self.spec = owner.projectiles.register((owner.character, self.name), self.name, self.damage, self.knockback,
+                                                   self.cos_angle, self.sin_angle, self.projectile['color'])
+        x = owner.rect.right + width / 2 if owner.facing_right else owner.rect.left - width / 2
+        owner.projectiles.spawn(x, owner.rect.centery - 10, self.projectile['speed'] * direction, 0,
+                                width, height, self.projectile['lifetime'], owner.slot, self.spec)
+
+    def draw(self, screen):
+        for hitbox in self.hitboxes:
+            pygame.draw.rect(screen, (255, 255, 0), hitbox, 2)
+
+class Character:
+    UNIT = 1  # position and velocity units per pixel
+
+    def __init__(self, data):
+        self.position = list(data['position'])
+        self.velocity = list(data['velocity'])
+        self.damage = data['health']
+        self.stocks = data['stocks']
+        self.width = data['width']
+        self.height = data['height']
+        self.rect = pygame.Rect(self.position[0], self.position[1], self.width, self.height)
+        self.on_ground = data['on_ground']
+        self.attacking = data['attacking']
+        self.attack_timer = data['attack_timer']
+        self.attack_cooldown_timer = data['attack_cooldown_timer']
+        self.facing_right = data['facing_right']
+        self.character = data['character']
+        self.weight = data['weight']
+        self.fall_speed = data['fall_speed']
+        self.jump_height = data['jump_height']
+        self.air_speed = data['air_speed']
+        self.dash_speed = data['dash_speed']
+        self.color = data['color']
+        self.moves = data['moves']
+        self.jumps_left = data['jumps_left']
+        self.dash_timer = data['dash_timer']
+        self.shield_health = data['shield_health']
+        self.shielding = data['shielding']
+        self.shield_stun = data['shield_stun']
+        self.hitstun = data['hitstun']
+        self.fastfalling = data['fastfalling']
+        self.tech_window = data['tech_window']
+        self.tech_cooldown = data['tech_cooldown']
+        self.ledge_grab = data['ledge_grab']
+        self.ledge_cooldown = data['ledge_cooldown']
+        self.current_move = None
+        self.move_frame = data['move_frame']
+        self.l_canceling = data['l_canceling']
+        self.di_direction = list(data['di_direction'])
+        self.respawn_timer = 0
+        self.respawn_invincibility = 0
+        self.shield_broken = False
+        self.shield_break_timer = 0
+        self.is_cpu = False
+        self.slot = 0
+        self.events = None
+        self.projectiles = None
+        self.move_cache = {name: Move(name, move_data, self) for name, move_data in self.moves.items()}
+        self.last_attacker = None
+        self.last_move = None
+
+    def move(self, dx, dy):
+        if self.hitstun > 0 or self.shield_stun > 0 or self.shield_broken:
+            return
+        if self.dash_timer > 0:
+            if self.facing_right:
+                dx = self.dash_speed
+            else:
+                dx = -self.dash_speed
+            self.dash_timer -= 1
+        if self.on_ground:
+            if not self.attacking and not self.shielding:
+                if dx > 0:
+                    self.facing_right = True
+                elif dx < 0:
+                    self.facing_right = False
+                self.position[0] += dx
+        else:
+            if not self.attacking:
+                if dx > 0:
+                    self.velocity[0] = min(self.velocity[0] + self.air_speed, self.dash_speed * 0.8)
+                    self.facing_right = True
+                elif dx < 0:
+                    self.velocity[0] = max(self.velocity[0] - self.air_speed, -self.dash_speed * 0.8)
+                    self.facing_right = False
+
+    def jump(self):
+        if self.hitstun > 0 or self.shield_stun > 0 or self.shield_broken:
+            return
+        if self.on_ground and not self.attacking and not self.shielding:
+            self.velocity[1] = self.jump_height
+            self.on_ground = False
+            self.jumps_left = 1
+        elif not self.on_ground and self.jumps_left > 0 and not self.attacking:
+            self.velocity[1] = self.jump_height * 0.8
+            self.jumps_left -= 1
+
+    def dash(self):
+        if self.on_ground and not self.attacking and not self.shielding and self.hitstun <= 0 and self.shield_stun <= 0 and not self.shield_broken:
+            self.dash_timer = DASH_DURATION
+
+    def shield(self, activate):
+        if not self.on_ground or self.attacking or self.hitstun > 0 or self.shield_broken:
+            return
+        if activate and self.shield_health > 0:
+            self.shielding = True
+        else:
+            self.shielding = False
+
+    def fastfall(self):
+        if not self.on_ground and self.velocity[1] > 0 and not self.fastfalling:
+            self.velocity[1] *= FASTFALL_MULTIPLIER
+            self.fastfalling = True
+
+    def tech(self):
+        if not self.on_ground and self.tech_cooldown <= 0:
+            self.tech_window = TECH_WINDOW
+
+    def l_cancel(self):
+        if not self.on_ground and self.attacking:
+            self.l_canceling = True
+
+    def set_di(self, x, y):
+        magnitude = math.sqrt(x**2 + y**2)
+        if magnitude > 0:
+            self.di_direction[0] = x / magnitude
+            self.di_direction[1] = y / magnitude
+        else:
+            self.di_direction[0] = self.di_direction[1] = 0
+
+    def perform_move(self, move_name):
+        if self.hitstun > 0 or self.shield_stun > 0 or self.shield_broken:
+            return
+        if move_name in self.moves:
+            if self.shielding:
+                self.shielding = False
+            move = self.move_cache[move_name]
+            move.restart()
+            self.current_move = move
+            self.attacking = True
+            if move_name == "upb":
+                self.velocity[1] = self.jump_height * 1.2
+                self.velocity[0] = 5 if self.facing_right else -5
+            elif move_name == "shine":
+                self.velocity[0] = self.velocity[1] = 0
+
+    def update(self, stage):
+        if self.tick_timers(stage):
+            return
+        if self.shielding:
+            self.shield_health -= SHIELD_DECAY_RATE
+            if self.shield_health <= 0:
+                self.break_shield()
+        else:
+            self.shield_health = min(self.shield_health + SHIELD_REGEN_RATE, SHIELD_HEALTH_MAX)
+        if not self.on_ground:
+            max_fall_speed = self.fall_speed * 10 * (FASTFALL_MULTIPLIER if self.fastfalling else 1)
+            self.velocity[1] = min(self.velocity[1] + GRAVITY * self.fall_speed, max_fall_speed)
+        else:
+            self.fastfalling = False
+        self.velocity[0] *= (1 - (GROUND_FRICTION if self.on_ground else AIR_FRICTION))
+        if self.shielding and self.on_ground:
+            dx = dy = 0
+        else:
+            dx, dy = self.velocity
+        platform, face, _ = sweep_platforms(self.position[0], self.position[1], self.width, self.height, dx, dy, stage.platforms)
+        self.position[0] += dx
+        self.position[1] += dy
+        self.rect.topleft = (int(self.position[0]), int(self.position[1]))
+        self.settle(stage, platform, face, self.position, self.velocity)
+
+    # Steps shared with fixedpoint.FixedCharacter, which keeps its canonical kinematics in other lists; only the
+    # arithmetic is left to each update(), so position and velocity are passed in and scaled by UNIT
+
+    def respawn(self, spawn_point):
+        self.position[0], self.position[1] = spawn_point
+        self.velocity[0] = self.velocity[1] = 0
+        self.damage = 0
+        self.shield_health = SHIELD_HEALTH_MAX
+
+    def restore_shield(self):
+        self.shield_health = SHIELD_HEALTH_MAX * 0.3
+
+    def tick_timers(self, stage):
+        """Count down every timer; returns True while the fighter sits the frame out (respawning or shield broken)"""
+        if self.respawn_timer > 0:
+            self.respawn_timer -= 1
+            if self.respawn_timer <= 0:
+                self.respawn(stage.rng.choice(stage.spawn_points))
+                self.respawn_invincibility = 120
+                self.hitstun = 0
+                self.shield_stun = 0
+                self.shield_broken = False
+                self.jumps_left = 1
+            return True
+        if self.respawn_invincibility > 0:
+            self.respawn_invincibility -= 1
+        if self.shield_broken:
+            self.shield_break_timer -= 1
+            if self.shield_break_timer <= 0:
+                self.shield_broken = False
+                self.restore_shield()
+            return True
+        if self.hitstun > 0:
+            self.hitstun -= 1
+        if self.shield_stun > 0:
+            self.shield_stun -= 1
+        if self.tech_window > 0:
+            self.tech_window -= 1
+        if self.tech_cooldown > 0:
+            self.tech_cooldown -= 1
+        return False
+
+    def break_shield(self):
+        self.shield_broken = True
+        self.shield_break_timer = 300
+        self.shielding = False
+        if self.events is not None:
+            self.events.emit(eventlog.EVENT_SHIELD_BREAK, self)
+
+    def settle(self, stage, platform, face, position, velocity):
+        """Everything after the move: the current attack, landing, ledges, blast zones and the screen edges"""
+        rect = self.rect
+        if self.current_move:
+            if self.current_move.update():
+                self.current_move = None
+                self.attacking = False
+                if not self.on_ground and self.l_canceling:
+                    self.attack_cooldown_timer = int(self.attack_cooldown_timer * L_CANCEL_REDUCTION)
+                    self.l_canceling = False
+        self.on_ground = False
+        if face == FLOOR:
+            rect.bottom = platform['rect'].top
+            position[1] = rect.top * self.UNIT
+            velocity[1] = 0
+            self.on_ground = True
+            if self.hitstun > 0 and self.tech_window > 0:
+                self.hitstun = 0
+                self.tech_window = 0
+                self.tech_cooldown = TECH_COOLDOWN
+                if self.events is not None:
+                    self.events.emit(eventlog.EVENT_TECH, self)
+        elif face == CEILING:
+            rect.top = platform['rect'].bottom
+            position[1] = rect.top * self.UNIT
+            velocity[1] = 0
+        self.grab_ledge(stage, position, velocity)
+        self.check_blast_zones(stage, position)
+        self.clamp_to_screen(position, velocity)
+
+    def grab_ledge(self, stage, position, velocity):
+        if not self.on_ground and not self.ledge_grab and self.ledge_cooldown <= 0 and velocity[1] > 0:
+            rect = self.rect
+            for platform in stage.platforms:
+                if platform['type'] == 'main':
+                    ledge_left = platform['rect'].left
+                    ledge_right = platform['rect'].right
+                    ledge_top = platform['rect'].top
+                    if (abs(rect.right - ledge_left) < LEDGE_GRAB_RANGE and abs(rect.bottom - ledge_top) < LEDGE_GRAB_RANGE and not self.facing_right) or \
+                       (abs(rect.left - ledge_right) < LEDGE_GRAB_RANGE and abs(rect.bottom - ledge_top) < LEDGE_GRAB_RANGE and self.facing_right):
+                        self.ledge_grab = True
+                        position[0] = (ledge_left - self.width if not self.facing_right else ledge_right) * self.UNIT
+                        position[1] = (ledge_top - self.height) * self.UNIT
+                        velocity[0] = velocity[1] = 0
+                        self.hitstun = 0
+                        if self.events is not None:
+                            self.events.emit(eventlog.EVENT_LEDGE_GRAB, self)
+                        break
+        if self.ledge_grab and velocity[1] > 0:
+            self.ledge_grab = False
+            self.ledge_cooldown = 30
+            velocity[1] = LEDGE_RELEASE_SPEED * self.UNIT
+        if self.ledge_grab and self.jumps_left < 1:
+            self.jumps_left = 1
+        if self.ledge_cooldown > 0:
+            self.ledge_cooldown -= 1
+
+    def check_blast_zones(self, stage, position):
+        blast, unit = stage.blast_zones, self.UNIT
+        if position[0] < blast['left'] * unit or position[0] > blast['right'] * unit or \
+           position[1] < blast['top'] * unit or position[1] > blast['bottom'] * unit:
+            self.stocks -= 1
+            if self.events is not None:
+                self.events.emit(eventlog.EVENT_KO, self, self.last_attacker, self.last_move, self.stocks)
+            if self.stocks > 0:
+                self.respawn_timer = 60
+
+    def clamp_to_screen(self, position, velocity):
+        rect = self.rect
+        if rect.left < 0:
+            rect.left = 0
+            position[0] = 0
+            if velocity[0] < 0:
+                velocity[0] = 0
+        if rect.right > SCREEN_WIDTH:
+            rect.right = SCREEN_WIDTH
+            position[0] = rect.left * self.UNIT
+            if velocity[0] > 0:
+                velocity[0] = 0
+
+    def draw(self, screen, hitboxes=True):
+        if self.respawn_timer > 0:
+            return
+        color = (255, 255, 255) if self.respawn_invincibility > 0 and self.respawn_invincibility % 4 < 2 else self.color
+        pygame.draw.rect(screen, color, self.rect)
+        eye_x = self.rect.right - 10 if self.facing_right else self.rect.left + 10
+        pygame.draw.circle(screen, (0, 0, 0), (eye_x, self.rect.top + 15), 5)
+        if self.shielding:
+            shield_size = int(20 * (self.shield_health / SHIELD_HEALTH_MAX) + 20)
+            pygame.draw.circle(screen, (100, 200, 255, 128), self.rect.center, shield_size, 3)
+        if self.current_move and hitboxes:
+            self.current_move.draw(screen)
+        if self.shield_broken:
+            pygame.draw.line(screen, (255, 0, 0), (self.rect.centerx - 15, self.rect.top - 20), (self.rect.centerx + 15, self.rect.top - 5), 3)
+            pygame.draw.line(screen, (255, 0, 0), (self.rect.centerx - 15, self.rect.top - 5), (self.rect.centerx + 15, self.rect.top - 20), 3)
+
+class Stage:
+    def __init__(self, data):
+        self.platforms = data['platforms']
+        self.blast_zones = data['blast_zones']
+        self.spawn_points = data['spawn_points']
+        self.background_color = data['background_color']
+        self.background = None
+        self.rng = random.Random()  # Simulation randomness, kept apart from the AI's so replays re-simulate exactly
+
+    def draw(self, screen):
+        if self.background is None:
+            self.background = pygame.Surface(screen.get_size()).convert(screen)
+            self.background.fill(self.background_color)
+            for platform in self.platforms:
+                pygame.draw.rect(self.background, (100, 100, 100) if platform['type'] == 'main' else (150, 150, 150), platform['rect'])
+        screen.blit(self.background, (0, 0))
+
+class GameState:
+    def __init__(self):
+        self.player = None
+        self.ai = None
+        self.stage = None
+        self.game_timer = 0
+        self.game_time_limit = 8 * 60 * 60
+        self.game_over = False
+        self.winner = None
+        self.paused = False
+        self.current_stage_name = "battlefield"
+        self.player_character = "fox"
+        self.ai_character = "falco"
+        self.events = None
+        self.combos = None
+        self.ko_table = None
+        self.projectiles = ProjectilePool()
+        self.fighters = ()
+        self.matchups = ()
+        self.ai_view = None
+        self.character_class = Character
+        self.draw_hitboxes = True
+        self.hud_interval = 1  # frames between HUD redraws; above 1 the HUD is kept on its own surface
+        self.hud = None
+        self.hud_frame = 0
+
+    def reset(self):
+        self.game_timer = 0
+        self.game_over = False
+        self.winner = None
+        self.paused = False
+        char_loader_player = DataLoader(self.player_character, is_char=True)
+        char_loader_ai = DataLoader(self.ai_character, is_char=True)
+        stage_loader = DataLoader(self.current_stage_name, is_char=False)
+        player_data = char_loader_player.load_data()
+        ai_data = char_loader_ai.load_data()
+        stage_data = stage_loader.load_data()
+        self.player = self.character_class(player_data)
+        self.ai = self.character_class(ai_data)
+        self.ai.is_cpu = True
+        self.ai.slot = 1
+        self.fighters = (self.player, self.ai)
+        self.matchups = ((self.player, self.ai), (self.ai, self.player))
+        self.ai_view = {'player': self.player, 'ai': self.ai, 'stage': self.current_stage_name}
+        self.player.events = self.ai.events = self.events
+        self.player.projectiles = self.ai.projectiles = self.projectiles
+        self.stage = Stage(stage_data)
+        self.stage.rng.seed(random.getrandbits(32))
+        self.projectiles.set_stage(self.stage.platforms, self.stage.blast_zones)
+        if self.events is not None:
+            self.events.begin_match(self.current_stage_name)
+        if self.combos is not None:
+            self.combos.reset(self.fighters, self.events)
+
+    def update(self):
+        if self.paused or self.game_over:
+            return
+        self.game_timer += 1
+        if self.events is not None:
+            self.events.frame = self.game_timer
+        if self.combos is not None:
+            self.combos.frame = self.game_timer
+        if self.game_timer >= self.game_time_limit:
+            self.end_match("player" if self.player.stocks > self.ai.stocks or (self.player.stocks == self.ai.stocks and self.player.damage < self.ai.damage) else "ai")
+            return
+        if self.player.stocks <= 0:
+            self.end_match("ai")
+            return
+        if self.ai.stocks <= 0:
+            self.end_match("player")
+            return
+        self.player.update(self.stage)
+        self.ai.update(self.stage)
+        self.check_hits()
+        self.check_projectile_hits()
+        if self.combos is not None:
+            self.combos.update(self.fighters, self.game_timer)
+
+    def end_match(self, winner):
+        self.game_over = True
+        self.winner = winner
+        if self.combos is not None:
+            self.combos.finish(self.fighters)
+
+    def check_hits(self):
+        for char, target in self.matchups:
+            if char.current_move and char.current_move.hitboxes:
+                move = char.current_move
+                for hitbox in move.hitboxes:
+                    if target.rect.colliderect(hitbox) and target not in move.hit_targets:
+                        move.hit_targets.add(target)
+                        self.land_hit(char, target, move.name, move.damage, move.knockback, move.cos_angle, move.sin_angle, char.facing_right)
+
+    def check_projectile_hits(self):
+        fighters = self.fighters
+        for owner, target, spec, moving_right in self.projectiles.update(fighters):
+            name, damage, knockback, cos_angle, sin_angle, _ = self.projectiles.specs[spec]
+            self.land_hit(fighters[owner], fighters[target], name, damage, knockback, cos_angle, sin_angle, moving_right)
+
+    def land_hit(self, char, target, name, damage, base_knockback, cos_angle, sin_angle, facing_right):
+        """Apply a hit from char to target: shield damage if shielding, otherwise knockback"""
+        if target.respawn_invincibility > 0:
+            return
+        if target.shielding and not target.shield_broken:
+            target.shield_health -= damage * 0.7
+            target.shield_stun = int(base_knockback * 0.5)
+            if self.events is not None:
+                self.events.emit(eventlog.EVENT_SHIELD_HIT, target, char, name, target.shield_health)
+            if target.shield_health <= 0:
+                target.shield_broken = True
+                target.shield_break_timer = 300
+                target.shielding = False
+                if self.events is not None:
+                    self.events.emit(eventlog.EVENT_SHIELD_BREAK, target, char, name)
+        else:
+            knockback = calculate_knockback(base_knockback, target.damage, target.weight)
+            kb_x = knockback * cos_angle * (-1 if not facing_right else 1)
+            kb_y = knockback * sin_angle
+            if target.di_direction[0] or target.di_direction[1]:
+                kb_x, kb_y = apply_di(kb_x, kb_y, target.di_direction[0], target.di_direction[1])
+            target.velocity[0] = kb_x
+            target.velocity[1] = kb_y
+            target.damage += damage
+            target.hitstun = calculate_hitstun(knockback)
+            target.current_move = None
+            target.attacking = False
+            target.last_attacker = char
+            target.last_move = name
+            if self.events is not None:
+                self.events.emit(eventlog.EVENT_HIT, target, char, name, knockback)
+            if self.combos is not None:
+                self.combos.hit(char, target, name, damage)
+
+    def draw(self, screen):
+        self.stage.draw(screen)
+        self.player.draw(screen, self.draw_hitboxes)
+        self.ai.draw(screen, self.draw_hitboxes)
+        self.projectiles.draw(screen)
+        if self.hud_interval > 1:
+            self.draw_cached_ui(screen)
+        else:
+            self.draw_ui(screen)
+        if self.game_over:
+            self.draw_game_over(screen)
+
+    def draw_ui(self, screen):
+        font = get_font(30)
+        player_text = font.render(f"P1: {int(self.player.damage)}%", True, (255, 255, 255))
+        screen.blit(player_text, (20, 20))
+        for i in range(self.player.stocks):
+            pygame.draw.circle(screen, self.player.color, (30 + i * 20, 50), 8)
+        ai_text = font.render(f"CPU: {int(self.ai.damage)}%", True, (255, 255, 255))
+        screen.blit(ai_text, (SCREEN_WIDTH - ai_text.get_width() - 20, 20))
+        for i in range(self.ai.stocks):
+            pygame.draw.circle(screen, self.ai.color, (SCREEN_WIDTH - 30 - i * 20, 50), 8)
+        minutes = (self.game_time_limit - self.game_timer) // (60 * 60)
+        seconds = ((self.game_time_limit - self.game_timer) % (60 * 60)) // 60
+        timer_text = font.render(f"{minutes}:{seconds:02d}", True, (255, 255, 255))
+        screen.blit(timer_text, (SCREEN_WIDTH // 2 - timer_text.get_width() // 2, 20))
+        if self.combos is not None:
+            self.draw_combos(screen)
+        if self.ko_table is not None:
+            self.draw_ko_percents(screen)
+
+    def draw_cached_ui(self, screen):
+        """Redraw the HUD every hud_interval frames and blit the kept copy in between"""
+        if self.hud is None:
+            self.hud = pygame.Surface((SCREEN_WIDTH, HUD_HEIGHT), pygame.SRCALPHA)
+            self.hud_frame = self.game_timer - self.hud_interval
+        if not 0 <= self.game_timer - self.hud_frame < self.hud_interval:
+            self.hud.fill((0, 0, 0, 0))
+            self.draw_ui(self.hud)
+            self.hud_frame = self.game_timer
+        screen.blit(self.hud, (0, 0))
+
+    def draw_combos(self, screen):
+        """Live combo counter under the percent of whoever is being comboed"""
+        font = get_font(24)
+        for victim, attacker, x in ((self.player, self.ai, 20), (self.ai, self.player, None)):
+            hits = self.combos.live_combo(victim.slot)
+            if hits >= 2:
+                text = font.render(f"{hits} HIT COMBO", True, attacker.color)
+                screen.blit(text, (x if x is not None else SCREEN_WIDTH - text.get_width() - 20, 64))
+
+    def draw_ko_percents(self, screen):
+        """The lowest percent any of the opponent's moves KOs each fighter at, launched from the spot nearest it"""
+        font = get_font(20)
+        for victim, victim_name, attacker_name, x in ((self.player, self.player_character, self.ai_character, 110),
+                                                     (self.ai, self.ai_character, self.player_character, None)):
+            percent = self.ko_table.lowest_ko_percent(self.current_stage_name, attacker_name, victim_name, victim.rect.left,
+                                                      victim.facing_right)
+            if percent == math.inf:
+                continue
+            color = (255, 80, 80) if victim.damage >= percent else (200, 200, 200)
+            text = font.render(f"KO {int(percent)}%", True, color)
+            screen.blit(text, (x if x is not None else SCREEN_WIDTH - text.get_width() - 110, 44))
+
+    def draw_game_over(self, screen):
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 128))
+        screen.blit(overlay, (0, 0))
+        font_large = get_font(60)
+        font_small = get_font(30)
+        game_over_text = font_large.render("GAME!", True, (255, 255, 255))
+        screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, SCREEN_HEIGHT // 3))
+        winner_text = font_small.render("Player 1 Wins!" if self.winner == "player" else "CPU Wins!", True, (255, 255, 255))
+        screen.blit(winner_text, (SCREEN_WIDTH // 2 - winner_text.get_width() // 2, SCREEN_HEIGHT // 2))
+        restart_text = font_small.render("Press ENTER to play again", True, (255, 255, 255))
+        screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT * 2 // 3))
+        if self.combos is not None:
+            font_stats = get_font(22)
+            for row, (label, stats) in enumerate(zip(("P1", "CPU"), self.combos.stats)):
+                line = (f"{label}: {stats.damage_per_opening():.1f}% per opening over {stats.punishes}, "
+                        f"{stats.kills} kill conversions, longest combo {stats.longest}")
+                text = font_stats.render(line, True, (255, 255, 255))
+                screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT * 2 // 3 + 40 + row * 22))
+
+def apply_ai_actions(fighter, ai_actions):
+    """Drive a fighter from the action dict returned by MeleeAI.predict"""
+    ai_dx = 0
+    if ai_actions['move_left']:
+        ai_dx -= AI_SPEED
+        fighter.set_di(-1, 0)
+    if ai_actions['move_right']:
+        ai_dx += AI_SPEED
+        fighter.set_di(1, 0)
+    fighter.move(ai_dx, 0)
+    if ai_actions['jump']:
+        fighter.jump()
+    if ai_actions['attack']:
+        fighter.perform_move("fsmash" if fighter.on_ground and random.random() < 0.3 else "jab" if fighter.on_ground else "nair" if random.random() < 0.5 else "fair")
+    fighter.shield(ai_actions['shield'])
+    if ai_actions['dash']:
+        fighter.dash()
+    if ai_actions['special']:
+        if "laser" in fighter.moves and random.random() < 0.5:
+            fighter.perform_move("laser")
+        else:
+            fighter.perform_move("upb" if random.random() < 0.5 else "shine" if fighter.character in ("fox", "falco") else "counter")
+    if ai_actions.get('upb'):
+        fighter.perform_move("upb")
+
+def apply_quality(settings):
+    """Install a quality level's knobs; none of them touch the simulation"""
+    game_state.draw_hitboxes = settings['draw_hitboxes']
+    game_state.hud_interval = settings['hud_interval']
+    if pipeline is not None:
+        pipeline.render_scale = settings['render_scale']  # the render thread owns the presenter's surfaces
+    else:
+        presenter.set_render_scale(settings['render_scale'])
+
+def get_font(size):
+    """Return a cached default font so the HUD does not reload it every frame"""
+    font = FONTS.get(size)
+    if font is None:
+        font = FONTS[size] = pygame.font.Font(None, size)
+    return font
+
+# Global variables
+screen = None
+presenter = None
+pacer = None
+game_state = None
+ai_model = None
+recorder = None
+replay_writer = None
+exporter = None
+governor = None
+pipeline = None
+save_slot = 0
+human_actions = dict.fromkeys(imitation.ACTIONS, False)
+
+def close_replay():
+    global replay_writer
+    if replay_writer is not None:
+        replay_writer.close()
+        replay_writer = None
+
+def start_replay():
+    """Finish the current match's replay and, with REPLAY_DIR set, start recording the next one"""
+    global replay_writer
+    close_replay()
+    if REPLAY_DIR:
+        from ultra4k import replay
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{game_state.current_stage_name}.u4r"
+        replay_writer = replay.ReplayWriter(os.path.join(REPLAY_DIR, name), game_state)
+
+def handle_save_state_key(key):
+    """Save, load or pick a save-state slot; returns True if the key was one of those"""
+    global save_slot
+    from ultra4k import savestate
+    if key in (pygame.K_F6, pygame.K_F7):
+        save_slot = (save_slot + (1 if key == pygame.K_F7 else -1)) % savestate.SLOTS
+    elif key == pygame.K_F5:
+        savestate.save(game_state, save_slot)
+    elif key == pygame.K_F9:
+        if save_slot not in savestate.used_slots():
+            return True
+        # Finish the replay before loading: a slot from another setup resets the game and replaces the fighters it wraps
+        close_replay()
+        savestate.load(game_state, save_slot)
+        # The loaded state starts a new replay and new combo stats; neither can follow the jump
+        if game_state.combos is not None:
+            game_state.combos.reset(game_state.fighters, game_state.events)
+        start_replay()
+    else:
+        return False
+    used = "saved" if save_slot in savestate.used_slots() else "empty"
+    pygame.display.set_caption(f"Simplified Melee Engine - save slot {save_slot} ({used})")
+    return True
+
+def setup():
+    global screen, presenter, pacer, game_state, ai_model, recorder, governor, pipeline
+    with startup.phase("pygame init"):
+        startup.init_pygame()
+    with startup.phase("window creation"):
+        presenter = Presenter((SCREEN_WIDTH, SCREEN_HEIGHT), DISPLAY_SIZE)
+        screen = presenter.surface
+        pygame.display.set_caption("Simplified Melee Engine")
+    if RENDER_THREAD:
+        from ultra4k import pipeline as pipelining
+        pipeline = pipelining.RenderPipeline(presenter).start()
+    # Spinning to the deadline would hold the GIL the render thread needs, so with one the pacer only sleeps
+    pacer = pacing.FramePacer(FPS, power_save=RENDER_THREAD or pacing.POWER_SAVE)
+    game_state = GameState()
+    if FIXED_POINT:
+        from ultra4k import fixedpoint
+        game_state.character_class = fixedpoint.FixedCharacter
+    if EVENT_LOG_DIR:
+        game_state.events = eventlog.EventLog(EVENT_LOG_DIR, characters=tuple(CHARACTER_STATS), stages=tuple(STAGE_DATA), moves=MOVE_NAMES)
+    if COMBO_STATS:
+        game_state.combos = combos.ComboTracker()
+    if KO_PERCENTS:
+        from ultra4k import kotable
+        game_state.ko_table = kotable.KOTable.load(build=False)
+        if game_state.ko_table is None:
+            kotable.build_in_background(lambda table: setattr(game_state, "ko_table", table))
+    if QUALITY_GOVERNOR:
+        governor = quality.QualityGovernor(1.0 / FPS)
+    with startup.phase("DataLoader loads"):
+        game_state.reset()
+    start_replay()
+    if RECORD_DIR:
+        recorder = imitation.Recorder(RECORD_DIR)
+    with startup.phase("AI setup"):
+        from ultra4k import cpuworker
+        if CPU_PROCESS and cpuworker.AVAILABLE:
+            ai_model = cpuworker.RemoteCPU(CPU_MODE, AI_NAVIGATION).start()
+        elif CPU_MODE == "imitation":
+            ai_model = imitation.ImitationAI(imitation.INDEX_DIR)
+        else:
+            ai_model = navigating_ai_model(AI_NAVIGATION)
+
+async def update_loop():
+    global screen, presenter, pacer, game_state, ai_model, recorder
+    start = now = time.perf_counter()
+    for action in human_actions:
+        human_actions[action] = False
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                game_state.paused = not game_state.paused
+            if SAVE_STATE_KEYS and handle_save_state_key(event.key):
+                continue
+            if event.key == pygame.K_RETURN and game_state.game_over:
+                game_state.reset()
+                start_replay()
+            if not game_state.paused and not game_state.game_over:
+                if event.key in (pygame.K_UP, pygame.K_w):
+                    game_state.player.jump()
+                    human_actions['jump'] = True
+                if event.key in (pygame.K_DOWN, pygame.K_s) and not game_state.player.on_ground:
+                    game_state.player.fastfall()
+                if event.key == pygame.K_j:
+                    game_state.player.perform_move("jab" if game_state.player.on_ground else "nair")
+                    human_actions['attack'] = True
+                if event.key == pygame.K_k:
+                    game_state.player.perform_move("fsmash" if game_state.player.on_ground else "fair")
+                    human_actions['attack'] = True
+                if event.key == pygame.K_u:
+                    game_state.player.perform_move("upb")
+                    human_actions['special'] = True
+                if event.key == pygame.K_i:
+                    game_state.player.perform_move("shine" if game_state.player.character in ["fox", "falco"] else "counter")
+                    human_actions['special'] = True
+                if event.key == pygame.K_o:
+                    game_state.player.perform_move("laser")
+                    human_actions['special'] = True
+                if event.key == pygame.K_LSHIFT:
+                    game_state.player.dash()
+                    human_actions['dash'] = True
+                if event.key == pygame.K_SPACE:
+                    game_state.player.shield(True) if game_state.player.on_ground else game_state.player.tech()
+                if event.key == pygame.K_l:
+                    game_state.player.l_cancel()
+        if event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+            game_state.player.shield(False)
+    if game_state.paused:
+        if pipeline is not None:
+            pipeline.finish()
+        font = get_font(60)
+        pause_text = font.render("PAUSED", True, (255, 255, 255))
+        screen.blit(pause_text, (SCREEN_WIDTH // 2 - pause_text.get_width() // 2, SCREEN_HEIGHT // 2))
+        presenter.present()
+        if exporter is not None:
+            exporter.end_frame(pacer.get_fps())
+        await pacer.wait()
+        return True
+    if not game_state.game_over:
+        keys = pygame.key.get_pressed()
+        player_dx = 0
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            player_dx -= PLAYER_SPEED
+            game_state.player.set_di(-1, 0)
+            human_actions['move_left'] = True
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            player_dx += PLAYER_SPEED
+            game_state.player.set_di(1, 0)
+            human_actions['move_right'] = True
+        if keys[pygame.K_UP] or keys[pygame.K_w]:
+            game_state.player.set_di(0, -1)
+        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+            game_state.player.set_di(0, 1)
+        game_state.player.move(player_dx, 0)
+        if recorder is not None:
+            human_actions['shield'] = game_state.player.shielding
+            recorder.record(game_state.player, game_state.ai, human_actions)
+        if ai_model and game_state.ai.is_cpu:
+            apply_ai_actions(game_state.ai, ai_model.predict(game_state.ai_view))
+        if exporter is not None:
+            now = exporter.phase("input", now)
+        game_state.update()
+        if replay_writer is not None:
+            replay_writer.end_frame()
+            if game_state.game_over:
+                close_replay()
+        if exporter is not None:
+            now = exporter.phase("simulation", now)
+            exporter.matches += game_state.game_over
+    if pipeline is not None:
+        # Copy this frame for the render thread and flip the one it finished; drawing happens over there
+        pipeline.submit(game_state)
+        if exporter is not None:
+            exporter.phase("present", now)
+            exporter.end_frame(pacer.get_fps())
+        work = max(time.perf_counter() - start, pipeline.render_seconds)
+    else:
+        game_state.draw(screen)
+        if exporter is not None:
+            now = exporter.phase("render", now)
+        presenter.present()
+        if exporter is not None:
+            exporter.phase("present", now)
+            exporter.end_frame(pacer.get_fps())
+        work = time.perf_counter() - start
+    if governor is not None and governor.frame(work):
+        apply_quality(governor.settings)
+    await pacer.wait()
+    return True
+
+async def start_metrics():
+    """Serve Prometheus metrics on localhost:METRICS_PORT from this event loop; returns the server"""
+    global exporter
+    from ultra4k import metrics
+    exporter = metrics.Metrics()
+    exporter.count_objects("moves", lambda: sum(f.current_move is not None for f in game_state.fighters))
+    exporter.count_objects("projectiles", lambda: game_state.projectiles.count)
+    if hasattr(ai_model, "misses"):
+        exporter.count_total("cpu_frames", "Frames the CPU worker was asked to decide.", lambda: ai_model.frames)
+        exporter.count_total("cpu_deadline_misses", "Frames the CPU worker's answer came too late and the last action was held.",
+                             lambda: ai_model.misses)
+    return await metrics.serve(exporter, METRICS_PORT)
+
+async def main():
+    global exporter
+    setup()
+    server = await start_metrics() if METRICS_PORT else None
+    running = True
+    while running:
+        running = await update_loop()
+    if server is not None:
+        server.close()
+        exporter.unwatch_gc()
+        exporter = None
+    if hasattr(ai_model, "close"):
+        ai_model.close()
+    if pipeline is not None:
+        pipeline.close()
+    if game_state.events is not None:
+        game_state.events.close()
+    if recorder is not None:
+        recorder.close()
+    close_replay()
+    pygame.quit()
@@ -0,0 +1,182 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Event kinds
+EVENT_HIT = 0
+EVENT_SHIELD_HIT = 1
+EVENT_SHIELD_BREAK = 2
+EVENT_TECH = 3
+EVENT_LEDGE_GRAB = 4
+EVENT_KO = 5
+EVENT_PUNISH = 6  # value is the damage dealt over the whole punish
+EVENT_NAMES = ("hit", "shield_hit", "shield_break", "tech", "ledge_grab", "ko", "punish")
+
+NO_CODE = 255
+BATCH_SIZE = 4096
+HEADER_SIZE = 128
+
+# One fixed-size record per event, stored column by column on disk
+EVENT_DTYPE = np.dtype([
+    ('frame', '<u4'),
+    ('match', '<u4'),
+    ('kind', 'u1'),
+    ('slot', 'u1'),
+    ('char', 'u1'),
+    ('attacker', 'u1'),
+    ('move', 'u1'),
+    ('stage', 'u1'),
+    ('damage', '<f4'),
+    ('value', '<f4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+])
+
+def _npy_header(dtype, length):
+    """Build a fixed-size .npy header so the row count can be rewritten in place"""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (dtype.str, length)
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+class EventLog:
+    """Append-only match event buffer drained to .npy columns by a background thread"""
+
+    def __init__(self, directory, characters=(), stages=(), moves=(), batch_size=BATCH_SIZE):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.frame = 0
+        self.match = 0
+        self.stage = NO_CODE
+        self.char_codes = {name: i for i, name in enumerate(characters)}
+        self.stage_codes = {name: i for i, name in enumerate(stages)}
+        self.move_codes = {name: i for i, name in enumerate(moves)}
+        self._started = False
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "names.json"), "w") as f:
+            json.dump({'kinds': list(EVENT_NAMES), 'characters': list(characters), 'stages': list(stages), 'moves': list(moves)}, f)
+        self._files = {}
+        self._counts = {}
+        for name in EVENT_DTYPE.names:
+            path = os.path.join(directory, name + ".npy")
+            count = 0
+            if os.path.exists(path):
+                column = np.load(path, mmap_mode='r')
+                count = len(column)
+                if name == 'match' and count:
+                    self.match = int(column.max()) + 1
+                f = open(path, "r+b")
+            else:
+                f = open(path, "w+b")
+                f.write(_npy_header(EVENT_DTYPE[name], 0))
+            self._files[name] = f
+            self._counts[name] = count
+        self._buffer = np.empty(batch_size, dtype=EVENT_DTYPE)
+        self._rows = 0
+        self._free = queue.SimpleQueue()
+        self._pending = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_batches, name="eventlog-writer", daemon=True)
+        self._writer.start()
+
+    def begin_match(self, stage_name):
+        """Start numbering events for a new match on the given stage"""
+        if self._started:
+            self.match += 1
+        self._started = True
+        self.frame = 0
+        self.stage = self.stage_codes.get(stage_name, NO_CODE)
+
+    def emit(self, kind, fighter, attacker=None, move=None, value=0.0):
+        """Record an event that happened to fighter on the current frame"""
+        self._buffer[self._rows] = (
+            self.frame, self.match, kind, fighter.slot,
+            self.char_codes.get(fighter.character, NO_CODE),
+            NO_CODE if attacker is None else self.char_codes.get(attacker.character, NO_CODE),
+            NO_CODE if move is None else self.move_codes.get(move, NO_CODE),
+            self.stage, fighter.damage, value, fighter.position[0], fighter.position[1],
+        )
+        self._rows += 1
+        if self._rows == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the current batch to the writer and continue on a spare buffer"""
+        if not self._rows:
+            return
+        self._pending.put((self._buffer, self._rows))
+        try:
+            self._buffer = self._free.get_nowait()
+        except queue.Empty:
+            self._buffer = np.empty(self.batch_size, dtype=EVENT_DTYPE)
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+        self._pending.put(None)
+        self._writer.join()
+        for f in self._files.values():
+            f.close()
+
+    def _write_batches(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch, rows = item
+            for name, f in self._files.items():
+                f.seek(0, os.SEEK_END)
+                f.write(batch[name][:rows].tobytes())
+                self._counts[name] += rows
+                f.seek(0)
+                f.write(_npy_header(EVENT_DTYPE[name], self._counts[name]))
+                f.flush()
+            self._free.put(batch)
+
+def load_events(directory):
+    """Memory-map every event column in directory without reading the data"""
+    columns = {}
+    for name in EVENT_DTYPE.names:
+        path = os.path.join(directory, name + ".npy")
+        if os.path.exists(path):
+            columns[name] = np.load(path, mmap_mode='r')
+    return columns
+
+def load_names(directory):
+    with open(os.path.join(directory, "names.json")) as f:
+        return json.load(f)
+
+def benchmark(events_per_frame=8, frames=10000, frame_time=1.0 / 60):
+    """Measure emit() cost as a share of the frame budget"""
+    import tempfile
+
+    class _Fighter:
+        slot = 0
+        character = "fox"
+        damage = 42.0
+        position = [100.0, 200.0]
+
+    fighter = _Fighter()
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(directory, characters=("fox",), moves=("jab",))
+        start = time.perf_counter()
+        for frame in range(frames):
+            log.frame = frame
+            for _ in range(events_per_frame):
+                log.emit(EVENT_HIT, fighter, fighter, "jab", 3.5)
+        elapsed = time.perf_counter() - start
+        log.close()
+        written = len(load_events(directory)['frame'])
+    per_frame = elapsed / frames
+    return {
+        'events': written,
+        'ns_per_event': elapsed / (frames * events_per_frame) * 1e9,
+        'frame_share': per_frame / frame_time,
+    }
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"{result['events']} events, {result['ns_per_event']:.0f} ns/event, "
+          f"{result['frame_share'] * 100:.3f}% of a 60 FPS frame at 8 events/frame")
@@ -0,0 +1,193 @@
+import argparse
+import collections
+import mmap
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ultra4k import engine
+from ultra4k import replay
+from ultra4k import startup
+
+# Raw frames are 32-bit surfaces copied straight out of their pixel buffers: B, G, R, unused byte
+PIXEL_FORMAT = "bgr0"
+# {width}, {height}, {fps} and {output} are filled in; anything that reads raw video on stdin will do
+ENCODER = ("ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", PIXEL_FORMAT, "-s", "{width}x{height}",
+           "-r", "{fps}", "-i", "-", "-c:v", "libx264", "-pix_fmt", "yuv420p", "{output}")
+IMAGE_FORMATS = ("png", "bmp", "tga", "jpg")
+WINDOW = 2  # chunks in flight per worker; bounds the raw chunk files waiting for their turn in the pipe
+
+def chunks(replay_file, start=None, end=None):
+    """(first, last) states to draw for each keyframe segment overlapping [start, end)
+
+    Video frame k shows the state after simulated frame k + 1, as the live
+    game drew it, so a segment starting at keyframe f covers states f + 1 up
+    to the next keyframe and needs no re-simulation before its first frame.
+    """
+    first_frames = replay_file.first_frames
+    last = first_frames[0] + replay_file.frame_count
+    start = max(first_frames[0], start if start is not None else 0)
+    end = min(last, end if end is not None else last)
+    bounds = first_frames[1:] + [last]
+    return [(max(first, start) + 1, min(stop, end)) for first, stop in zip(first_frames, bounds) if stop > start and first < end]
+
+def _init_worker():
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    import pygame
+    startup.init_pygame()
+    pygame.display.set_mode((1, 1))
+
+def render_chunk(path, first, last, scale, target, image_format=None, number_from=1):
+    """Worker: draw states first..last of a replay headlessly into target
+
+    target is a raw frame file, written straight from each surface's pixel
+    buffer through a memoryview, or with image_format an image directory
+    whose files are numbered from 0 at state number_from.
+    Returns (first, last, checksum mismatches while re-simulating).
+    """
+    import pygame
+    player = replay.ReplayPlayer(replay.Replay(path))
+    game_state = player.game_state
+    player.seek(first - 1)
+    surface = pygame.Surface((engine.SCREEN_WIDTH, engine.SCREEN_HEIGHT), 0, 32)
+    frame = pygame.Surface((engine.SCREEN_WIDTH * scale, engine.SCREEN_HEIGHT * scale), 0, 32) if scale != 1 else surface
+    out = open(target, "wb") if image_format is None else None
+    try:
+        for state in range(first, last + 1):
+            player.seek(state)
+            game_state.draw(surface)
+            if frame is not surface:
+                pygame.transform.scale(surface, frame.get_size(), frame)
+            if out is not None:
+                out.write(frame.get_view("1"))
+            else:
+                pygame.image.save(frame, os.path.join(target, f"frame_{state - number_from:06d}.{image_format}"))
+    finally:
+        if out is not None:
+            out.close()
+    return first, last, player.mismatches
+
+def _stream(path, sink):
+    """Copy a finished chunk file into the sink without reading it into Python objects"""
+    if os.path.getsize(path):
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            sink.write(view)
+    os.remove(path)
+
+def export(path, output=None, images=None, image_format="png", scale=1, start=None, end=None, workers=None,
+           encoder=ENCODER, log=print):
+    """Render a replay to video (or a raw frame stream with encoder=None) or to an image sequence
+
+    Chunks are rendered in parallel, one keyframe segment per task, and
+    handed on strictly in frame order. start and end are in frames.
+    Returns (frames, seconds, checksum mismatches).
+    """
+    replay_file = replay.Replay(path)
+    tasks = chunks(replay_file, start, end)
+    workers = workers or os.cpu_count() or 1
+    width, height = engine.SCREEN_WIDTH * scale, engine.SCREEN_HEIGHT * scale
+    scratch = None
+    process = None
+    sink = None
+    if images is not None:
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"image format must be one of {IMAGE_FORMATS}")
+        os.makedirs(images, exist_ok=True)
+    else:
+        if output is None:
+            raise ValueError("export needs an output file or an images directory")
+        scratch = tempfile.mkdtemp(prefix="u4k-export-")
+        if encoder is None:
+            sink = open(output, "wb")
+        else:
+            command = [part.format(width=width, height=height, fps=engine.FPS, output=output) for part in encoder]
+            process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            sink = process.stdin
+    frames = 0
+    mismatches = 0
+    started = time.perf_counter()
+    # spawn rather than fork, like the CPU worker: SDL state must not be inherited
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            pending = collections.deque()
+            queued = iter(tasks)
+
+            def submit():
+                task = next(queued, None)
+                if task is None:
+                    return
+                first, last = task
+                target = images if images is not None else os.path.join(scratch, f"chunk_{first:08d}.raw")
+                pending.append((target, pool.submit(render_chunk, path, first, last, scale, target,
+                                                   image_format if images is not None else None, tasks[0][0])))
+
+            for _ in range(workers * WINDOW):
+                submit()
+            while pending:
+                target, future = pending.popleft()
+                first, last, missed = future.result()
+                if sink is not None:
+                    _stream(target, sink)
+                frames += last - first + 1
+                mismatches += missed
+                submit()
+                if log is not None:
+                    elapsed = time.perf_counter() - started
+                    log(f"{frames} frames, {frames / elapsed / engine.FPS:.1f}x real time")
+    finally:
+        if sink is not None:
+            sink.close()
+        if process is not None and process.wait() != 0:
+            raise RuntimeError(f"encoder {encoder[0]!r} exited with code {process.returncode}")
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return frames, time.perf_counter() - started, mismatches
+
+def benchmark(frames=1200, interval=150, directory="benchmark_export"):
+    """Export a recorded match to a raw stream with one worker and with one per CPU; returns times real time"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "match.u4r")
+    replay.record_match(path, stocks=99, frames=frames, interval=interval)
+    results = {}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        exported, seconds, mismatches = export(path, os.devnull, workers=workers, encoder=None, log=None)
+        results[workers] = {'frames': exported, 'realtime': exported / seconds / engine.FPS, 'mismatches': mismatches}
+    shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ultra4k.export", description="Render a replay headlessly to video")
+    parser.add_argument("replay", nargs="?", help="replay file; --benchmark needs none")
+    parser.add_argument("output", nargs="?", help="video file for the encoder, or the raw stream with --raw")
+    parser.add_argument("--images", default=None, help="write an image sequence into this directory instead")
+    parser.add_argument("--format", default="png", choices=IMAGE_FORMATS, help="image sequence format")
+    parser.add_argument("--raw", action="store_true", help=f"write raw {PIXEL_FORMAT} frames instead of piping to ffmpeg")
+    parser.add_argument("--scale", type=int, default=1, help="integer upscale of the 600x400 frame")
+    parser.add_argument("--start", type=float, default=None, help="seconds into the match")
+    parser.add_argument("--end", type=float, default=None, help="seconds into the match")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--benchmark", action="store_true", help="time a raw export with one worker and with one per CPU")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        for workers, result in benchmark().items():
+            print(f"{workers} workers: {result['frames']} frames at {result['realtime']:.1f}x real time, "
+                  f"{result['mismatches']} checksum mismatches")
+        return
+    if args.replay is None or args.output is None and args.images is None:
+        parser.error("give a replay and an output file, or --images DIR")
+    start = int(args.start * engine.FPS) if args.start is not None else None
+    end = int(args.end * engine.FPS) if args.end is not None else None
+    frames, seconds, mismatches = export(args.replay, args.output, args.images, args.format, args.scale, start, end,
+                                         args.workers, None if args.raw else ENCODER)
+    print(f"{frames} frames in {seconds:.1f} s ({frames / seconds / engine.FPS:.1f}x real time)"
+          + (f", {mismatches} checksum mismatches" if mismatches else ""), file=sys.stderr if mismatches else sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import struct
+import sys
+import zlib
+
+from ultra4k import engine
+from ultra4k.collision import FLOOR, CEILING
+
+SCALE = 256                # fixed-point units per pixel; a power of two so every published float is exact
+KEEP_SCALE = 1 << 16       # friction factors are applied as v * keep / KEEP_SCALE
+CHECK_SEEDS = (0, 1, 2)
+CHECK_FRAMES = 7200
+GOLDEN_EVERY = 600
+
+# digest_sequence() of each CHECK_SEEDS match, recorded when the physics last changed on purpose. A machine
+# or interpreter that disagrees does not simulate bit-identically; re-record with `python -m ultra4k.fixedpoint`
+GOLDEN = {
+    0: (0x0a5cc7fa, 0x33daf467, 0x2d45610b, 0xd0fbf011, 0xf129feb4, 0xce25b574, 0xeeb47a24, 0x60681ec1, 0x3e1f8228,
+        0x3add43b7, 0x5080f25a, 0x50a633bb),
+    1: (0xcac69dd7, 0x4f3565bc, 0x5a75bcf8, 0xf2bf4374, 0xfaac5cf5, 0xde52919d, 0x1d94b7a4, 0x34c954b7, 0x94b729b6,
+        0x74356823, 0xcc96bc4d, 0x86d86f12),
+    2: (0x9afe890b, 0x661b28f5, 0xc7ba0b38, 0x39bd458e, 0x14c0fe15, 0x49e59cb2, 0x1669a14f, 0x628f8a12, 0xd9dbd671,
+        0x1c059377, 0x579203b2, 0x993e396a),
+}
+
+def to_fixed(value):
+    return round(value * SCALE)
+
+def to_pixels(value):
+    """Truncate toward zero like int() does to the float position"""
+    return value // SCALE if value >= 0 else -(-value // SCALE)
+
+def _keep(friction):
+    return round((1 - friction) * KEEP_SCALE)
+
+def _damp(value, keep):
+    # Symmetric, so friction slows leftward and rightward motion identically
+    return value * keep // KEEP_SCALE if value >= 0 else -(-value * keep // KEEP_SCALE)
+
+AIR_KEEP = _keep(engine.AIR_FRICTION)
+GROUND_KEEP = _keep(engine.GROUND_FRICTION)
+SHIELD_MAX = to_fixed(engine.SHIELD_HEALTH_MAX)
+SHIELD_DECAY = to_fixed(engine.SHIELD_DECAY_RATE)
+SHIELD_REGEN = to_fixed(engine.SHIELD_REGEN_RATE)
+
+def sweep_platforms(left, top, width, height, dx, dy, platforms):
+    """collision.sweep_platforms in fixed-point units, with impact times kept as exact fractions"""
+    bottom = top + height
+    hit = None
+    hit_face = 0
+    hit_num, hit_den = 1, 1
+    for platform in platforms:
+        rect = platform['rect']
+        p_top = rect.top * SCALE
+        p_bottom = rect.bottom * SCALE
+        if dy >= 0 and bottom <= p_top <= bottom + dy:
+            num, den = (p_top - bottom, dy) if dy else (0, 1)
+            face = FLOOR
+        elif dy < 0 and top + dy <= p_bottom <= top:
+            num, den = top - p_bottom, -dy
+            face = CEILING
+        else:
+            continue
+        if hit is not None and num * hit_den >= hit_num * den:
+            continue
+        # left + dx * t, scaled by den so it stays an integer
+        x = left * den + dx * num
+        if x < rect.right * SCALE * den and x + width * den > rect.left * SCALE * den:
+            hit = platform
+            hit_face = face
+            hit_num, hit_den = num, den
+    return hit, hit_face
+
+class FixedCharacter(engine.Character):
+    """Character whose kinematics, damage and shield live in integers of 1/SCALE px
+
+    The fixed values are canonical. After every step they are published to
+    position, velocity, damage and shield_health as exact floats, so the
+    renderer, AI and event log read them unchanged. Values written from
+    outside (knockback in land_hit, perform_move's up-b launch) are
+    quantized onto the grid the next time the fighter moves.
+    """
+
+    UNIT = SCALE
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.fixed_width = self.width * SCALE
+        self.fixed_height = self.height * SCALE
+        self.fixed_gravity = to_fixed(engine.GRAVITY * self.fall_speed)
+        self.fixed_max_fall = to_fixed(self.fall_speed * 10)
+        self.fixed_air_speed = to_fixed(self.air_speed)
+        self.fixed_air_cap = to_fixed(self.dash_speed * 0.8)
+        self.fixed_dash_speed = to_fixed(self.dash_speed)
+        self.fixed_jump = to_fixed(self.jump_height)
+        self.fixed_double_jump = to_fixed(self.jump_height * 0.8)
+        self.published = None
+        self.pull()
+
+    def pull(self):
+        """Quantize the float attributes if anything outside this class wrote to them"""
+        position, velocity = self.position, self.velocity
+        if self.published != (position[0], position[1], velocity[0], velocity[1], self.damage, self.shield_health):
+            self.fixed_position = [to_fixed(position[0]), to_fixed(position[1])]
+            self.fixed_velocity = [to_fixed(velocity[0]), to_fixed(velocity[1])]
+            self.fixed_damage = to_fixed(self.damage)
+            self.fixed_shield = to_fixed(self.shield_health)
+            self.publish()
+
+    def publish(self):
+        position, velocity = self.position, self.velocity
+        position[0] = self.fixed_position[0] / SCALE
+        position[1] = self.fixed_position[1] / SCALE
+        velocity[0] = self.fixed_velocity[0] / SCALE
+        velocity[1] = self.fixed_velocity[1] / SCALE
+        self.damage = self.fixed_damage / SCALE
+        self.shield_health = self.fixed_shield / SCALE
+        self.published = (position[0], position[1], velocity[0], velocity[1], self.damage, self.shield_health)
+
+    def move(self, dx, dy):
+        if self.hitstun > 0 or self.shield_stun > 0 or self.shield_broken:
+            return
+        self.pull()
+        dx = to_fixed(dx)
+        if self.dash_timer > 0:
+            dx = self.fixed_dash_speed if self.facing_right else -self.fixed_dash_speed
+            self.dash_timer -= 1
+        if self.on_ground:
+            if not self.attacking and not self.shielding:
+                if dx > 0:
+                    self.facing_right = True
+                elif dx < 0:
+                    self.facing_right = False
+                self.fixed_position[0] += dx
+        elif not self.attacking:
+            if dx > 0:
+                self.fixed_velocity[0] = min(self.fixed_velocity[0] + self.fixed_air_speed, self.fixed_air_cap)
+                self.facing_right = True
+            elif dx < 0:
+                self.fixed_velocity[0] = max(self.fixed_velocity[0] - self.fixed_air_speed, -self.fixed_air_cap)
+                self.facing_right = False
+        self.publish()
+
+    def jump(self):
+        if self.hitstun > 0 or self.shield_stun > 0 or self.shield_broken:
+            return
+        self.pull()
+        if self.on_ground and not self.attacking and not self.shielding:
+            self.fixed_velocity[1] = self.fixed_jump
+            self.on_ground = False
+            self.jumps_left = 1
+        elif not self.on_ground and self.jumps_left > 0 and not self.attacking:
+            self.fixed_velocity[1] = self.fixed_double_jump
+            self.jumps_left -= 1
+        self.publish()
+
+    def fastfall(self):
+        self.pull()
+        if not self.on_ground and self.fixed_velocity[1] > 0 and not self.fastfalling:
+            self.fixed_velocity[1] *= engine.FASTFALL_MULTIPLIER
+            self.fastfalling = True
+        self.publish()
+
+    def respawn(self, spawn_point):
+        self.fixed_position[0], self.fixed_position[1] = spawn_point[0] * SCALE, spawn_point[1] * SCALE
+        self.fixed_velocity[0] = self.fixed_velocity[1] = 0
+        self.fixed_damage = 0
+        self.fixed_shield = SHIELD_MAX
+
+    def restore_shield(self):
+        self.fixed_shield = SHIELD_MAX * 3 // 10
+
+    def update(self, stage):
+        self.pull()
+        if not self.tick_timers(stage):
+            self.step(stage)
+        self.publish()
+
+    def step(self, stage):
+        """Character.update's arithmetic in fixed point"""
+        position, velocity = self.fixed_position, self.fixed_velocity
+        if self.shielding:
+            self.fixed_shield -= SHIELD_DECAY
+            if self.fixed_shield <= 0:
+                self.break_shield()
+        else:
+            self.fixed_shield = min(self.fixed_shield + SHIELD_REGEN, SHIELD_MAX)
+        if not self.on_ground:
+            max_fall_speed = self.fixed_max_fall * (engine.FASTFALL_MULTIPLIER if self.fastfalling else 1)
+            velocity[1] = min(velocity[1] + self.fixed_gravity, max_fall_speed)
+        else:
+            self.fastfalling = False
+        velocity[0] = _damp(velocity[0], GROUND_KEEP if self.on_ground else AIR_KEEP)
+        if self.shielding and self.on_ground:
+            dx = dy = 0
+        else:
+            dx, dy = velocity
+        platform, face = sweep_platforms(position[0], position[1], self.fixed_width, self.fixed_height, dx, dy, stage.platforms)
+        position[0] += dx
+        position[1] += dy
+        self.rect.topleft = (to_pixels(position[0]), to_pixels(position[1]))
+        self.settle(stage, platform, face, position, velocity)
+
+# Packed fighter state: position, velocity, damage, shield (fixed-point ints), then every
+# timer, the current move and its frame, DI, stocks, jumps and the boolean flags as one bitmask
+FIGHTER_FORMAT = "6i13h3bB"
+STATE = struct.Struct("<I" + FIGHTER_FORMAT * 2)
+MOVE_INDEX = {name: i for i, name in enumerate(engine.MOVE_NAMES)}
+
+def _fighter_fields(fighter):
+    move = fighter.current_move
+    flags = (fighter.on_ground | fighter.attacking << 1 | fighter.facing_right << 2 | fighter.shielding << 3 |
+             fighter.fastfalling << 4 | fighter.ledge_grab << 5 | fighter.l_canceling << 6 | fighter.shield_broken << 7)
+    return (to_fixed(fighter.position[0]), to_fixed(fighter.position[1]),
+            to_fixed(fighter.velocity[0]), to_fixed(fighter.velocity[1]),
+            to_fixed(fighter.damage), to_fixed(fighter.shield_health),
+            fighter.hitstun, fighter.shield_stun, fighter.dash_timer, fighter.tech_window, fighter.tech_cooldown,
+            fighter.ledge_cooldown, fighter.respawn_timer, fighter.respawn_invincibility, fighter.shield_break_timer,
+            fighter.attack_cooldown_timer, move.current_frame if move else -1,
+            to_fixed(fighter.di_direction[0]), to_fixed(fighter.di_direction[1]),
+            fighter.stocks, fighter.jumps_left, MOVE_INDEX[move.name] if move else -1, flags)
+
+def pack_state(game_state):
+    """The simulation-relevant state of a match as STATE.size bytes; float fighters are quantized"""
+    return STATE.pack(game_state.game_timer, *_fighter_fields(game_state.player), *_fighter_fields(game_state.ai))
+
+def checksum(game_state):
+    return zlib.crc32(pack_state(game_state))
+
+def _self_play(seed, character_class=None):
+    from ultra4k import profiling
+    stages = tuple(engine.STAGE_DATA)
+    return profiling.SelfPlay(seed, stage=stages[seed % len(stages)], character_class=character_class or FixedCharacter)
+
+def on_grid(fighter):
+    """True when every published float of a fighter is an exact fixed-point value once it has quantized external writes"""
+    fighter.pull()
+    values = (fighter.position[0], fighter.position[1], fighter.velocity[0], fighter.velocity[1], fighter.damage, fighter.shield_health)
+    return all(to_fixed(value) == value * SCALE for value in values)
+
+def digest_sequence(seed, frames=CHECK_FRAMES, every=GOLDEN_EVERY, character_class=None):
+    """Run a headless CPU-vs-CPU match, folding every frame's checksum into one CRC; returns the CRC every `every` frames"""
+    play = _self_play(seed, character_class)
+    digest = 0
+    sequence = []
+    for frame in range(1, frames + 1):
+        play.step()
+        digest = zlib.crc32(pack_state(play.game_state), digest)
+        if frame % every == 0:
+            sequence.append(digest)
+    return sequence
+
+def match_digest(seed, frames=CHECK_FRAMES, character_class=None):
+    return digest_sequence(seed, frames, frames, character_class)[-1]
+
+def digests(seeds=CHECK_SEEDS, frames=CHECK_FRAMES):
+    return [match_digest(seed, frames) for seed in seeds]
+
+def check_determinism(seeds=CHECK_SEEDS, frames=CHECK_FRAMES):
+    """Replay the CHECK_SEEDS matches and compare them with GOLDEN, the sequences recorded when the physics last changed
+
+    Returns ({seed: digest sequence}, list of problems); an empty list means
+    this machine simulates bit-identically to the one that recorded GOLDEN.
+    """
+    problems = []
+    sequences = {}
+    for seed in seeds:
+        sequence = sequences[seed] = digest_sequence(seed, frames)
+        golden = GOLDEN.get(seed, ())
+        for i, (digest, expected) in enumerate(zip(sequence, golden)):
+            if digest != expected:
+                problems.append(f"seed {seed}: diverged from the golden digests by frame {(i + 1) * GOLDEN_EVERY}")
+                break
+    for seed in seeds:
+        play = _self_play(seed)
+        for frame in range(frames):
+            play.step()
+            if not all(on_grid(fighter) for fighter in play.game_state.fighters):
+                problems.append(f"seed {seed}: a fighter left the fixed-point grid on frame {frame}")
+                break
+    return sequences, problems
+
+if __name__ == "__main__":
+    import timeit
+    result, problems = check_determinism()
+    for seed, sequence in result.items():
+        print(f"seed {seed} digests every {GOLDEN_EVERY} frames: ({', '.join(f'0x{d:08x}' for d in sequence)})")
+    play = _self_play(0)
+    for _ in range(600):
+        play.step()
+    per_call = timeit.timeit(lambda: checksum(play.game_state), number=10000) / 10000
+    print(f"checksum of the {STATE.size} byte packed state: {per_call * 1e6:.1f} us")
+    for problem in problems:
+        print(f"  {problem}")
+    if problems:
+        sys.exit("fixed-point simulation is not deterministic")
@@ -0,0 +1,330 @@
+import glob
+import heapq
+import os
+import threading
+import time
+
+import numpy as np
+
+INDEX_DIR = "imitation_index"
+LEAF_SIZE = 2048          # a leaf is one matrix-vector product, so big leaves cost little more than small ones
+NEIGHBORS = 15
+MAX_LEAVES = 16           # leaves a query may scan; bounds the per-frame cost at any index size
+CHUNK_ROWS = 36000        # recorded frames per file (10 minutes at 60 FPS)
+
+# What the recorder samples, always from the acting fighter's point of view; the first
+# CONTINUOUS are distances in the tree, the rest are on/off flags that pick the tree
+FEATURES = ("dx", "dy", "vx", "vy", "opponent_vx", "opponent_vy", "damage", "opponent_damage",
+            "on_ground", "hitstun", "shielding", "opponent_attacking")
+CONTINUOUS = 8
+ACTIONS = ('move_left', 'move_right', 'jump', 'attack', 'shield', 'dash', 'special')
+INDEX_FILES = ("points", "norms", "actions", "offset", "scale", "context_root", "node_dim", "node_value", "node_start", "node_end",
+               "node_left", "node_right")
+
+def state_features(me, opponent, out):
+    """Write the feature vector for me facing opponent into out and return it"""
+    out[0] = opponent.rect.centerx - me.rect.centerx
+    out[1] = opponent.rect.centery - me.rect.centery
+    out[2] = me.velocity[0]
+    out[3] = me.velocity[1]
+    out[4] = opponent.velocity[0]
+    out[5] = opponent.velocity[1]
+    out[6] = me.damage
+    out[7] = opponent.damage
+    out[8] = me.on_ground
+    out[9] = me.hitstun > 0
+    out[10] = me.shielding
+    out[11] = opponent.attacking
+    return out
+
+def encode_actions(actions):
+    """Pack an action dict (the MeleeAI.predict format) into one byte"""
+    code = 0
+    for bit, name in enumerate(ACTIONS):
+        if actions[name]:
+            code |= 1 << bit
+    return code
+
+def decode_actions(code, out):
+    for bit, name in enumerate(ACTIONS):
+        out[name] = bool(code >> bit & 1)
+    return out
+
+class Recorder:
+    """Samples (features, human action) every frame into .npy chunks written off the game thread"""
+
+    def __init__(self, directory, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.chunk = len(glob.glob(os.path.join(directory, "actions_*.npy")))
+        self.chunk_rows = chunk_rows
+        self.features = np.zeros((chunk_rows, len(FEATURES)), dtype=np.float32)
+        self.actions = np.zeros(chunk_rows, dtype=np.uint8)
+        self.rows = 0
+        self.writers = []
+
+    def record(self, me, opponent, actions):
+        state_features(me, opponent, self.features[self.rows])
+        self.actions[self.rows] = encode_actions(actions)
+        self.rows += 1
+        if self.rows == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Hand the filled rows to a writer thread and start a fresh buffer"""
+        if not self.rows:
+            return
+        features, actions = self.features[:self.rows], self.actions[:self.rows]
+        writer = threading.Thread(target=self._write, args=(self.chunk, features, actions), daemon=True)
+        writer.start()
+        self.writers.append(writer)
+        self.chunk += 1
+        self.features = np.zeros_like(self.features)
+        self.actions = np.zeros_like(self.actions)
+        self.rows = 0
+
+    def _write(self, chunk, features, actions):
+        np.save(os.path.join(self.directory, f"features_{chunk:05d}.npy"), features)
+        # Actions last: a chunk only counts once its actions file exists
+        np.save(os.path.join(self.directory, f"actions_{chunk:05d}.npy"), actions)
+
+    def close(self):
+        self.flush()
+        for writer in self.writers:
+            writer.join()
+        self.writers = []
+
+def load_recordings(directory):
+    features, actions = [], []
+    for actions_path in sorted(glob.glob(os.path.join(directory, "actions_*.npy"))):
+        features.append(np.load(actions_path.replace("actions_", "features_")))
+        actions.append(np.load(actions_path))
+    if not actions:
+        raise FileNotFoundError(f"no recordings in {directory!r}")
+    return np.concatenate(features), np.concatenate(actions)
+
+def contexts(features):
+    """Pack the on/off features of each row into a small integer"""
+    flags = np.asarray(features)[..., CONTINUOUS:] != 0
+    return (flags * (1 << np.arange(flags.shape[-1]))).sum(axis=-1)
+
+def build_index(features, actions, directory=INDEX_DIR, leaf_size=LEAF_SIZE):
+    """Build a KD-tree over recorded states and save it as flat .npy arrays
+
+    States are first grouped by their on/off features (on_ground, hitstun, ...)
+    so a query only ever sees states from the same situation; each group gets
+    its own tree over the standardized continuous features. Points are reordered
+    so every node covers a contiguous row range, which lets a leaf be scanned as
+    one slice of the memory-mapped points file. Nodes split at the median of
+    their widest dimension. Each point's squared norm is saved too, so a leaf's
+    distances are |p|^2 - 2 p.q + |q|^2, one matrix-vector product.
+    """
+    offset = features[:, :CONTINUOUS].mean(axis=0)
+    scale = features[:, :CONTINUOUS].std(axis=0)
+    scale[scale == 0] = 1
+    context = contexts(features)
+    order = np.argsort(context, kind='stable')
+    points = ((features[order, :CONTINUOUS] - offset) / scale).astype(np.float32)
+    actions = actions[order]
+    context = context[order]
+    node_dim, node_value, node_start, node_end, node_left, node_right = [], [], [], [], [], []
+    context_root = np.full(1 << (len(FEATURES) - CONTINUOUS), -1, dtype=np.int32)
+
+    def add_node(start, end):
+        node_dim.append(-1)
+        node_value.append(0.0)
+        node_left.append(-1)
+        node_right.append(-1)
+        node_start.append(start)
+        node_end.append(end)
+        return len(node_start) - 1
+
+    order = np.arange(len(points))
+    bounds = np.searchsorted(context, np.arange(len(context_root) + 1))
+    stack = []
+    for code in range(len(context_root)):
+        if bounds[code] < bounds[code + 1]:
+            context_root[code] = add_node(int(bounds[code]), int(bounds[code + 1]))
+            stack.append(context_root[code])
+    while stack:
+        node = stack.pop()
+        start, end = node_start[node], node_end[node]
+        if end - start <= leaf_size:
+            continue
+        rows = order[start:end]
+        block = points[rows]
+        dim = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        middle = (end - start) // 2
+        split = np.argpartition(block[:, dim], middle)
+        order[start:end] = rows[split]
+        node_dim[node] = dim
+        node_value[node] = float(block[split[middle], dim])
+        node_left[node] = add_node(start, start + middle)
+        node_right[node] = add_node(start + middle, end)
+        stack.extend((node_left[node], node_right[node]))
+
+    os.makedirs(directory, exist_ok=True)
+    points = points[order]
+    arrays = {
+        "points": points, "norms": (points * points).sum(axis=1), "actions": actions[order], "offset": offset, "scale": scale, "context_root": context_root,
+        "node_dim": np.array(node_dim, dtype=np.int8), "node_value": np.array(node_value, dtype=np.float32),
+        "node_start": np.array(node_start, dtype=np.int32), "node_end": np.array(node_end, dtype=np.int32),
+        "node_left": np.array(node_left, dtype=np.int32), "node_right": np.array(node_right, dtype=np.int32),
+    }
+    for name in INDEX_FILES:
+        np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+
+class KDTree:
+    """A saved index; points and actions stay memory-mapped, the small node table is loaded"""
+
+    def __init__(self, directory=INDEX_DIR):
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in INDEX_FILES}
+        # Plain ndarray views of the mappings: slicing an np.memmap costs more than scanning a small leaf
+        self.points = np.asarray(arrays["points"])
+        self.norms = np.asarray(arrays["norms"])
+        self.actions = arrays["actions"]
+        self.offset = np.array(arrays["offset"])
+        self.scale = np.array(arrays["scale"])
+        self.context_root = arrays["context_root"].tolist()
+        self.roots = [root for root in self.context_root if root >= 0]
+        # Plain lists: indexing them is much cheaper than indexing NumPy scalars in the search loop
+        self.dim = arrays["node_dim"].tolist()
+        self.value = arrays["node_value"].tolist()
+        self.start = arrays["node_start"].tolist()
+        self.end = arrays["node_end"].tolist()
+        self.left = arrays["node_left"].tolist()
+        self.right = arrays["node_right"].tolist()
+
+    def __len__(self):
+        return len(self.points)
+
+    def query(self, features, k=NEIGHBORS, max_leaves=MAX_LEAVES):
+        """Return the row numbers of (about) the k stored states nearest to features
+
+        Leaves are visited closest-first, so the search is exact whenever it
+        finishes within max_leaves and otherwise returns the best found so far,
+        which keeps the cost per frame bounded. A node's bound is the squared
+        distance to its cell summed over every dimension split on the way down
+        (Arya and Mount's incremental distance), not just the last split, so far
+        cells are pruned sooner. A situation nobody was recorded in falls back to
+        searching every group.
+        """
+        root = self.context_root[int(contexts(features))]
+        q = ((features[:CONTINUOUS] - self.offset) / self.scale).astype(np.float32)
+        point = q.tolist()
+        qq = float(q @ q)
+        best_d = np.full(k, np.inf, dtype=np.float32)
+        best_i = np.full(k, -1, dtype=np.int64)
+        worst = np.inf
+        inside = [0.0] * CONTINUOUS
+        heap = [(0.0, node, inside) for node in ([root] if root >= 0 else self.roots)]
+        leaves = 0
+        while heap and leaves < max_leaves:
+            bound, node, offsets = heapq.heappop(heap)
+            if bound >= worst:
+                break
+            # Walk down to the nearest leaf, queueing the far side of each split with its per-dimension offsets
+            left = self.left[node]
+            while left >= 0:
+                dim = self.dim[node]
+                diff = point[dim] - self.value[node]
+                far_bound = bound - offsets[dim] + diff * diff
+                if far_bound < worst:
+                    far = offsets[:]
+                    far[dim] = diff * diff
+                    heapq.heappush(heap, (far_bound, self.right[node] if diff < 0 else left, far))
+                node = left if diff < 0 else self.right[node]
+                left = self.left[node]
+            start, end = self.start[node], self.end[node]
+            d = self.norms[start:end] - 2 * (self.points[start:end] @ q) + qq
+            close = (d < worst).nonzero()[0]
+            if len(close):
+                d = np.concatenate((best_d, d[close]))
+                i = np.concatenate((best_i, close + start))
+                keep = np.argpartition(d, k - 1)[:k]
+                best_d, best_i = d[keep], i[keep]
+                worst = float(best_d.max())
+            leaves += 1
+        return best_i[best_i >= 0]
+
+class ImitationAI:
+    """Drop-in for MeleeAI: does what recorded humans did in the most similar states"""
+
+    def __init__(self, directory=INDEX_DIR, k=NEIGHBORS):
+        self.tree = KDTree(directory)
+        self.k = k
+        self.features = np.zeros(len(FEATURES), dtype=np.float32)
+        self.actions = dict.fromkeys(ACTIONS, False)
+
+    def predict(self, game_state):
+        state_features(game_state['ai'], game_state['player'], self.features)
+        neighbors = self.tree.query(self.features, self.k)
+        codes = self.tree.actions[np.sort(neighbors)]
+        return decode_actions(int(np.bincount(codes, minlength=1 << len(ACTIONS)).argmax()), self.actions)
+
+def record_self_play(frames, seed=0):
+    """Stand-in for human recordings: MeleeAI's choices over headless matches"""
+    from ultra4k import profiling
+    play = profiling.SelfPlay(seed)
+    features = np.zeros((frames, len(FEATURES)), dtype=np.float32)
+    actions = np.zeros(frames, dtype=np.uint8)
+    game_state = play.game_state
+    for frame in range(frames):
+        play.step()
+        state_features(game_state.ai, game_state.player, features[frame])
+        actions[frame] = encode_actions(play.ai_model.actions)
+    return features, actions
+
+def benchmark(states=1_000_000, queries=2000, directory=INDEX_DIR):
+    """Build an index over states recorded frames and time k-NN queries against a linear scan"""
+    features, actions = record_self_play(min(states, 200_000))
+    # Tile the recording with jitter to reach the target size without hours of self-play
+    rng = np.random.default_rng(0)
+    repeats = -(-states // len(features))
+    features = np.tile(features, (repeats, 1))[:states]
+    features[:, :CONTINUOUS] += rng.normal(0, 0.5, (states, CONTINUOUS)).astype(np.float32)
+    actions = np.tile(actions, repeats)[:states]
+    start = time.perf_counter()
+    build_index(features, actions, directory)
+    build = time.perf_counter() - start
+    tree = KDTree(directory)
+    samples, _ = record_self_play(queries, seed=1)
+    times = []
+    for sample in samples:
+        start = time.perf_counter()
+        tree.query(sample)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    # Exact answers from a scan of each query's group, for the time and the recall of the bounded search
+    context = contexts(features)
+    groups = np.sort(context)
+    scan = found = agree = 0
+    for sample in samples[:50]:
+        start = time.perf_counter()
+        code = contexts(sample)
+        lo, hi = np.searchsorted(groups, code, 'left'), np.searchsorted(groups, code, 'right')
+        q = ((sample[:CONTINUOUS] - tree.offset) / tree.scale).astype(np.float32)
+        d = ((tree.points[lo:hi] - q) ** 2).sum(axis=1)
+        nearest = lo + np.argpartition(d, NEIGHBORS - 1)[:NEIGHBORS]
+        scan += time.perf_counter() - start
+        exact = np.sort(d)[:NEIGHBORS]
+        neighbors = tree.query(sample)
+        got = ((tree.points[neighbors] - q) ** 2).sum(axis=1)
+        found += np.sum(got <= exact[-1] * (1 + 1e-6)) / len(exact)
+        agree += np.bincount(tree.actions[np.sort(nearest)]).argmax() == np.bincount(tree.actions[np.sort(neighbors)]).argmax()
+    return {'states': states, 'build_s': build, 'p50_ms': times[len(times) // 2] * 1000,
+            'p99_ms': times[int(len(times) * 0.99)] * 1000, 'scan_ms': scan / 50 * 1000,
+            'recall': found / 50, 'same_action': agree / 50}
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # python -m ultra4k.imitation RECORD_DIR: index the recordings for CPU_MODE = "imitation"
+        build_index(*load_recordings(sys.argv[1]))
+        print(f"indexed {len(KDTree())} states into {INDEX_DIR}")
+        sys.exit()
+    result = benchmark()
+    print(f"{result['states']} states indexed in {result['build_s']:.1f} s; {NEIGHBORS}-NN query "
+          f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, recall {result['recall']:.0%}, "
+          f"same majority action as exact search {result['same_action']:.0%}; "
+          f"exact scan of the same group {result['scan_ms']:.1f} ms")
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from ultra4k import collision
+from ultra4k import engine
+
+MAX_PERCENT = 300
+SIM_FRAMES = 300
+FIGHTER_WIDTH = 40
+FIGHTER_HEIGHT = 50
+CACHE_PATH = "kotable.npz"
+TABLE_VERSION = 3  # Bump when the launch simulation changes
+
+# Launch spots on the main platform and the direction the attacker faces there
+POSITIONS = (("center", 1), ("left_ledge", -1), ("right_ledge", 1))
+# Whether the defender faces the attacker when hit; only a fighter facing a ledge can grab it
+FACINGS = ("toward", "away")
+DI_DIRECTIONS = (("none", (0, 0)), ("left", (-1, 0)), ("right", (1, 0)), ("up", (0, -1)), ("down", (0, 1)))
+
+def _table_key():
+    """Hash everything the launch simulation depends on so stale caches are rebuilt"""
+    physics = {name: getattr(engine, name) for name in (
+        "GRAVITY", "AIR_FRICTION", "GROUND_FRICTION", "DI_INFLUENCE", "LEDGE_GRAB_RANGE", "SCREEN_WIDTH", "SCREEN_HEIGHT")}
+    blob = json.dumps([engine.CHARACTER_STATS, engine.STAGE_DATA, physics, TABLE_VERSION, MAX_PERCENT, SIM_FRAMES,
+                       POSITIONS, FACINGS, DI_DIRECTIONS], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def simulate_launches(stage, x, y, vx, vy, fall_speed, facing_right, frames=SIM_FRAMES):
+    """Step many launched fighters with no input at once and return which leave the blast zones
+
+    Mirrors the airborne part of Character.update(): gravity, friction, swept
+    platform collision, ledge grabs, screen-edge clamping and the blast zone
+    test. A fighter that grabs a ledge of the main platform survives: the grab
+    stops its momentum and gives its jump back.
+    """
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    vx = vx.astype(np.float64)
+    vy = vy.astype(np.float64)
+    max_fall = fall_speed * 10
+    on_ground = np.ones(len(x), dtype=bool)
+    ko = np.zeros(len(x), dtype=bool)
+    grabbed = np.zeros(len(x), dtype=bool)
+    blast = stage['blast_zones']
+    platforms = [p['rect'] for p in stage['platforms']]
+    ledge_left, ledge_top, ledge_width, _ = next(p['rect'] for p in stage['platforms'] if p['type'] == 'main')
+    ledge_right = ledge_left + ledge_width
+    for _ in range(frames):
+        vy = np.where(on_ground, vy, np.minimum(vy + engine.GRAVITY * fall_speed, max_fall))
+        vx = vx * np.where(on_ground, 1 - engine.GROUND_FRICTION, 1 - engine.AIR_FRICTION)
+        bottom = y + FIGHTER_HEIGHT
+        safe_dy = np.where(vy == 0, 1, vy)
+        hit_t = np.full(len(x), np.inf)
+        face = np.zeros(len(x), dtype=np.int8)
+        snap_y = y
+        for p_left, p_top, p_width, p_height in platforms:
+            p_bottom = p_top + p_height
+            floor = (vy >= 0) & (bottom <= p_top) & (p_top <= bottom + vy)
+            ceiling = (vy < 0) & (y + vy <= p_bottom) & (p_bottom <= y)
+            t = np.where(floor, np.where(vy == 0, 0, (p_top - bottom) / safe_dy), (p_bottom - y) / safe_dy)
+            hit_x = x + vx * t
+            hit = (floor | ceiling) & (t < hit_t) & (hit_x < p_left + p_width) & (hit_x + FIGHTER_WIDTH > p_left)
+            hit_t = np.where(hit, t, hit_t)
+            face = np.where(hit, np.where(floor, collision.FLOOR, collision.CEILING), face)
+            snap_y = np.where(hit, np.where(floor, p_top - FIGHTER_HEIGHT, p_bottom), snap_y)
+        x = x + vx
+        y = np.where(face > 0, snap_y, y + vy)
+        vy = np.where(face > 0, 0, vy)
+        on_ground = face == collision.FLOOR
+        left = np.trunc(x)
+        # A falling fighter facing the ledge beside it grabs it, as in Character.update()
+        near_top = np.abs(np.trunc(y) + FIGHTER_HEIGHT - ledge_top) < engine.LEDGE_GRAB_RANGE
+        grabbed |= ~on_ground & (vy > 0) & ~ko & near_top & np.where(
+            facing_right, np.abs(left - ledge_right) < engine.LEDGE_GRAB_RANGE,
+            np.abs(left + FIGHTER_WIDTH - ledge_left) < engine.LEDGE_GRAB_RANGE)
+        ko |= ~grabbed & ((x < blast['left']) | (x > blast['right']) | (y < blast['top']) | (y > blast['bottom']))
+        past_left = left < 0
+        past_right = left + FIGHTER_WIDTH > engine.SCREEN_WIDTH
+        x = np.where(past_left, 0, np.where(past_right, engine.SCREEN_WIDTH - FIGHTER_WIDTH, x))
+        vx = np.where(past_left & (vx < 0) | past_right & (vx > 0), 0, vx)
+        done = ko | grabbed
+        if done.all() or (on_ground | done).all() and (np.abs(vx[~done]) < 1e-3).all():
+            break
+    return ko
+
+def launch_spots(stage):
+    """Fighter left edges for each of POSITIONS on the stage's main platform"""
+    main = next(p['rect'] for p in stage['platforms'] if p['type'] == 'main')
+    spots = {
+        "center": main[0] + main[2] // 2 - FIGHTER_WIDTH // 2,
+        "left_ledge": main[0],
+        "right_ledge": main[0] + main[2] - FIGHTER_WIDTH,
+    }
+    return [spots[name] for name, _ in POSITIONS]
+
+def build_table():
+    """Simulate every (stage, attacker, move, defender, position, facing, DI, percent) launch"""
+    stages = tuple(engine.STAGE_DATA)
+    characters = tuple(engine.CHARACTER_STATS)
+    moves = engine.MOVE_NAMES
+    percents = np.arange(MAX_PERCENT + 1, dtype=np.float64)
+    shape = (len(stages), len(characters), len(moves), len(characters), len(POSITIONS), len(FACINGS), len(DI_DIRECTIONS),
+             len(percents))
+    kos = np.zeros(shape, dtype=bool)
+    for s, stage_name in enumerate(stages):
+        stage = engine.STAGE_DATA[stage_name]
+        main = next(p['rect'] for p in stage['platforms'] if p['type'] == 'main')
+        spots = launch_spots(stage)
+        batch = []
+        for a, attacker in enumerate(characters):
+            for m, move_name in enumerate(moves):
+                move = engine.CHARACTER_STATS[attacker]['moves'].get(move_name)
+                if move is None:
+                    continue
+                cos_angle, sin_angle = engine.angle_vector(move['angle'])
+                for d, defender in enumerate(characters):
+                    stats = engine.CHARACTER_STATS[defender]
+                    knockback = engine.calculate_knockback(move['knockback'], percents, stats['weight'])
+                    for p, (_, facing) in enumerate(POSITIONS):
+                        for i, (_, (di_x, di_y)) in enumerate(DI_DIRECTIONS):
+                            kb_x = knockback * cos_angle * facing
+                            kb_y = knockback * sin_angle
+                            if (di_x, di_y) != (0, 0):
+                                kb_x, kb_y = engine.apply_di(kb_x, kb_y, di_x, di_y)
+                            for f, toward in enumerate(FACINGS):
+                                # Facing the attacker is facing against the direction it hits in
+                                facing_right = (facing < 0) == (toward == "toward")
+                                batch.append(((a, m, d, p, f, i), spots[p], kb_x, kb_y, stats['fall_speed'], facing_right))
+        count = len(percents)
+        x = np.concatenate([np.full(count, float(item[1])) for item in batch])
+        vx = np.concatenate([item[2] for item in batch])
+        vy = np.concatenate([item[3] for item in batch])
+        fall_speed = np.concatenate([np.full(count, item[4]) for item in batch])
+        facing_right = np.repeat([item[5] for item in batch], count)
+        y = np.full(len(x), float(main[1] - FIGHTER_HEIGHT))
+        result = simulate_launches(stage, x, y, vx, vy, fall_speed, facing_right).reshape(len(batch), count)
+        for row, item in zip(result, batch):
+            kos[(s,) + item[0]] = row
+    return kos
+
+class KOTable:
+    """O(1) lookups of the percent at which a move KOs, built once and cached on disk"""
+
+    def __init__(self, kos):
+        self.kos = kos
+        first = np.argmax(kos, axis=-1).astype(np.float32)
+        self.ko_percents = np.where(kos.any(axis=-1), first, np.inf).astype(np.float32)
+        self.lowest_percents = self.ko_percents.min(axis=2)  # over every move of the attacker
+        self.stage_index = {name: i for i, name in enumerate(engine.STAGE_DATA)}
+        self.char_index = {name: i for i, name in enumerate(engine.CHARACTER_STATS)}
+        self.move_index = {name: i for i, name in enumerate(engine.MOVE_NAMES)}
+        self.position_index = {name: i for i, (name, _) in enumerate(POSITIONS)}
+        self.facing_index = {name: i for i, name in enumerate(FACINGS)}
+        self.di_index = {name: i for i, (name, _) in enumerate(DI_DIRECTIONS)}
+        self.spots = {name: launch_spots(stage) for name, stage in engine.STAGE_DATA.items()}
+
+    @classmethod
+    def load(cls, path=CACHE_PATH, build=True):
+        """Load the cached table, rebuilding it when missing or out of date; with build=False return None instead"""
+        key = _table_key()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if str(data['key']) == key:
+                    return cls(np.unpackbits(data['kos'], axis=-1, count=MAX_PERCENT + 1).astype(bool))
+        if not build:
+            return None
+        kos = build_table()
+        # Written to a file of its own and renamed, so a build killed halfway never leaves a torn cache
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                np.savez_compressed(f, key=key, kos=np.packbits(kos, axis=-1))
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return cls(kos)
+
+    def _index(self, stage, attacker, move, defender, position, facing, di):
+        return (self.stage_index[stage], self.char_index[attacker], self.move_index[move],
+                self.char_index[defender], self.position_index[position], self.facing_index[facing], self.di_index[di])
+
+    def ko_percent(self, stage, attacker, move, defender, position="center", di="none", facing="toward"):
+        """Lowest percent at which the move KOs, or inf if it never does"""
+        return float(self.ko_percents[self._index(stage, attacker, move, defender, position, facing, di)])
+
+    def kos_at(self, stage, attacker, move, defender, percent, position="center", di="none", facing="toward"):
+        """Whether the move KOs a defender already at percent"""
+        percent = min(max(int(percent), 0), MAX_PERCENT)
+        return bool(self.kos[self._index(stage, attacker, move, defender, position, facing, di) + (percent,)])
+
+    def nearest_position(self, stage, left):
+        """The one of POSITIONS whose launch spot is nearest a fighter's left edge"""
+        spots = self.spots[stage]
+        return POSITIONS[min(range(len(spots)), key=lambda p: abs(spots[p] - left))][0]
+
+    def lowest_ko_percent(self, stage, attacker, defender, left, facing_right, di="none"):
+        """Lowest percent at which any of the attacker's moves KOs the defender, launched from the spot nearest left"""
+        position = self.nearest_position(stage, left)
+        toward = "toward" if facing_right == (POSITIONS[self.position_index[position]][1] < 0) else "away"
+        return float(self.lowest_percents[self.stage_index[stage], self.char_index[attacker], self.char_index[defender],
+                                          self.position_index[position], self.facing_index[toward], self.di_index[di]])
+
+def _build(path):
+    KOTable.load(path)
+
+def _build_and_load(path, on_ready):
+    import multiprocessing
+    # A process of its own keeps the build off the game loop's GIL, as reachability.build_in_background does
+    process = multiprocessing.get_context("spawn").Process(target=_build, args=(path,), name="kotable-build", daemon=True)
+    process.start()
+    process.join()
+    table = KOTable.load(path, build=False)
+    if table is not None:
+        on_ready(table)
+
+def build_in_background(on_ready, path=CACHE_PATH):
+    """Build the cache without blocking and call on_ready(table) once it is ready"""
+    thread = threading.Thread(target=_build_and_load, args=(path, on_ready), name="kotable-build", daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    table = KOTable.load()
+    print(f"KO table ready in {time.perf_counter() - start:.2f}s")
+    for stage in engine.STAGE_DATA:
+        for position, _ in POSITIONS:
+            percent = table.ko_percent(stage, "fox", "fsmash", "falco", position)
+            print(f"fox fsmash vs falco on {stage} ({position}): {percent:g}%")
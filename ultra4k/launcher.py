@@ -0,0 +1,50 @@
+from ultra4k import startup
+
+import argparse
+import asyncio
+import importlib
+import platform
+
+# Game modes, imported only when launched
+MODES = {
+    "emusmash": "ultra4k.engine",
+    "ultramelee": "ultra4k.modes.ultramelee",
+    "ultra": "ultra4k.modes.ultra",
+    "smash4k": "ultra4k.modes.smash4k",
+    "ultrasmash": "ultra4k.modes.ultrasmash",
+    "replay": "ultra4k.replay",
+}
+DEFAULT_MODE = "emusmash"
+
+def load_mode(name):
+    """Import a game mode module without starting it"""
+    return importlib.import_module(MODES[name])
+
+def report_first_frame(name, target_ms):
+    startup.timeline.mark("first frame")
+    print(f"{name}: " + startup.timeline.report(target_ms))
+
+async def launch(name=DEFAULT_MODE, report=True, target_ms=startup.STARTUP_TARGET_MS):
+    """Import the chosen mode and run its main loop"""
+    with startup.phase("import pygame and " + MODES[name]):
+        from ultra4k import presenter
+        mode = load_mode(name)
+    if report:
+        presenter.on_first_frame = lambda: report_first_frame(name, target_ms)
+    await mode.main()
+
+def run(name=DEFAULT_MODE, report=True, target_ms=startup.STARTUP_TARGET_MS):
+    """Launch a mode the way every entry point should: in the browser event loop or a fresh one"""
+    if platform.system() == "Emscripten":
+        asyncio.ensure_future(launch(name, report, target_ms))
+    else:
+        asyncio.run(launch(name, report, target_ms))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ultra4k", description="Launch an Ultra4k game mode")
+    parser.add_argument("mode", nargs="?", default=DEFAULT_MODE, choices=sorted(MODES))
+    parser.add_argument("--quiet", action="store_true", help="don't report the startup timeline")
+    parser.add_argument("--startup-target", type=float, default=startup.STARTUP_TARGET_MS, metavar="MS",
+                        help="time-to-first-frame target the startup report is checked against")
+    args = parser.parse_args(argv)
+    run(args.mode, report=not args.quiet, target_ms=args.startup_target)
@@ -0,0 +1,173 @@
+import asyncio
+import bisect
+import gc
+import os
+import time
+
+METRICS_HOST = "127.0.0.1"  # Only ever bind locally; put a proxy in front to scrape from elsewhere
+# Frame time histogram bucket bounds in seconds, around the 60 FPS budget of 16.7 ms
+FRAME_BUCKETS = (0.004, 0.008, 0.012, 0.0167, 0.020, 0.025, 0.0333, 0.050, 0.100, 0.250)
+PHASES = ("input", "simulation", "render", "present")
+READ_TIMEOUT = 2.0
+
+class Metrics:
+    """Counters the game loop bumps every frame and a scrape turns into Prometheus text
+
+    Everything runs on the event loop thread: the game loop writes plain
+    ints and floats between awaits and the scrape handler reads them at
+    the next await, so no locks are taken and a scrape can't interrupt a
+    frame halfway through.
+    """
+
+    def __init__(self):
+        self.frame_counts = [0] * (len(FRAME_BUCKETS) + 1)
+        self.frame_sum = 0.0
+        self.frames = 0
+        self.fps = 0.0
+        self.phase_sums = [0.0] * len(PHASES)
+        self.phase_counts = [0] * len(PHASES)
+        self.phase_index = {name: i for i, name in enumerate(PHASES)}
+        self.matches = 0
+        self.gc_collections = [0, 0, 0]
+        self.gc_seconds = [0.0, 0.0, 0.0]
+        self.gc_started = None
+        self.gauges = {}  # active object kind -> zero-argument function, called only when scraped
+        self.counters = {}  # metric name -> (help text, zero-argument function), for counters kept elsewhere
+        self.last_frame = None
+        self.started = time.time()
+
+    def phase(self, name, start):
+        """Record the time since start against a phase; returns now, the next phase's start"""
+        now = time.perf_counter()
+        i = self.phase_index[name]
+        self.phase_sums[i] += now - start
+        self.phase_counts[i] += 1
+        return now
+
+    def end_frame(self, fps):
+        """Record the wall time since the previous end_frame() call"""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            seconds = now - self.last_frame
+            self.frame_counts[bisect.bisect_left(FRAME_BUCKETS, seconds)] += 1
+            self.frame_sum += seconds
+            self.frames += 1
+        self.last_frame = now
+        self.fps = fps
+
+    def count_objects(self, kind, function):
+        self.gauges[kind] = function
+
+    def count_total(self, name, help_text, function):
+        """Export a counter some other component keeps as ultra4k_<name>_total"""
+        self.counters[name] = (help_text, function)
+
+    def _gc_callback(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        elif self.gc_started is not None:
+            generation = info['generation']
+            self.gc_collections[generation] += 1
+            self.gc_seconds[generation] += time.perf_counter() - self.gc_started
+            self.gc_started = None
+
+    def watch_gc(self):
+        if self._gc_callback not in gc.callbacks:
+            gc.callbacks.append(self._gc_callback)
+
+    def unwatch_gc(self):
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+
+    def render(self):
+        """The current values in Prometheus text exposition format"""
+        lines = [
+            "# HELP ultra4k_frame_seconds Wall time of each game loop iteration.",
+            "# TYPE ultra4k_frame_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(FRAME_BUCKETS, self.frame_counts):
+            cumulative += count
+            lines.append(f'ultra4k_frame_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'ultra4k_frame_seconds_bucket{{le="+Inf"}} {self.frames}')
+        lines.append(f"ultra4k_frame_seconds_sum {self.frame_sum:.6f}")
+        lines.append(f"ultra4k_frame_seconds_count {self.frames}")
+        lines += ["# HELP ultra4k_fps Frame rate measured by the frame pacer.", "# TYPE ultra4k_fps gauge",
+                  f"ultra4k_fps {self.fps:.2f}"]
+        lines += ["# HELP ultra4k_phase_seconds Time spent in each part of the game loop.", "# TYPE ultra4k_phase_seconds summary"]
+        for name, total, count in zip(PHASES, self.phase_sums, self.phase_counts):
+            lines.append(f'ultra4k_phase_seconds_sum{{phase="{name}"}} {total:.6f}')
+            lines.append(f'ultra4k_phase_seconds_count{{phase="{name}"}} {count}')
+        lines += ["# HELP ultra4k_gc_collections_total Garbage collections per generation.", "# TYPE ultra4k_gc_collections_total counter"]
+        lines += [f'ultra4k_gc_collections_total{{generation="{g}"}} {n}' for g, n in enumerate(self.gc_collections)]
+        lines += ["# HELP ultra4k_gc_pause_seconds_total Time spent collecting per generation.", "# TYPE ultra4k_gc_pause_seconds_total counter"]
+        lines += [f'ultra4k_gc_pause_seconds_total{{generation="{g}"}} {s:.6f}' for g, s in enumerate(self.gc_seconds)]
+        rss = resident_bytes()
+        if rss is not None:
+            lines += ["# HELP process_resident_memory_bytes Resident set size.", "# TYPE process_resident_memory_bytes gauge",
+                      f"process_resident_memory_bytes {rss}"]
+        if self.gauges:
+            lines += ["# HELP ultra4k_active_objects Live simulation objects by kind.", "# TYPE ultra4k_active_objects gauge"]
+            lines += [f'ultra4k_active_objects{{kind="{kind}"}} {function()}' for kind, function in self.gauges.items()]
+        for name, (help_text, function) in self.counters.items():
+            lines += [f"# HELP ultra4k_{name}_total {help_text}", f"# TYPE ultra4k_{name}_total counter",
+                      f"ultra4k_{name}_total {function()}"]
+        lines += ["# HELP ultra4k_matches_total Matches played to the end.", "# TYPE ultra4k_matches_total counter",
+                  f"ultra4k_matches_total {self.matches}",
+                  "# HELP process_start_time_seconds Start time since the Unix epoch.", "# TYPE process_start_time_seconds gauge",
+                  f"process_start_time_seconds {self.started:.0f}"]
+        return "\n".join(lines) + "\n"
+
+def resident_bytes():
+    """Resident set size from /proc, or None where there is no /proc"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+async def _handle(metrics, reader, writer):
+    try:
+        request = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        # Drain the headers; nothing in them changes the answer
+        while (await asyncio.wait_for(reader.readline(), READ_TIMEOUT)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request.split()
+        if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+            body = metrics.render().encode()
+            status = b"200 OK"
+        else:
+            body = b"not found; metrics are at /metrics\n"
+            status = b"404 Not Found"
+        writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(metrics, port, host=METRICS_HOST):
+    """Start answering GET /metrics on host:port from the running event loop; returns the asyncio server"""
+    metrics.watch_gc()
+    return await asyncio.start_server(lambda reader, writer: _handle(metrics, reader, writer), host, port)
+
+def benchmark(frames=20000):
+    """Hot-path cost per frame of the counters and the cost of rendering one scrape"""
+    metrics = Metrics()
+    metrics.count_objects("moves", lambda: 2)
+    start = time.perf_counter()
+    for _ in range(frames):
+        now = time.perf_counter()
+        for name in PHASES:
+            now = metrics.phase(name, now)
+        metrics.end_frame(60.0)
+    per_frame = (time.perf_counter() - start) / frames
+    start = time.perf_counter()
+    for _ in range(100):
+        text = metrics.render()
+    return per_frame * 1e6, (time.perf_counter() - start) / 100 * 1e3, len(text)
+
+if __name__ == "__main__":
+    frame_us, render_ms, size = benchmark()
+    print(f"{frame_us:.2f} us per frame of counter updates, {render_ms:.3f} ms to render a {size} byte scrape")
@@ -0,0 +1,51 @@
+import pygame
+from ultra4k import pacing
+from ultra4k import startup
+from ultra4k.presenter import Presenter
+
+# Constants
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+FPS = 60
+DISPLAY_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)  # Window size; the game is scaled up in integer steps, e.g. (3840, 2160)
+
+# Global variables
+screen = None
+presenter = None
+pacer = None
+
+def setup():
+    global screen, presenter, pacer
+    # Initialize only the pygame subsystems we use
+    with startup.phase("pygame init"):
+        startup.init_pygame()
+
+    # Set up display
+    with startup.phase("window creation"):
+        presenter = Presenter((SCREEN_WIDTH, SCREEN_HEIGHT), DISPLAY_SIZE)
+        screen = presenter.surface
+        pygame.display.set_caption('Smash Engine Pygame Port')
+
+    # Frame pacing
+    pacer = pacing.FramePacer(FPS)
+
+def update_loop():
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False
+
+    # Clear the screen
+    screen.fill((0, 0, 0))
+
+    # TODO: Add game logic and rendering here
+
+    # Update display
+    presenter.present()
+    return True
+
+async def main():
+    setup()
+    running = True
+    while running:
+        running = update_loop()
+        await pacer.wait()
+    pygame.quit()
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import numpy as np
+
+RING_SIZE = 4096          # observations the game loop can get ahead of the learner before old ones are dropped
+FORGETTING = 0.998        # per-observation decay of old evidence, so the CPU tracks the player's current habits
+PRIOR = 100.0             # initial inverse-covariance scale; larger keeps the starting model longer
+IDLE_SLEEP = 0.002        # seconds the learner sleeps when the ring is empty
+
+class ObservationRing:
+    """Single-producer single-consumer ring of (features, target) rows
+
+    The game loop only writes a row and then bumps head; the learner only bumps
+    tail. Each index has exactly one writer, so no lock is needed: the consumer
+    never reads a row before head says it is complete. If the learner falls more
+    than a ring behind, even while it copies, it skips ahead and the oldest rows
+    are lost.
+    """
+
+    def __init__(self, features, size=RING_SIZE):
+        self.size = size
+        self.rows = np.zeros((size, features + 1))
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def push(self, features, target):
+        row = self.rows[self.head % self.size]
+        row[:-1] = features
+        row[-1] = target
+        self.head += 1
+
+    def pop_all(self):
+        """Return the rows written since the last call, oldest first"""
+        head = self.head
+        if head - self.tail > self.size:
+            self.dropped += head - self.size - self.tail
+            self.tail = head - self.size
+        start, end = self.tail % self.size, head % self.size
+        if head == self.tail:
+            rows = self.rows[:0]
+        elif start < end:
+            rows = self.rows[start:end].copy()
+        else:
+            rows = np.concatenate((self.rows[start:], self.rows[:end]))
+        # The producer kept going during the copy: rows it has lapped since, and the one it may be
+        # writing now, could be torn, so keep only rows less than a ring behind the fresh head
+        lapped = min(self.head - self.size + 1 - self.tail, len(rows))
+        if lapped > 0:
+            rows = rows[lapped:]
+            self.dropped += lapped
+        self.tail = head
+        return rows
+
+class OnlineLearner:
+    """Recursive least squares on a background thread for a LinearRegression-style model
+
+    Each observation is a rank-1 Sherman-Morrison update of the inverse
+    covariance, so a step costs O(features^2) no matter how long the session
+    runs. After each batch the learner publishes a new (version, coef,
+    intercept) tuple with one reference assignment; the game loop calls apply()
+    between frames to pick it up.
+    """
+
+    def __init__(self, model, forgetting=FORGETTING, prior=PRIOR, ring_size=RING_SIZE):
+        features = len(model.coef_)
+        self.ring = ObservationRing(features, ring_size)
+        self.forgetting = forgetting
+        self.weights = np.concatenate(([model.intercept_], model.coef_)).astype(float)
+        self.inverse = np.eye(features + 1) / prior
+        self.published = (0, model.coef_, model.intercept_)
+        self.applied = 0
+        self.updates = 0
+        self.running = False
+        self.thread = None
+
+    def observe(self, features, target):
+        """Queue one observation from the game loop; never blocks"""
+        self.ring.push(features, target)
+
+    def apply(self, model):
+        """Copy the newest published coefficients into model; cheap when nothing changed"""
+        version, coef, intercept = self.published
+        if version != self.applied:
+            model.coef_ = coef
+            model.intercept_ = intercept
+            self.applied = version
+
+    def learn(self, rows):
+        weights, inverse, forgetting = self.weights, self.inverse, self.forgetting
+        for row in rows:
+            x = np.concatenate(([1.0], row[:-1]))
+            px = inverse @ x
+            gain = px / (forgetting + x @ px)
+            weights += gain * (row[-1] - x @ weights)
+            inverse -= np.outer(gain, px)
+            inverse /= forgetting
+        self.updates += len(rows)
+        self.published = (self.published[0] + 1, weights[1:].copy(), float(weights[0]))
+
+    def run(self):
+        while self.running:
+            rows = self.ring.pop_all()
+            if len(rows):
+                self.learn(rows)
+            else:
+                time.sleep(IDLE_SLEEP)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="online-learner", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+def benchmark(frames=3600):
+    """Frame-time percentiles of the smash4k AI step with and without the learner thread"""
+    def percentiles(learner):
+        model = _zero_model()
+        rng = np.random.default_rng(0)
+        times = []
+        for frame in range(frames):
+            start = time.perf_counter()
+            features = rng.uniform(0, 800, 4)
+            if learner is not None:
+                learner.apply(model)
+            model.predict([features])
+            if learner is not None:
+                learner.observe(features, features[2] > features[0])
+            times.append(time.perf_counter() - start)
+            # Idle until the next frame like the game loop does, at 10x speed to keep the run short
+            time.sleep(max(0.0, 1 / 600 - times[-1]))
+        times.sort()
+        return times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+    baseline = percentiles(None)
+    learner = OnlineLearner(_zero_model()).start()
+    training = percentiles(learner)
+    learner.stop()
+    return {'baseline_ms': baseline, 'training_ms': training, 'updates': learner.updates, 'dropped': learner.ring.dropped}
+
+def _zero_model():
+    from sklearn.linear_model import LinearRegression
+    model = LinearRegression()
+    model.coef_ = np.zeros(4)
+    model.intercept_ = 0.5
+    model.n_features_in_ = 4
+    return model
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"AI step p50/p99 without learner: {result['baseline_ms'][0]:.3f}/{result['baseline_ms'][1]:.3f} ms, "
+          f"with learner: {result['training_ms'][0]:.3f}/{result['training_ms'][1]:.3f} ms "
+          f"({result['updates']} updates, {result['dropped']} dropped)")
@@ -0,0 +1,121 @@
+import asyncio
+import collections
+import platform
+import time
+
+SPIN_MARGIN = 0.002   # stop sleeping this long before the deadline and spin on perf_counter the rest of the way
+HISTORY = 3600        # frame intervals kept for the jitter percentiles (one minute at 60 FPS)
+PERCENTILES = (50, 90, 99, 99.9)
+# Spinning would stall the browser's own event loop, so the web build always paces by sleeping alone
+POWER_SAVE = platform.system() == "Emscripten"
+
+class FramePacer:
+    """Paces an asyncio main loop to exact frame deadlines
+
+    clock.tick() sleeps in whole milliseconds, so a 60 FPS loop alternates 16
+    and 17 ms frames on top of scheduler jitter. wait() instead sleeps on the
+    event loop (so other tasks, like the metrics server, still run) until
+    SPIN_MARGIN before the deadline, then spins on perf_counter to hit it.
+    Deadlines advance by exactly one period, so rounding never accumulates;
+    a frame that overruns by more than a period resynchronises instead of
+    bursting to catch up. With power_save the spin is skipped, trading about
+    a millisecond of jitter for an idle CPU between frames.
+    """
+
+    def __init__(self, fps=60, power_save=POWER_SAVE, history=HISTORY):
+        self.period = 1.0 / fps
+        self.power_save = power_save
+        self.deadline = None
+        self.last = None
+        self.intervals = collections.deque(maxlen=history)
+        self.late = 0      # frames whose work alone overran the deadline
+        self.spun = 0.0    # seconds spent spinning, to see what the precision costs
+
+    async def wait(self):
+        """Yield to the event loop until the next frame deadline; call once per frame after presenting"""
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.period
+        remaining = self.deadline - now
+        margin = 0.0 if self.power_save else SPIN_MARGIN
+        if remaining > margin:
+            await asyncio.sleep(remaining - margin)
+        else:
+            await asyncio.sleep(0)
+            if remaining < 0:
+                self.late += 1
+        if not self.power_save:
+            spin_start = time.perf_counter()
+            while time.perf_counter() < self.deadline:
+                pass
+            self.spun += time.perf_counter() - spin_start
+        now = time.perf_counter()
+        if self.last is not None:
+            self.intervals.append(now - self.last)
+        self.last = now
+        self.deadline += self.period
+        if now - self.deadline > self.period:
+            self.deadline = now + self.period
+
+    def get_fps(self):
+        """Average frame rate over the kept intervals, like clock.get_fps()"""
+        if not self.intervals:
+            return 0.0
+        return len(self.intervals) / sum(self.intervals)
+
+    def jitter(self, percentiles=PERCENTILES):
+        """Percentiles of |interval - period| in milliseconds over the kept intervals"""
+        if not self.intervals:
+            return {p: 0.0 for p in percentiles}
+        errors = sorted(abs(interval - self.period) * 1000 for interval in self.intervals)
+        last = len(errors) - 1
+        return {p: errors[min(last, round(p / 100 * last))] for p in percentiles}
+
+    def report(self):
+        jitter = ", ".join(f"p{p:g} {ms:.3f}" for p, ms in self.jitter().items())
+        return (f"{self.get_fps():.2f} FPS over {len(self.intervals)} frames, jitter ms {jitter}, "
+                f"{self.late} late, {self.spun * 1000 / max(len(self.intervals), 1):.2f} ms spin/frame")
+
+async def _paced(pacer, frames, work):
+    for frame in range(frames):
+        work(frame)
+        await pacer.wait()
+
+async def _ticked(clock, fps, frames, work, intervals):
+    last = None
+    for frame in range(frames):
+        work(frame)
+        clock.tick(fps)
+        await asyncio.sleep(1.0 / fps)
+        now = time.perf_counter()
+        if last is not None:
+            intervals.append(now - last)
+        last = now
+
+def benchmark(frames=600, fps=60):
+    """Pace a loop with 2-10 ms of busy work per frame the old way and with FramePacer in both modes"""
+    import random
+
+    import pygame
+
+    rng = random.Random(0)
+    budgets = [rng.uniform(0.002, 0.010) for _ in range(frames)]
+
+    def work(frame):
+        end = time.perf_counter() + budgets[frame]
+        while time.perf_counter() < end:
+            pass
+
+    results = {}
+    ticked = FramePacer(fps)
+    asyncio.run(_ticked(pygame.time.Clock(), fps, frames, work, ticked.intervals))
+    results["clock.tick + asyncio.sleep(1/FPS)"] = ticked
+    for label, power_save in (("FramePacer", False), ("FramePacer power_save", True)):
+        pacer = FramePacer(fps, power_save)
+        asyncio.run(_paced(pacer, frames, work))
+        results[label] = pacer
+    return results
+
+if __name__ == "__main__":
+    for label, pacer in benchmark().items():
+        print(f"{label}: {pacer.report()}")
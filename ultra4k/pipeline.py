@@ -0,0 +1,271 @@
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from ultra4k import combos
+from ultra4k import engine
+from ultra4k.projectiles import ProjectilePool
+
+# Frame copies: each holds exactly what GameState.draw() reads and borrows the engine's own
+# draw methods, so the pipelined picture is drawn by the same code as the serial one
+
+class MoveFrame:
+    __slots__ = ("hitboxes",)
+    draw = engine.Move.draw
+
+    def __init__(self):
+        self.hitboxes = engine.NO_HITBOXES
+
+    def capture(self, move):
+        self.hitboxes = [box.copy() for box in move.hitboxes] if move.hitboxes else engine.NO_HITBOXES
+
+class FighterFrame:
+    __slots__ = ("rect", "color", "respawn_timer", "respawn_invincibility", "facing_right", "shielding", "shield_health",
+                 "shield_broken", "current_move", "move", "damage", "stocks", "slot")
+    draw = engine.Character.draw
+
+    def __init__(self):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.move = MoveFrame()
+        self.current_move = None
+
+    def capture(self, fighter):
+        self.rect.update(fighter.rect)
+        self.color = fighter.color
+        self.respawn_timer = fighter.respawn_timer
+        self.respawn_invincibility = fighter.respawn_invincibility
+        self.facing_right = fighter.facing_right
+        self.shielding = fighter.shielding
+        self.shield_health = fighter.shield_health
+        self.shield_broken = fighter.shield_broken
+        self.damage = fighter.damage
+        self.stocks = fighter.stocks
+        self.slot = fighter.slot
+        if fighter.current_move is not None:
+            self.move.capture(fighter.current_move)
+            self.current_move = self.move
+        else:
+            self.current_move = None
+
+class ProjectileFrame:
+    __slots__ = ("count", "specs", "spec", "x", "y", "half_w", "half_h")
+    draw = ProjectilePool.draw
+
+    def __init__(self, capacity):
+        self.count = 0
+        self.specs = ()
+        for name in ("spec", "x", "y", "half_w", "half_h"):
+            setattr(self, name, np.zeros(capacity, dtype=np.int16 if name == "spec" else float))
+
+    def capture(self, pool):
+        n = self.count = pool.count
+        self.specs = tuple(pool.specs)
+        for name in ("spec", "x", "y", "half_w", "half_h"):
+            getattr(self, name)[:n] = getattr(pool, name)[:n]
+
+class ComboFrame:
+    __slots__ = ("combo", "stats")
+    live_combo = combos.ComboTracker.live_combo
+
+    def __init__(self):
+        self.combo = []
+        self.stats = ()
+
+    def capture(self, tracker, game_over):
+        self.combo[:] = tracker.combo
+        # The totals only show on the game over screen, and stop changing once the match has ended
+        self.stats = tracker.stats if game_over else ()
+
+class FrameState:
+    """An immutable-while-drawn copy of one simulated frame"""
+
+    draw = engine.GameState.draw
+    draw_ui = engine.GameState.draw_ui
+    draw_cached_ui = engine.GameState.draw_cached_ui
+    draw_combos = engine.GameState.draw_combos
+    draw_ko_percents = engine.GameState.draw_ko_percents
+    draw_game_over = engine.GameState.draw_game_over
+
+    def __init__(self, capacity):
+        self.stage = None
+        self.player = FighterFrame()
+        self.ai = FighterFrame()
+        self.projectiles = ProjectileFrame(capacity)
+        self.combo_frame = ComboFrame()
+        self.combos = None
+        self.ko_table = None
+        self.hud = None
+        self.hud_frame = 0
+        self.render_scale = 1.0
+
+    def capture(self, game_state):
+        self.stage = game_state.stage
+        self.player.capture(game_state.player)
+        self.ai.capture(game_state.ai)
+        self.projectiles.capture(game_state.projectiles)
+        self.game_timer = game_state.game_timer
+        self.game_time_limit = game_state.game_time_limit
+        self.game_over = game_state.game_over
+        self.winner = game_state.winner
+        self.ko_table = game_state.ko_table
+        self.current_stage_name = game_state.current_stage_name
+        self.player_character = game_state.player_character
+        self.ai_character = game_state.ai_character
+        self.draw_hitboxes = game_state.draw_hitboxes
+        self.hud_interval = game_state.hud_interval
+        if game_state.combos is not None:
+            self.combo_frame.capture(game_state.combos, game_state.game_over)
+            self.combos = self.combo_frame
+        else:
+            self.combos = None
+
+class RenderPipeline:
+    """Draws frame N on a render thread while the game loop simulates frame N+1
+
+    submit() is called on the game loop thread after each simulated frame.
+    It copies the frame into the back FrameState, and if the render thread
+    has finished the previous one it flips that to the window, swaps the two
+    copies and wakes the render thread. The swap is two reference
+    assignments and the busy flag; each is written by one side only, so no
+    lock guards the frames and neither thread ever waits for the other. A
+    frame that is still being drawn when the next one is ready is not
+    waited for: the newer copy simply replaces it, so the picture is at
+    most one frame behind the simulation. Drawing and upscaling happen on
+    the render thread; pygame releases the GIL in blits, fills and scaling,
+    so on a multi-core machine they overlap with the simulation.
+    """
+
+    def __init__(self, presenter, capacity=None):
+        capacity = capacity or ProjectilePool().capacity
+        self.presenter = presenter
+        self.front = FrameState(capacity)
+        self.back = FrameState(capacity)
+        self.busy = False
+        self.drawn = False
+        self.running = False
+        self.wake = threading.Semaphore(0)
+        self.thread = None
+        self.hud = None
+        self.hud_frame = 0
+        self.render_scale = presenter.render_scale
+        self.frames = 0
+        self.dropped = 0
+        self.render_seconds = 0.0   # the last frame's draw and upscale time on the render thread
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="render", daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        presenter = self.presenter
+        while True:
+            self.wake.acquire()
+            if not self.running:
+                return
+            start = time.perf_counter()
+            frame = self.front
+            # The HUD cache belongs to the pipeline, not to whichever copy is being drawn
+            frame.hud, frame.hud_frame = self.hud, self.hud_frame
+            presenter.set_render_scale(frame.render_scale)
+            frame.draw(presenter.surface)
+            presenter.upscale()
+            self.hud, self.hud_frame = frame.hud, frame.hud_frame
+            self.render_seconds = time.perf_counter() - start
+            self.drawn = True
+            self.busy = False
+
+    def submit(self, game_state):
+        """Hand over the frame just simulated; returns True if a finished frame reached the window"""
+        back = self.back
+        back.capture(game_state)
+        back.render_scale = self.render_scale
+        if self.busy:
+            self.dropped += 1
+            return False
+        flipped = self.drawn
+        if flipped:
+            self.presenter.flip()
+            self.frames += 1
+            self.drawn = False
+        self.back, self.front = self.front, back
+        self.busy = True
+        self.wake.release()
+        return flipped
+
+    def finish(self):
+        """Wait for the render thread to go idle, before drawing on the main thread (e.g. the pause screen)"""
+        while self.busy:
+            time.sleep(0.0005)
+        self.drawn = False
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.finish()
+        self.running = False
+        self.wake.release()
+        self.thread.join()
+        self.thread = None
+
+async def _paced(play, presenter, pipeline, frames):
+    from ultra4k import pacing
+    # Spinning to the deadline would hold the GIL the render thread needs, so the pipeline paces by sleeping alone
+    pacer = pacing.FramePacer(engine.FPS, power_save=pipeline is not None or pacing.POWER_SAVE)
+    for _ in range(frames):
+        play.step()
+        if pipeline is None:
+            play.game_state.draw(presenter.surface)
+            presenter.present()
+        else:
+            pipeline.submit(play.game_state)
+        await pacer.wait()
+
+def benchmark(frames=180, display_size=(1920, 1080), overdraw=(0, 32, 64, 96, 128, 192)):
+    """Frames reaching the window per second at 60 FPS pacing, serial versus pipelined, as full-screen overdraw grows"""
+    import asyncio
+
+    from ultra4k import presenter as presenting
+    from ultra4k import profiling
+    from ultra4k import startup
+
+    startup.init_pygame()
+    presenter = presenting.Presenter((engine.SCREEN_WIDTH, engine.SCREEN_HEIGHT), display_size)
+    layer = pygame.Surface(presenter.logical_size, pygame.SRCALPHA)
+    layer.fill((255, 255, 255, 8))
+    original_draw = engine.Stage.draw
+    results = {}
+    for blits in overdraw:
+        def heavy_draw(stage, screen):
+            original_draw(stage, screen)
+            for _ in range(blits):
+                screen.blit(layer, (0, 0))
+        engine.Stage.draw = heavy_draw
+        row = {}
+        for mode in ("serial", "pipelined"):
+            play = profiling.SelfPlay(0)
+            for fighter in play.game_state.fighters:
+                fighter.stocks = 99
+            pipeline = RenderPipeline(presenter).start() if mode == "pipelined" else None
+            start = time.perf_counter()
+            asyncio.run(_paced(play, presenter, pipeline, frames))
+            elapsed = time.perf_counter() - start
+            if pipeline is None:
+                row[mode] = frames / elapsed
+            else:
+                pipeline.close()
+                row[mode] = pipeline.frames / elapsed
+                row['render_ms'] = pipeline.render_seconds * 1000
+        results[blits] = row
+    engine.Stage.draw = original_draw
+    pygame.quit()
+    return results
+
+if __name__ == "__main__":
+    import os
+    print(f"{os.cpu_count()} CPUs; frames reaching the window per second at a 60 FPS target")
+    for blits, row in benchmark().items():
+        print(f"{blits:3d} overdraw blits ({row['render_ms']:.1f} ms to draw): serial {row['serial']:.1f}, pipelined {row['pipelined']:.1f}")
@@ -0,0 +1,114 @@
+import time
+
+import pygame
+
+MAX_DISPLAY_SIZE = (3840, 2160)
+LETTERBOX_COLOR = (0, 0, 0)
+on_first_frame = None  # Called once, after the first frame of the process reaches the window
+
+class Presenter:
+    """Draw at a fixed logical resolution and scale to the window in integer steps with letterboxing
+
+    Games draw into presenter.surface and call present() once per frame. When the
+    window matches the logical size the surface is the window itself and present()
+    is a plain flip; otherwise a single transform.scale writes straight into the
+    viewport of the window, so scaling is the only resolution-dependent cost.
+    """
+
+    def __init__(self, logical_size, display_size=None, flags=0):
+        self.logical_size = tuple(logical_size)
+        if display_size is None:
+            display_size = self.logical_size
+        display_size = (min(display_size[0], MAX_DISPLAY_SIZE[0]), min(display_size[1], MAX_DISPLAY_SIZE[1]))
+        self.display = pygame.display.set_mode(display_size, flags)
+        logical_w, logical_h = self.logical_size
+        scale = min(display_size[0] // logical_w, display_size[1] // logical_h)
+        if scale < 1:
+            scale = min(display_size[0] / logical_w, display_size[1] / logical_h)
+        self.full_scale = scale
+        self._layout(scale)
+        if self.viewport.size == display_size == self.logical_size:
+            self.surface = self.display
+            self.target = None
+        else:
+            self.display.fill(LETTERBOX_COLOR)
+            self.surface = pygame.Surface(self.logical_size).convert(self.display)
+            self.target = self.display.subsurface(self.viewport)
+        self.render_scale = 1.0
+        self.frames = 0
+        self.scale_time = 0.0
+
+    def _layout(self, scale):
+        self.scale = scale
+        size = (int(self.logical_size[0] * scale), int(self.logical_size[1] * scale))
+        display_w, display_h = self.display.get_size()
+        self.viewport = pygame.Rect(((display_w - size[0]) // 2, (display_h - size[1]) // 2), size)
+
+    def set_render_scale(self, fraction):
+        """Present into a viewport this fraction of the full size, letterboxed, to cut the scaling cost"""
+        if self.target is None or fraction == self.render_scale:
+            return
+        self.render_scale = fraction
+        scale = self.full_scale * fraction
+        if isinstance(self.full_scale, int):
+            scale = max(1, int(scale))
+        self._layout(scale)
+        self.display.fill(LETTERBOX_COLOR)
+        self.target = self.display.subsurface(self.viewport)
+
+    def present(self):
+        """Scale the logical frame into the window viewport and flip"""
+        self.upscale()
+        self.flip()
+
+    def upscale(self):
+        """The drawing half of present(): scale the logical frame into the window viewport"""
+        if self.target is not None:
+            start = time.perf_counter()
+            pygame.transform.scale(self.surface, self.viewport.size, self.target)
+            self.scale_time += time.perf_counter() - start
+            self.frames += 1
+
+    def flip(self):
+        """The display half of present(); must run on the thread that created the window"""
+        pygame.display.flip()
+        global on_first_frame
+        if on_first_frame is not None:
+            callback, on_first_frame = on_first_frame, None
+            callback()
+
+    def to_logical(self, pos):
+        """Map a window position (e.g. the mouse) back to logical coordinates"""
+        return (int((pos[0] - self.viewport.x) / self.scale), int((pos[1] - self.viewport.y) / self.scale))
+
+def benchmark(display_sizes=((600, 400), (1920, 1080), (3840, 2160)), frames=300):
+    """Time simulate+draw+present of an EMUSMASH4K match at each display size"""
+    from ultra4k import engine as game
+    from ultra4k import startup
+
+    startup.init_pygame()
+    results = {}
+    for display_size in display_sizes:
+        presenter = Presenter((game.SCREEN_WIDTH, game.SCREEN_HEIGHT), display_size)
+        game_state = game.GameState()
+        game_state.reset()
+        start = time.perf_counter()
+        for _ in range(frames):
+            game_state.update()
+            game_state.draw(presenter.surface)
+            presenter.present()
+        elapsed = time.perf_counter() - start
+        results[display_size] = {
+            'scale': presenter.scale,
+            'frame_ms': elapsed / frames * 1000,
+            'scale_ms': presenter.scale_time / frames * 1000,
+        }
+    pygame.quit()
+    return results
+
+if __name__ == "__main__":
+    results = benchmark()
+    native = results[(600, 400)]['frame_ms']
+    for size, result in results.items():
+        print(f"{size[0]}x{size[1]} (x{result['scale']}): {result['frame_ms']:.2f} ms/frame, "
+              f"{result['scale_ms']:.2f} ms scaling, {result['frame_ms'] / native:.2f}x native 600x400")
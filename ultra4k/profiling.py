@@ -0,0 +1,143 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+from ultra4k import engine
+
+WARMUP_FRAMES = 600
+MEASURE_FRAMES = 3600
+MATCH_FRAMES = 8 * 60 * 60
+RETAINED_BUDGET = 4096        # bytes kept after MEASURE_FRAMES steady-state frames (NumPy caches small freed buffers)
+# Bytes alive at once inside a single frame. The worst frame is ProjectilePool.update(): ~7.5 KB of NumPy
+# temporaries, nearly all array headers, plus ~26 B per live projectile, and two fighters keep at most ~8
+# lasers alive. 12 KiB leaves room for that, while one accidental full-capacity temporary (8 KiB) still fails
+TRANSIENT_BUDGET = 12288
+
+class SelfPlay:
+    """Headless CPU-vs-CPU match that steps the simulation exactly like update_loop
+
+    ai_params are the MeleeAI params of both CPUs, or of the ai_character's
+    alone when player_params are given for the player_character's.
+    """
+
+    def __init__(self, seed=0, player_character="fox", ai_character="falco", stage="battlefield", ai_params=None, character_class=None,
+                 player_params=None):
+        engine.random.seed(seed)
+        self.game_state = engine.GameState()
+        if character_class is not None:
+            self.game_state.character_class = character_class
+        self.game_state.player_character = player_character
+        self.game_state.ai_character = ai_character
+        self.game_state.current_stage_name = stage
+        self.game_state.reset()
+        self.game_state.player.is_cpu = True
+        self.player_model = engine.train_simple_ai_model(ai_params if player_params is None else player_params)
+        self.ai_model = engine.train_simple_ai_model(ai_params)
+        self.player_view = {'player': self.game_state.ai, 'ai': self.game_state.player, 'stage': stage}
+        self.matches = 0
+
+    def step(self):
+        """Advance one frame; returns True when it had to start a new match first"""
+        game_state = self.game_state
+        new_match = game_state.game_over
+        if new_match:
+            game_state.reset()
+            game_state.player.is_cpu = True
+            self.player_view['player'] = game_state.ai
+            self.player_view['ai'] = game_state.player
+            self.matches += 1
+        engine.apply_ai_actions(game_state.player, self.player_model.predict(self.player_view))
+        engine.apply_ai_actions(game_state.ai, self.ai_model.predict(game_state.ai_view))
+        game_state.update()
+        return new_match
+
+    def play_match(self):
+        """Step until the current match ends; returns (winner, frames)"""
+        game_state = self.game_state
+        while not game_state.game_over:
+            self.step()
+        return game_state.winner, game_state.game_timer
+
+class GCPauses:
+    """Collects collector pause times per generation through gc.callbacks"""
+
+    def __init__(self):
+        self.pauses = {0: [], 1: [], 2: []}
+        self.started = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pauses[info['generation']].append(time.perf_counter() - self.started)
+            self.started = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+    def report(self, frames):
+        lines = []
+        for generation, pauses in self.pauses.items():
+            if not pauses:
+                lines.append(f"  gen{generation}: 0 collections")
+                continue
+            pauses = sorted(pauses)
+            p99 = pauses[min(len(pauses) - 1, int(len(pauses) * 0.99))]
+            lines.append(f"  gen{generation}: {len(pauses)} collections ({len(pauses) * 3600 / frames:.1f}/min), "
+                         f"total {sum(pauses) * 1000:.2f} ms, p99 {p99 * 1000:.3f} ms, max {pauses[-1] * 1000:.3f} ms")
+        return "\n".join(lines)
+
+def measure_allocations(frames=MEASURE_FRAMES, warmup=WARMUP_FRAMES, seed=0):
+    """Return (retained bytes, worst per-frame transient bytes, worst frame's top allocation sites)
+
+    Warmup lets every projectile spec and the AI state fill in; after that a
+    simulation step should leave nothing behind and only hold short-lived floats,
+    tuples and NumPy temporaries while it runs. Frames that start a new match are
+    left out of both figures since reset() builds fresh fighters by design.
+    """
+    play = SelfPlay(seed)
+    for _ in range(warmup):
+        play.step()
+    tracemalloc.start(5)
+    before = tracemalloc.take_snapshot()
+    retained = worst = 0
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        if not play.step():
+            current, peak = tracemalloc.get_traced_memory()
+            retained += current - start
+            worst = max(worst, peak - start)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    growth = [stat for stat in after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno') if stat.size_diff > 0]
+    return retained, worst, growth[:5]
+
+def measure_gc(frames=MATCH_FRAMES, seed=0):
+    """Run a full-length headless match and return the collector pause recorder"""
+    play = SelfPlay(seed)
+    gc.collect()
+    with GCPauses() as pauses:
+        start = time.perf_counter()
+        for _ in range(frames):
+            play.step()
+        elapsed = time.perf_counter() - start
+    return pauses, elapsed
+
+if __name__ == "__main__":
+    retained, transient, growth = measure_allocations()
+    print(f"{MEASURE_FRAMES} steady-state frames: {retained} bytes retained (budget {RETAINED_BUDGET}), "
+          f"worst frame {transient} bytes transient (budget {TRANSIENT_BUDGET})")
+    for stat in growth:
+        print(f"  {stat}")
+    pauses, elapsed = measure_gc()
+    print(f"{MATCH_FRAMES} frame match simulated in {elapsed:.1f} s ({elapsed * 1000 / MATCH_FRAMES:.3f} ms/frame), collector pauses:")
+    print(pauses.report(MATCH_FRAMES))
+    if retained > RETAINED_BUDGET or transient > TRANSIENT_BUDGET:
+        sys.exit("allocation budget exceeded")
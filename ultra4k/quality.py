@@ -0,0 +1,123 @@
+import collections
+
+FRAME_BUDGET = 1.0 / 60
+WINDOW = 60          # frames in the rolling window the governor judges
+STEP_DOWN = 1.0      # shed a level when the window's 90th percentile work time exceeds this share of the budget
+STEP_UP = 0.6        # restore a level once the 90th percentile stays under this share ...
+UP_HOLD = 180        # ... for this many frames in a row
+SETTLE = 30          # frames ignored after a change so the window reflects the new level
+
+# Quality levels, best first; each one sheds one more kind of purely visual work, in this order:
+# particle spawn rate and cap, hitbox drawing in Move.draw(), HUD redraw frequency, render scale
+LEVELS = (
+    {'particle_rate': 1.0, 'particle_cap': 400, 'draw_hitboxes': True, 'hud_interval': 1, 'render_scale': 1.0},
+    {'particle_rate': 0.5, 'particle_cap': 150, 'draw_hitboxes': True, 'hud_interval': 1, 'render_scale': 1.0},
+    {'particle_rate': 0.25, 'particle_cap': 50, 'draw_hitboxes': True, 'hud_interval': 1, 'render_scale': 1.0},
+    {'particle_rate': 0.25, 'particle_cap': 50, 'draw_hitboxes': False, 'hud_interval': 1, 'render_scale': 1.0},
+    {'particle_rate': 0.25, 'particle_cap': 50, 'draw_hitboxes': False, 'hud_interval': 6, 'render_scale': 1.0},
+    {'particle_rate': 0.25, 'particle_cap': 50, 'draw_hitboxes': False, 'hud_interval': 6, 'render_scale': 0.5},
+)
+
+class QualityGovernor:
+    """Steps visual quality down under frame-budget pressure and back up, with hysteresis, when headroom returns
+
+    Feed it each frame's work time (everything but the sleep until the next
+    tick) and read the current level's knobs from settings. Only drawing
+    consults the knobs, so the simulation is the same at every level.
+    """
+
+    def __init__(self, budget=FRAME_BUDGET, levels=LEVELS):
+        self.budget = budget
+        self.levels = levels
+        self.level = 0
+        self.settings = levels[0]
+        self.samples = collections.deque(maxlen=WINDOW)
+        self.settle = 0
+        self.calm = 0
+        self.changes = 0
+
+    def frame(self, seconds):
+        """Record one frame; returns True when the level changed and the knobs must be re-applied"""
+        self.samples.append(seconds)
+        if self.settle > 0:
+            self.settle -= 1
+            return False
+        if len(self.samples) < WINDOW:
+            return False
+        p90 = sorted(self.samples)[WINDOW * 9 // 10]
+        if p90 > self.budget * STEP_DOWN:
+            self.calm = 0
+            return self._set(self.level + 1)
+        if p90 < self.budget * STEP_UP:
+            self.calm += 1
+            if self.calm >= UP_HOLD:
+                self.calm = 0
+                return self._set(self.level - 1)
+        else:
+            self.calm = 0
+        return False
+
+    def _set(self, level):
+        level = min(max(level, 0), len(self.levels) - 1)
+        if level == self.level:
+            return False
+        self.level = level
+        self.settings = self.levels[level]
+        self.samples.clear()
+        self.settle = SETTLE
+        self.changes += 1
+        return True
+
+def check_identical(frames=3000, seed=0):
+    """Run EMUSMASH4K and UltraMelee headless at every quality level; returns True if each level simulates the same match"""
+    import hashlib
+    import random
+
+    import pygame
+
+    from ultra4k import fixedpoint
+    from ultra4k import profiling
+    from ultra4k import startup
+    from ultra4k.modes import ultramelee
+
+    startup.init_pygame()
+    screen = pygame.display.set_mode((ultramelee.SCREEN_WIDTH, ultramelee.SCREEN_HEIGHT))
+    results = {}
+    for level, settings in enumerate(LEVELS):
+        play = profiling.SelfPlay(seed)
+        game_state = play.game_state
+        game_state.draw_hitboxes = settings['draw_hitboxes']
+        game_state.hud_interval = settings['hud_interval']
+        digest = hashlib.sha1()
+        for _ in range(frames):
+            play.step()
+            game_state.draw(screen)
+            digest.update(fixedpoint.checksum(game_state).to_bytes(4, "little"))
+        governor = QualityGovernor()
+        governor.settings = settings
+        ultramelee.governor = governor
+        random.seed(seed)
+        game = ultramelee.Game()
+        for frame in range(frames):
+            # Scripted inputs: both fighters run, jump and attack on a fixed rhythm
+            fighter, other = game.characters[frame // 120 % 2], game.characters[1 - frame // 120 % 2]
+            fighter.move_left() if frame % 240 < 120 else fighter.move_right()
+            if frame % 45 == 0:
+                fighter.jump()
+            if frame % 7 == 0:
+                fighter.attack(other, game.particles)
+            game.update()
+            game.draw(screen)
+            for c in game.characters:
+                digest.update(repr((c.x, c.y, c.velocity_x, c.velocity_y, c.damage, c.lives)).encode())
+            digest.update(repr([(type(item).__name__, item.x, item.y) for item in game.items]).encode())
+        ultramelee.governor = None
+        results[level] = digest.hexdigest()
+    pygame.quit()
+    return len(set(results.values())) == 1, results
+
+if __name__ == "__main__":
+    same, results = check_identical()
+    for level, digest in results.items():
+        print(f"level {level}: {digest[:16]}")
+    print("simulation identical at every level" if same else "SIMULATION DIFFERS BETWEEN LEVELS")
@@ -0,0 +1,420 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pygame
+
+from ultra4k import engine
+
+CACHE_PATH = "reachability.npz"
+GRAPH_VERSION = 1  # Bump when the arc simulation changes
+FIGHTER_WIDTH = 40
+FIGHTER_HEIGHT = 50
+BUCKET = 10            # px of platform per route start position
+RECOVERY_COLUMN = 10   # px of fighter left edge per recovery grid column; fighters never leave the screen
+RECOVERY_ROW = 20      # px of fighter top edge per recovery grid row, from the top blast zone down
+RECOVERY_VX = (-8, -4, 0, 4, 8)    # launch velocities a recovery can start from; lookups snap to the nearest
+RECOVERY_VY = (-8, -4, 0, 4, 8)
+SIM_FRAMES = 240
+
+# An input program, frame-numbered from when it starts: hold drift (-1, 0, 1) and press jump on
+# the first_jump and second_jump frames and up-b on the upb frame (-1 = never). Programs with
+# up-b always drift, since up-b goes the way the fighter faces.
+FIRST_JUMPS = (-1, 0)
+SECOND_JUMPS = (-1, 0, 6, 12, 18, 24)
+UPB_FRAMES = (-1, 10, 20, 30, 40)
+PROGRAMS = tuple((drift, first, second, upb)
+                 for drift in (-1, 0, 1) for first in FIRST_JUMPS for second in SECOND_JUMPS for upb in UPB_FRAMES
+                 if not (upb >= 0 and drift == 0))
+
+LANDED_NOWHERE = -1
+LANDED_KO = -2
+
+def _graph_key():
+    """Hash everything the arc simulation depends on so stale caches are rebuilt"""
+    physics = {name: getattr(engine, name) for name in (
+        "GRAVITY", "AIR_FRICTION", "GROUND_FRICTION", "AI_SPEED", "LEDGE_GRAB_RANGE", "SCREEN_WIDTH")}
+    grid = [BUCKET, RECOVERY_COLUMN, RECOVERY_ROW, RECOVERY_VX, RECOVERY_VY, SIM_FRAMES, PROGRAMS]
+    stats = {name: {k: s[k] for k in ("jump_height", "air_speed", "fall_speed", "dash_speed")} | {"upb": s["moves"]["upb"]}
+             for name, s in engine.CHARACTER_STATS.items()}
+    blob = json.dumps([stats, engine.STAGE_DATA, physics, GRAPH_VERSION, grid],
+                      sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def simulate_programs(stage, stats, x, y, on_ground, jumps_left, program, frames=SIM_FRAMES, vx=None, vy=None):
+    """Run many (start, input program) pairs at once; returns (platform landed on, frames taken)
+
+    Mirrors what apply_ai_actions() and Character.update() do to a fighter with
+    no hitstun: drift (ground walk or air acceleration), jump/double jump,
+    up-b's launch and its attack lag, gravity, friction, swept platform
+    collision, grabbing and dropping off the main platform's ledges, blast
+    zones and screen edges.
+    """
+    n = len(x)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    vx = np.zeros(n) if vx is None else vx.astype(np.float64)
+    vy = np.zeros(n) if vy is None else vy.astype(np.float64)
+    ledge = np.zeros(n, dtype=bool)
+    ledge_cooldown = np.zeros(n, dtype=np.int32)
+    on_ground = on_ground.copy()
+    jumps_left = jumps_left.astype(np.int32)
+    drift, first_jump, second_jump, upb = (program[:, i] for i in range(4))
+    facing = drift >= 0
+    attack_left = np.zeros(n, dtype=np.int32)
+    landed = np.full(n, LANDED_NOWHERE, dtype=np.int16)
+    taken = np.full(n, frames, dtype=np.int16)
+    live = np.ones(n, dtype=bool)
+    platforms = [p['rect'] for p in stage['platforms']]
+    main = next(i for i, p in enumerate(stage['platforms']) if p['type'] == 'main')
+    m_left, m_top, m_width, _ = platforms[main]
+    blast = stage['blast_zones']
+    fall_speed = stats['fall_speed']
+    jump_height = stats['jump_height']
+    air_cap = stats['dash_speed'] * 0.8
+    upb_lag = sum(stats['moves']['upb']['frame_data'].values())
+    for frame in range(frames):
+        # Inputs, in apply_ai_actions order: move, jump, special
+        attacking = attack_left > 0
+        walk = live & on_ground & ~attacking & (drift != 0)
+        x = np.where(walk, x + drift * engine.AI_SPEED, x)
+        air = live & ~on_ground & ~attacking
+        vx = np.where(air & (drift > 0), np.minimum(vx + stats['air_speed'], air_cap), vx)
+        vx = np.where(air & (drift < 0), np.maximum(vx - stats['air_speed'], -air_cap), vx)
+        facing = np.where(live & ~attacking & (drift != 0), drift > 0, facing)
+        press = live & ((first_jump == frame) | (second_jump == frame))
+        ground_jump = press & on_ground & ~attacking
+        air_jump = press & ~on_ground & (jumps_left > 0) & ~attacking
+        vy = np.where(ground_jump, jump_height, np.where(air_jump, jump_height * 0.8, vy))
+        jumps_left = np.where(ground_jump, 1, np.where(air_jump, jumps_left - 1, jumps_left))
+        on_ground = on_ground & ~ground_jump
+        up_b = live & (upb == frame)
+        vy = np.where(up_b, jump_height * 1.2, vy)
+        vx = np.where(up_b, np.where(facing, 5.0, -5.0), vx)
+        attack_left = np.where(up_b, upb_lag, attack_left)
+
+        # Character.update()
+        vy = np.where(on_ground, vy, np.minimum(vy + engine.GRAVITY * fall_speed, fall_speed * 10))
+        vx = vx * np.where(on_ground, 1 - engine.GROUND_FRICTION, 1 - engine.AIR_FRICTION)
+        bottom = y + FIGHTER_HEIGHT
+        safe_dy = np.where(vy == 0, 1, vy)
+        hit_t = np.full(n, np.inf)
+        hit_platform = np.full(n, -1, dtype=np.int16)
+        face = np.zeros(n, dtype=np.int8)
+        snap_y = y
+        for i, (p_left, p_top, p_width, p_height) in enumerate(platforms):
+            p_bottom = p_top + p_height
+            floor = (vy >= 0) & (bottom <= p_top) & (p_top <= bottom + vy)
+            ceiling = (vy < 0) & (y + vy <= p_bottom) & (p_bottom <= y)
+            t = np.where(floor, np.where(vy == 0, 0, (p_top - bottom) / safe_dy), (p_bottom - y) / safe_dy)
+            hit_x = x + vx * t
+            hit = (floor | ceiling) & (t < hit_t) & (hit_x < p_left + p_width) & (hit_x + FIGHTER_WIDTH > p_left)
+            hit_t = np.where(hit, t, hit_t)
+            hit_platform = np.where(hit & floor, i, np.where(hit, -1, hit_platform))
+            face = np.where(hit, np.where(floor, 1, 2), face)
+            snap_y = np.where(hit, np.where(floor, p_top - FIGHTER_HEIGHT, p_bottom), snap_y)
+        x = x + vx
+        y = np.where(face > 0, snap_y, y + vy)
+        vy = np.where(face > 0, 0, vy)
+        attack_left = np.maximum(attack_left - 1, 0)
+        was_airborne = ~on_ground
+        on_ground = face == 1
+        left = np.trunc(x)
+        top = np.trunc(y)
+        # A grab snaps to the ledge and restores a jump; the next frame's gravity drops the fighter off it again
+        grab = (~on_ground & ~ledge & (ledge_cooldown <= 0) & (vy > 0) &
+                (((np.abs(left + FIGHTER_WIDTH - m_left) < engine.LEDGE_GRAB_RANGE) & ~facing) |
+                 ((np.abs(left - (m_left + m_width)) < engine.LEDGE_GRAB_RANGE) & facing)) &
+                (np.abs(top + FIGHTER_HEIGHT - m_top) < engine.LEDGE_GRAB_RANGE))
+        x = np.where(grab, np.where(facing, m_left + m_width, m_left - FIGHTER_WIDTH), x)
+        y = np.where(grab, m_top - FIGHTER_HEIGHT, y)
+        vx = np.where(grab, 0, vx)
+        vy = np.where(grab, 0, vy)
+        ledge |= grab
+        release = ledge & (vy > 0)
+        ledge &= ~release
+        ledge_cooldown = np.where(release, 30, ledge_cooldown)
+        vy = np.where(release, 2, vy)
+        jumps_left = np.where(ledge & (jumps_left < 1), 1, jumps_left)
+        ledge_cooldown = np.maximum(ledge_cooldown - 1, 0)
+        ko = (x < blast['left']) | (x > blast['right']) | (y < blast['top']) | (y > blast['bottom'])
+        # Walking along a platform is not a landing; touching down after being airborne is
+        land = live & on_ground & was_airborne
+        for mask, where in ((land, hit_platform), (ko & live, LANDED_KO)):
+            landed = np.where(mask & (landed == LANDED_NOWHERE), where, landed)
+            taken = np.where(mask & (taken == frames), frame + 1, taken)
+        live &= landed == LANDED_NOWHERE
+        x = np.where(left < 0, 0, np.where(left + FIGHTER_WIDTH > engine.SCREEN_WIDTH, engine.SCREEN_WIDTH - FIGHTER_WIDTH, x))
+        vx = np.where((left < 0) & (vx < 0) | (left + FIGHTER_WIDTH > engine.SCREEN_WIDTH) & (vx > 0), 0, vx)
+        if not live.any():
+            break
+    return landed, taken
+
+def _program_array():
+    return np.array(PROGRAMS, dtype=np.int32)
+
+def platform_starts(stage):
+    """Fighter left edges for each route start bucket, as (platform, bucket, x) rows"""
+    starts = []
+    for p, platform in enumerate(stage['platforms']):
+        left, top, width, _ = platform['rect']
+        for b in range(-(-width // BUCKET)):
+            center = left + b * BUCKET + BUCKET / 2
+            starts.append((p, b, min(max(center - FIGHTER_WIDTH / 2, 0), engine.SCREEN_WIDTH - FIGHTER_WIDTH)))
+    return starts
+
+def recovery_cells(stage):
+    blast = stage['blast_zones']
+    columns = (engine.SCREEN_WIDTH - FIGHTER_WIDTH) // RECOVERY_COLUMN + 1
+    rows = int((blast['bottom'] - blast['top']) // RECOVERY_ROW) + 1
+    return columns, rows
+
+def build_graph(stage, stats):
+    """Route and recovery tables for one (stage, character)
+
+    routes[p, b, q] is the fastest program from bucket b of platform p that
+    lands on platform q (-1 if none) and route_frames the frames it takes.
+    recovery[col, row, vx, vy, jumps_left] is the fastest program that lands an
+    airborne fighter whose top-left corner is in that cell, moving at those
+    RECOVERY_VX/RECOVERY_VY velocities, back on the main platform. Only
+    columns beside the main platform are simulated.
+    """
+    programs = _program_array()
+    count = len(programs)
+    platforms = stage['platforms']
+    starts = platform_starts(stage)
+    buckets = max(b for _, b, _ in starts) + 1
+    x = np.repeat([s[2] for s in starts], count)
+    y = np.repeat([platforms[s[0]]['rect'][1] - FIGHTER_HEIGHT for s in starts], count).astype(np.float64)
+    landed, taken = simulate_programs(stage, stats, x, y, np.ones(len(x), dtype=bool), np.full(len(x), 2),
+                                      np.tile(programs, (len(starts), 1)))
+    landed = landed.reshape(len(starts), count)
+    taken = taken.reshape(len(starts), count)
+    routes = np.full((len(platforms), buckets, len(platforms)), -1, dtype=np.int16)
+    route_frames = np.zeros(routes.shape, dtype=np.int16)
+    for row, (p, b, _) in enumerate(starts):
+        for q in range(len(platforms)):
+            if q == p:
+                continue
+            reach = np.flatnonzero(landed[row] == q)
+            if len(reach):
+                best = reach[np.argmin(taken[row, reach])]
+                routes[p, b, q] = best
+                route_frames[p, b, q] = taken[row, best]
+
+    main = next(i for i, p in enumerate(platforms) if p['type'] == 'main')
+    m_left, _, m_width, _ = platforms[main]['rect']
+    blast = stage['blast_zones']
+    columns, rows = recovery_cells(stage)
+    shape = (columns, rows, len(RECOVERY_VX), len(RECOVERY_VY), 2)
+    recovery = np.full(shape, -1, dtype=np.int16)
+    cx, cy, bx, by, jumps = (axis.ravel() for axis in np.meshgrid(*(np.arange(size) for size in shape), indexing='ij'))
+    lefts = np.minimum((cx + 0.5) * RECOVERY_COLUMN, engine.SCREEN_WIDTH - FIGHTER_WIDTH)
+    cells = np.flatnonzero((lefts + FIGHTER_WIDTH < m_left) | (lefts > m_left + m_width))
+    if not len(cells):
+        return routes, route_frames, recovery
+    # In the air only second_jump matters (a double jump), so skip the first_jump variants
+    air = np.flatnonzero(programs[:, 1] < 0)
+    x = np.repeat(lefts[cells], len(air))
+    y = np.repeat(blast['top'] + (cy[cells] + 0.5) * RECOVERY_ROW, len(air))
+    vx = np.repeat(np.array(RECOVERY_VX)[bx[cells]], len(air))
+    vy = np.repeat(np.array(RECOVERY_VY)[by[cells]], len(air))
+    landed, taken = simulate_programs(stage, stats, x, y, np.zeros(len(x), dtype=bool), np.repeat(jumps[cells], len(air)),
+                                      np.tile(programs[air], (len(cells), 1)), vx=vx, vy=vy)
+    landed = landed.reshape(len(cells), len(air))
+    taken = np.where(landed == main, taken.reshape(len(cells), len(air)), np.iinfo(np.int16).max)
+    best = np.argmin(taken, axis=1)
+    found = taken[np.arange(len(cells)), best] < np.iinfo(np.int16).max
+    recovery.reshape(-1)[cells[found]] = air[best[found]]
+    return routes, route_frames, recovery
+
+def build_all():
+    """Tables for every (stage, character), keyed "stage/character/table" """
+    tables = {}
+    for stage_name, stage in engine.STAGE_DATA.items():
+        for character, stats in engine.CHARACTER_STATS.items():
+            routes, route_frames, recovery = build_graph(stage, stats)
+            tables[f"{stage_name}/{character}/routes"] = routes
+            tables[f"{stage_name}/{character}/route_frames"] = route_frames
+            tables[f"{stage_name}/{character}/recovery"] = recovery
+    return tables
+
+class ReachabilityGraph:
+    """O(1) route and recovery lookups for the AI, built once and cached on disk"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.programs = PROGRAMS
+        # Per stage, platforms by top edge so standing_on() is a dict hit plus an overlap check
+        self.tops = {}
+        self.mains = {}
+        for stage_name, stage in engine.STAGE_DATA.items():
+            tops = {}
+            for i, platform in enumerate(stage['platforms']):
+                left, top, width, _ = platform['rect']
+                tops.setdefault(top, []).append((left, left + width, i))
+            self.tops[stage_name] = tops
+            self.mains[stage_name] = next(pygame.Rect(p['rect']) for p in stage['platforms'] if p['type'] == 'main')
+
+    @classmethod
+    def load(cls, path=CACHE_PATH, build=True):
+        """Load the cached graph, rebuilding it when missing or out of date; with build=False return None instead"""
+        key = _graph_key()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if str(data['key']) == key:
+                    return cls({name: data[name] for name in data.files if name != 'key'})
+        if not build:
+            return None
+        tables = build_all()
+        # Written to a file of its own and renamed, so a build killed halfway (the game closing, say) never
+        # leaves a torn cache, and the game and the CPU worker building at once never share a temporary file
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                np.savez_compressed(f, key=key, **tables)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return cls(tables)
+
+    def main_platform(self, stage):
+        return self.mains[stage]
+
+    def standing_on(self, stage, fighter):
+        """Index of the platform a grounded fighter stands on, or -1"""
+        rect = fighter.rect
+        for left, right, i in self.tops[stage].get(rect.bottom, ()):
+            if rect.left < right and rect.right > left:
+                return i
+        return -1
+
+    def route(self, stage, character, platform, centerx, target):
+        """Fastest program from platform (standing with its center at centerx) to target, or None"""
+        stage_data = engine.STAGE_DATA[stage]
+        left = stage_data['platforms'][platform]['rect'][0]
+        routes = self.tables[f"{stage}/{character}/routes"]
+        bucket = min(max(int((centerx - left) // BUCKET), 0), routes.shape[1] - 1)
+        program = routes[platform, bucket, target]
+        return self.programs[program] if program >= 0 else None
+
+    def recovery(self, stage, character, left, top, vx, vy, jumps_left):
+        """Fastest program that lands an airborne fighter back on the main platform, or None"""
+        blast = engine.STAGE_DATA[stage]['blast_zones']
+        recovery = self.tables[f"{stage}/{character}/recovery"]
+        col = int(left // RECOVERY_COLUMN)
+        row = int((top - blast['top']) // RECOVERY_ROW)
+        if not (0 <= col < recovery.shape[0] and 0 <= row < recovery.shape[1]):
+            return None
+        program = recovery[col, row, _nearest(RECOVERY_VX, vx), _nearest(RECOVERY_VY, vy), min(jumps_left, 1)]
+        return self.programs[program] if program >= 0 else None
+
+def _build(path):
+    ReachabilityGraph.load(path)
+
+def _build_and_load(path, on_ready):
+    import multiprocessing
+    # A process of its own keeps the ~45 s build off the game loop's GIL; a daemonic
+    # process (the CPU worker) may not start children, and builds on this thread instead
+    if multiprocessing.current_process().daemon:
+        graph = ReachabilityGraph.load(path)
+    else:
+        process = multiprocessing.get_context("spawn").Process(target=_build, args=(path,), name="reachability-build", daemon=True)
+        process.start()
+        process.join()
+        graph = ReachabilityGraph.load(path, build=False)
+    if graph is not None:
+        on_ready(graph)
+
+def build_in_background(on_ready, path=CACHE_PATH):
+    """Build the cache without blocking and call on_ready(graph) once it is ready
+
+    `python -m ultra4k.reachability` builds it offline instead.
+    """
+    thread = threading.Thread(target=_build_and_load, args=(path, on_ready), name="reachability-build", daemon=True)
+    thread.start()
+    return thread
+
+def _nearest(bins, value):
+    step = bins[1] - bins[0]
+    return min(max(round((value - bins[0]) / step), 0), len(bins) - 1)
+
+def program_actions(program, frame, actions):
+    """Set the MeleeAI action flags for one frame of an input program"""
+    drift, first_jump, second_jump, upb = program
+    actions['move_left'] = drift < 0
+    actions['move_right'] = drift > 0
+    actions['jump'] = frame == first_jump or frame == second_jump
+    actions['upb'] = frame == upb
+    return actions
+
+def _replay(stage_name, character, program, x, y, on_ground, vx=0, vy=0, jumps_left=2):
+    """Run program on a real engine.Character; returns the platform it lands on, or -1"""
+    stage = engine.Stage(engine.DataLoader(stage_name, is_char=False).load_data())
+    fighter = engine.Character(engine.DataLoader(character).load_data())
+    fighter.position[0], fighter.position[1] = x, y
+    fighter.velocity[0], fighter.velocity[1] = vx, vy
+    fighter.rect.topleft = (int(x), int(y))
+    fighter.on_ground = on_ground
+    fighter.jumps_left = jumps_left
+    fighter.facing_right = program[0] >= 0
+    actions = dict.fromkeys(('move_left', 'move_right', 'jump', 'attack', 'shield', 'dash', 'special', 'upb'), False)
+    platforms = engine.STAGE_DATA[stage_name]['platforms']
+    for frame in range(SIM_FRAMES):
+        engine.apply_ai_actions(fighter, program_actions(program, frame, actions))
+        was_airborne = not fighter.on_ground
+        fighter.update(stage)
+        if fighter.stocks < 4:
+            return LANDED_KO
+        if fighter.on_ground and was_airborne:
+            return next(i for i, p in enumerate(platforms)
+                        if p['rect'][1] == fighter.rect.bottom and fighter.rect.left < p['rect'][0] + p['rect'][2] and fighter.rect.right > p['rect'][0])
+    return LANDED_NOWHERE
+
+def verify(samples=300, seed=0, graph=None):
+    """Replay random route and recovery entries of graph (the cached one by default) through the real engine; returns the disagreements"""
+    import random
+    rng = random.Random(seed)
+    graph = graph or ReachabilityGraph.load()
+    pairs = sorted({tuple(name.split("/")[:2]) for name in graph.tables})
+    mismatches = 0
+    for _ in range(samples):
+        stage_name, character = rng.choice(pairs)
+        stage_data = engine.STAGE_DATA[stage_name]
+        platform_index, bucket, x = rng.choice(platform_starts(stage_data))
+        routes = graph.tables[f"{stage_name}/{character}/routes"]
+        targets = [q for q in range(routes.shape[2]) if routes[platform_index, bucket, q] >= 0]
+        if targets:
+            target = rng.choice(targets)
+            program = PROGRAMS[routes[platform_index, bucket, target]]
+            y = stage_data['platforms'][platform_index]['rect'][1] - FIGHTER_HEIGHT
+            mismatches += _replay(stage_name, character, program, x, y, True) != target
+        recovery = graph.tables[f"{stage_name}/{character}/recovery"]
+        entries = np.flatnonzero(recovery >= 0)
+        if len(entries):
+            col, row, bx, by, jumps = np.unravel_index(rng.choice(entries), recovery.shape)
+            blast = stage_data['blast_zones']
+            program = PROGRAMS[recovery[col, row, bx, by, jumps]]
+            x = min((col + 0.5) * RECOVERY_COLUMN, engine.SCREEN_WIDTH - FIGHTER_WIDTH)
+            y = blast['top'] + (row + 0.5) * RECOVERY_ROW
+            main = next(i for i, p in enumerate(stage_data['platforms']) if p['type'] == 'main')
+            landed = _replay(stage_name, character, program, x, y, False, RECOVERY_VX[bx], RECOVERY_VY[by], int(jumps))
+            mismatches += landed != main
+    return mismatches
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    graph = ReachabilityGraph.load()
+    print(f"reachability graph ready in {time.perf_counter() - start:.2f}s")
+    for stage_name in engine.STAGE_DATA:
+        for character in engine.CHARACTER_STATS:
+            routes = graph.tables[f"{stage_name}/{character}/routes"]
+            recovery = graph.tables[f"{stage_name}/{character}/recovery"]
+            print(f"{stage_name} {character}: {np.mean(routes >= 0):.0%} of start/target pairs routable, "
+                  f"{np.count_nonzero(recovery >= 0)} recoverable airborne states")
+    print(f"{verify()} mismatches replaying routes and recoveries through the engine")
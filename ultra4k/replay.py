@@ -0,0 +1,449 @@
+import asyncio
+import bisect
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import pygame
+
+from ultra4k import engine
+from ultra4k import fixedpoint
+from ultra4k import pacing
+from ultra4k import savestate
+from ultra4k import startup
+from ultra4k.presenter import Presenter
+
+MAGIC = b"U4KRPLY1"
+VERSION = 2
+KEYFRAME_SECONDS = 5
+KEYFRAME_INTERVAL = KEYFRAME_SECONDS * engine.FPS
+CHECKPOINT_INTERVAL = 30  # frames between the in-memory snapshots that make stepping backwards cheap
+REPLAY_PATH = None        # Replay the viewer opens; defaults to the newest file in engine.REPLAY_DIR
+SPEEDS = (-8, -4, -2, -1, -0.5, -0.25, 0.25, 0.5, 1, 2, 4, 8)
+
+# File layout:
+#   header   MAGIC, version, JSON metadata (characters, stage, keyframe interval, physics)
+#   segments one zlib block per keyframe interval: the keyframe's length and the GameState at its
+#            first frame in the savestate layout, followed by that interval's frame records
+#   index    (first frame, offset, length) per segment
+#   trailer  index offset, segment count, frame count, MAGIC
+HEADER = struct.Struct("<8sHI")
+INDEX_ENTRY = struct.Struct("<IQI")
+TRAILER = struct.Struct("<QII8s")
+KEYFRAME = struct.Struct("<I")
+# A frame record is its input count and the state checksum after the frame, then the inputs:
+# (fighter slot << 4 | input kind, two arguments) in the order they were called
+FRAME = struct.Struct("<HI")
+INPUT = struct.Struct("<Bdd")
+
+# Character methods a frame's inputs are made of; the index is the input kind
+INPUT_METHODS = ("move", "jump", "perform_move", "shield", "dash", "set_di", "fastfall", "tech", "l_cancel")
+# MeleeAI also turns its fighter by setting facing_right directly; the change is recorded before the next input
+INPUT_FACE = len(INPUT_METHODS)
+MOVE_INDEX = {name: i for i, name in enumerate(engine.MOVE_NAMES)}
+# What reading a truncated or damaged replay raises, from the header through the last segment's frames
+DAMAGED = (OSError, ValueError, KeyError, IndexError, EOFError, struct.error, zlib.error)
+
+def capture(game_state):
+    """Everything a GameState needs to continue a match, in the save-state format: data only, never code"""
+    return savestate.dumps(game_state)
+
+def restore(game_state, keyframe):
+    """Put a GameState built for the same stage and characters back into a captured state"""
+    savestate.loads(game_state, keyframe)
+
+def apply_inputs(fighters, inputs):
+    """Call the recorded Character methods in their original order"""
+    for code, a, b in inputs:
+        fighter = fighters[code >> 4]
+        kind = code & 15
+        if kind == 0:
+            fighter.move(a, b)
+        elif kind == 1:
+            fighter.jump()
+        elif kind == 2:
+            fighter.perform_move(engine.MOVE_NAMES[int(a)])
+        elif kind == 3:
+            fighter.shield(bool(a))
+        elif kind == 4:
+            fighter.dash()
+        elif kind == 5:
+            fighter.set_di(a, b)
+        elif kind == 6:
+            fighter.fastfall()
+        elif kind == 7:
+            fighter.tech()
+        elif kind == 8:
+            fighter.l_cancel()
+        else:
+            fighter.facing_right = bool(a)
+
+class ReplayWriter:
+    """Records one match: inputs every frame, a full keyframe every KEYFRAME_INTERVAL frames
+
+    Inputs are captured by wrapping the fighters' input methods, so human keys,
+    MeleeAI and any other driver are recorded the same way. Call end_frame()
+    after every GameState.update() and close() when the match is over.
+    """
+
+    def __init__(self, path, game_state, interval=KEYFRAME_INTERVAL):
+        self.path = path
+        self.game_state = game_state
+        self.interval = interval
+        self.file = open(path, "wb")
+        meta = {
+            'stage': game_state.current_stage_name,
+            'player_character': game_state.player_character,
+            'ai_character': game_state.ai_character,
+            'interval': interval,
+            'fixed_point': issubclass(game_state.character_class, fixedpoint.FixedCharacter),
+            'fps': engine.FPS,
+            'recorded': time.time(),
+        }
+        blob = json.dumps(meta).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(blob)) + blob)
+        self.index = []
+        self.inputs = []
+        self.frames = bytearray()
+        self.keyframe = capture(game_state)
+        self.first_frame = game_state.game_timer
+        self.frame_count = 0
+        # The fighters wrapped here; a reset replaces game_state.fighters, and only these get unwrapped
+        self.fighters = tuple(game_state.fighters)
+        self.facing = [fighter.facing_right for fighter in self.fighters]
+        for fighter in self.fighters:
+            self._attach(fighter)
+
+    def _attach(self, fighter):
+        inputs = self.inputs
+        facing = self.facing
+        slot = fighter.slot
+
+        def turned():
+            # Called before every input: log a facing change made outside the input methods
+            if fighter.facing_right != facing[slot]:
+                inputs.append((slot << 4 | INPUT_FACE, float(fighter.facing_right), 0.0))
+
+        for kind, name in enumerate(INPUT_METHODS):
+            method = getattr(fighter, name)
+            if name == "perform_move":
+                def record(move_name, method=method, code=slot << 4 | kind):
+                    turned()
+                    inputs.append((code, MOVE_INDEX[move_name], 0.0))
+                    result = method(move_name)
+                    facing[slot] = fighter.facing_right
+                    return result
+            else:
+                def record(*args, method=method, code=slot << 4 | kind):
+                    turned()
+                    inputs.append((code, float(args[0]) if args else 0.0, float(args[1]) if len(args) > 1 else 0.0))
+                    result = method(*args)
+                    facing[slot] = fighter.facing_right
+                    return result
+            setattr(fighter, name, record)
+
+    def end_frame(self):
+        inputs = self.inputs
+        for fighter in self.fighters:
+            self.facing[fighter.slot] = fighter.facing_right
+        self.frames += FRAME.pack(len(inputs), fixedpoint.checksum(self.game_state))
+        for entry in inputs:
+            self.frames += INPUT.pack(*entry)
+        inputs.clear()
+        self.frame_count += 1
+        if self.game_state.game_timer % self.interval == 0:
+            self._flush()
+            self.keyframe = capture(self.game_state)
+            self.first_frame = self.game_state.game_timer
+
+    def _flush(self):
+        block = zlib.compress(KEYFRAME.pack(len(self.keyframe)) + self.keyframe + self.frames)
+        self.index.append((self.first_frame, self.file.tell(), len(block)))
+        self.file.write(block)
+        self.frames.clear()
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.frames or not self.index:
+            self._flush()
+        index_offset = self.file.tell()
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.write(TRAILER.pack(index_offset, len(self.index), self.frame_count, MAGIC))
+        self.file.close()
+        self.file = None
+        for fighter in self.fighters:
+            for name in INPUT_METHODS:
+                delattr(fighter, name)
+
+class Replay:
+    """A replay file opened for random access through its index footer"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path!r} is not a version {VERSION} Ultra4k replay")
+            self.meta = json.loads(f.read(size))
+            f.seek(-TRAILER.size, os.SEEK_END)
+            index_offset, segments, self.frame_count, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path!r} has no index footer; the recording was cut short")
+            f.seek(index_offset)
+            self.index = [INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size)) for _ in range(segments)]
+        self.first_frames = [entry[0] for entry in self.index]
+        self.interval = self.meta['interval']
+        self.cached = None
+
+    def segment_for(self, frame):
+        return max(bisect.bisect_right(self.first_frames, frame) - 1, 0)
+
+    def segment(self, i):
+        """(first frame, keyframe, [(checksum, inputs) per frame]) for segment i; the last one read is cached"""
+        if self.cached is not None and self.cached[0] == i:
+            return self.cached[1]
+        first_frame, offset, length = self.index[i]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            blob = zlib.decompress(f.read(length))
+        view = memoryview(blob)
+        size, = KEYFRAME.unpack_from(view, 0)
+        position = KEYFRAME.size + size
+        keyframe = bytes(view[KEYFRAME.size:position])
+        savestate.read_header(keyframe)
+        frames = []
+        while position < len(blob):
+            count, check = FRAME.unpack_from(view, position)
+            position += FRAME.size
+            frames.append((check, [INPUT.unpack_from(view, position + k * INPUT.size) for k in range(count)]))
+            position += count * INPUT.size
+        self.cached = (i, (first_frame, keyframe, frames))
+        return self.cached[1]
+
+class ReplayPlayer:
+    """Seekable playback of a Replay: restores the nearest snapshot and re-simulates from it
+
+    Keyframes bound a seek to KEYFRAME_INTERVAL frames of simulation. While
+    playing forward the player also keeps a snapshot every CHECKPOINT_INTERVAL
+    frames of the current segment, so stepping or scrubbing backwards only
+    re-simulates a handful of frames.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        meta = replay.meta
+        game_state = self.game_state = engine.GameState()
+        if meta['fixed_point']:
+            game_state.character_class = fixedpoint.FixedCharacter
+        game_state.current_stage_name = meta['stage']
+        game_state.player_character = meta['player_character']
+        game_state.ai_character = meta['ai_character']
+        game_state.reset()
+        self.frame = 0
+        self.segment = None
+        self.checkpoints = {}
+        self.position = 0.0
+        self.mismatches = 0
+        self.seek(0)
+
+    @property
+    def last_frame(self):
+        return self.replay.first_frames[0] + self.replay.frame_count
+
+    def _load(self, segment, frame):
+        """Restore the newest snapshot of segment at or before frame"""
+        first_frame, keyframe, _ = self.replay.segment(segment)
+        if segment != self.segment:
+            self.segment = segment
+            self.checkpoints = {first_frame: keyframe}
+        start = max(f for f in self.checkpoints if f <= frame)
+        restore(self.game_state, self.checkpoints[start])
+        self.frame = start
+
+    def _advance(self):
+        """Simulate one recorded frame"""
+        first_frame, _, frames = self.replay.segment(self.segment)
+        offset = self.frame - first_frame
+        if offset >= len(frames):
+            self.segment += 1
+            first_frame, keyframe, frames = self.replay.segment(self.segment)
+            self.checkpoints = {first_frame: keyframe}
+            offset = 0
+        check, inputs = frames[offset]
+        apply_inputs(self.game_state.fighters, inputs)
+        self.game_state.update()
+        self.frame += 1
+        if fixedpoint.checksum(self.game_state) != check:
+            self.mismatches += 1
+        if self.frame % CHECKPOINT_INTERVAL == 0 and self.frame not in self.checkpoints:
+            self.checkpoints[self.frame] = capture(self.game_state)
+
+    def seek(self, frame):
+        """Show the state after frame; at most KEYFRAME_INTERVAL frames are re-simulated"""
+        frame = min(max(int(frame), self.replay.first_frames[0]), self.last_frame)
+        segment = self.replay.segment_for(frame)
+        if segment != self.segment or frame < self.frame:
+            self._load(segment, frame)
+        elif frame - self.frame > CHECKPOINT_INTERVAL and any(self.frame < f <= frame for f in self.checkpoints):
+            self._load(segment, frame)
+        while self.frame < frame:
+            self._advance()
+        self.position = float(self.frame)
+        return self.frame
+
+    def step(self, frames=1):
+        return self.seek(self.frame + frames)
+
+    def scrub(self, speed):
+        """Move by speed frames (negative rewinds, fractions slow down); call once per displayed frame"""
+        self.position = min(max(self.position + speed, 0.0), float(self.last_frame))
+        position = self.position
+        self.seek(int(position))
+        self.position = position
+        return self.frame
+
+    def verify(self):
+        """Re-simulate the whole replay and return the number of frames whose checksum differs"""
+        self.seek(0)
+        self.mismatches = 0
+        while self.frame < self.last_frame:
+            self._advance()
+        return self.mismatches
+
+def record_match(path, seed=0, stocks=4, frames=None, interval=KEYFRAME_INTERVAL, stage="battlefield"):
+    """Record a headless CPU-vs-CPU match; returns (frames recorded, recording seconds)"""
+    from ultra4k import profiling
+    play = profiling.SelfPlay(seed, stage=stage)
+    for fighter in play.game_state.fighters:
+        fighter.stocks = stocks
+    writer = ReplayWriter(path, play.game_state, interval)
+    start = time.perf_counter()
+    limit = frames or play.game_state.game_time_limit
+    while not play.game_state.game_over and writer.frame_count < limit:
+        play.step()
+        writer.end_frame()
+    writer.close()
+    return writer.frame_count, time.perf_counter() - start
+
+def benchmark(path="benchmark_replay.u4r", seeks=200):
+    """Record a full-length match, then time random seeks, single steps back and a full verify"""
+    import random
+    frames, elapsed = record_match(path, stocks=99)
+    size = os.path.getsize(path)
+    player = ReplayPlayer(Replay(path))
+    rng = random.Random(0)
+    seek_times = []
+    for _ in range(seeks):
+        start = time.perf_counter()
+        player.seek(rng.randrange(frames))
+        seek_times.append(time.perf_counter() - start)
+    back_times = []
+    player.seek(frames * 7 // 8)
+    for _ in range(seeks):
+        start = time.perf_counter()
+        player.step(-1)
+        back_times.append(time.perf_counter() - start)
+    mismatches = player.verify()
+    os.remove(path)
+    seek_times.sort()
+    back_times.sort()
+    return {
+        'frames': frames, 'record_ms_per_frame': elapsed * 1000 / frames, 'bytes': size,
+        'seek_ms': (seek_times[len(seek_times) // 2] * 1000, seek_times[-1] * 1000),
+        'step_back_ms': (back_times[len(back_times) // 2] * 1000, back_times[-1] * 1000),
+        'mismatches': mismatches,
+    }
+
+# Viewer
+screen = None
+presenter = None
+pacer = None
+player = None
+speed_index = SPEEDS.index(1)
+playing = True
+
+def newest_replay():
+    directory = engine.REPLAY_DIR
+    if not directory or not os.path.isdir(directory):
+        return None
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".u4r")]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+def setup(path=None):
+    global screen, presenter, pacer, player
+    path = path or REPLAY_PATH or newest_replay()
+    if path is None:
+        raise FileNotFoundError("no replay to open; set replay.REPLAY_PATH or engine.REPLAY_DIR")
+    startup.init_pygame()
+    presenter = Presenter((engine.SCREEN_WIDTH, engine.SCREEN_HEIGHT), engine.DISPLAY_SIZE)
+    screen = presenter.surface
+    pygame.display.set_caption("Ultra4k Replay")
+    pacer = pacing.FramePacer(engine.FPS)
+    player = ReplayPlayer(Replay(path))
+
+def draw_overlay(screen):
+    font = engine.get_font(24)
+    seconds = player.frame // engine.FPS
+    total = player.last_frame // engine.FPS
+    speed = f"{SPEEDS[speed_index]:g}x" if playing else "paused"
+    text = font.render(f"{seconds // 60}:{seconds % 60:02d} / {total // 60}:{total % 60:02d}  frame {player.frame}  {speed}",
+                       True, (255, 255, 255))
+    screen.blit(text, (10, engine.SCREEN_HEIGHT - 30))
+    bar = pygame.Rect(10, engine.SCREEN_HEIGHT - 8, engine.SCREEN_WIDTH - 20, 4)
+    pygame.draw.rect(screen, (80, 80, 80), bar)
+    pygame.draw.rect(screen, (255, 255, 255), (bar.x, bar.y, bar.width * player.frame // max(player.last_frame, 1), bar.height))
+
+async def update_loop():
+    """SPACE plays/pauses, LEFT/RIGHT step a frame, UP/DOWN change speed (negative rewinds), 0-9 jump to tenths"""
+    global speed_index, playing
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            return False
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                playing = not playing
+            elif event.key == pygame.K_RIGHT:
+                playing = False
+                player.step(1)
+            elif event.key == pygame.K_LEFT:
+                playing = False
+                player.step(-1)
+            elif event.key == pygame.K_UP:
+                speed_index = min(speed_index + 1, len(SPEEDS) - 1)
+            elif event.key == pygame.K_DOWN:
+                speed_index = max(speed_index - 1, 0)
+            elif event.key == pygame.K_HOME:
+                player.seek(0)
+            elif event.key == pygame.K_END:
+                player.seek(player.last_frame)
+            elif pygame.K_0 <= event.key <= pygame.K_9:
+                player.seek(player.last_frame * (event.key - pygame.K_0) // 10)
+    if playing:
+        player.scrub(SPEEDS[speed_index])
+    player.game_state.draw(screen)
+    draw_overlay(screen)
+    presenter.present()
+    await pacer.wait()
+    return True
+
+async def main(path=None):
+    setup(path)
+    running = True
+    while running:
+        running = await update_loop()
+    pygame.quit()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        result = benchmark()
+        print(f"{result['frames']} frame match recorded at {result['record_ms_per_frame']:.3f} ms/frame into {result['bytes']} bytes")
+        print(f"random seek p50/max {result['seek_ms'][0]:.1f}/{result['seek_ms'][1]:.1f} ms, "
+              f"step back p50/max {result['step_back_ms'][0]:.2f}/{result['step_back_ms'][1]:.2f} ms, "
+              f"{result['mismatches']} checksum mismatches on a full re-simulation")
+    else:
+        asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
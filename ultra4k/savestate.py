@@ -0,0 +1,231 @@
+import os
+import struct
+import time
+
+from ultra4k import engine
+from ultra4k import fixedpoint
+
+SAVE_DIR = "savestates"
+SLOTS = 10
+MAGIC = b"U4KSAVE\x00"
+VERSION = 1
+
+# File layout, little-endian, every record at a fixed offset once the projectile count is known:
+#   header      MAGIC, version, fixed-point flag, stage and character names, timer, game over, winner, projectile count
+#   rng         the stage RNG's Mersenne Twister words and its cached gauss value
+#   fighters    FIGHTER per fighter, each followed by MOVE for every name in engine.MOVE_NAMES
+#   projectiles PROJECTILE per live projectile
+HEADER = struct.Struct("<8sHB16s16s16sIBBH")
+RNG = struct.Struct("<625IBd")
+FLOAT_FIELDS = ("damage", "shield_health")
+INT_FIELDS = ("stocks", "attack_timer", "attack_cooldown_timer", "jumps_left", "dash_timer", "shield_stun", "hitstun",
+              "tech_window", "tech_cooldown", "ledge_cooldown", "move_frame", "respawn_timer", "respawn_invincibility",
+              "shield_break_timer")
+FLAG_FIELDS = ("on_ground", "attacking", "facing_right", "shielding", "fastfalling", "ledge_grab", "l_canceling",
+               "shield_broken", "is_cpu")
+# position, velocity, di_direction, the float fields, rect, the int fields, the flags as a bitmask, then
+# slot, current move, last attacker slot and last move (NO_INDEX for none)
+FIGHTER = struct.Struct("<6d%dd4i%diH4B" % (len(FLOAT_FIELDS), len(INT_FIELDS)))
+MOVE = struct.Struct("<5iBB")  # current frame, hitbox, hitboxes active, hit targets as a slot bitmask
+PROJECTILE = struct.Struct("<6diBB")  # x, y, vx, vy, half width, half height, life, owner slot, move
+NO_INDEX = 255
+WINNERS = (None, "player", "ai")
+MOVE_INDEX = {name: i for i, name in enumerate(engine.MOVE_NAMES)}
+PROJECTILE_COLUMNS = ("x", "y", "vx", "vy", "half_w", "half_h")
+
+# Character attributes that come from the character data, are rebuilt from the saved ones,
+# or point at shared objects; everything else must be in FIGHTER or tests/test_savestate.py fails
+STATIC_FIELDS = frozenset(("width", "height", "character", "weight", "fall_speed", "jump_height", "air_speed",
+                           "dash_speed", "color", "moves", "fixed_width", "fixed_height", "fixed_gravity",
+                           "fixed_max_fall", "fixed_air_speed", "fixed_air_cap", "fixed_dash_speed", "fixed_jump",
+                           "fixed_double_jump"))
+DERIVED_FIELDS = frozenset(("fixed_position", "fixed_velocity", "fixed_damage", "fixed_shield", "published"))
+REFERENCE_FIELDS = frozenset(("events", "projectiles", "move_cache"))
+SAVED_FIELDS = frozenset(("position", "velocity", "di_direction", "rect", "slot", "current_move", "last_attacker",
+                          "last_move") + FLOAT_FIELDS + INT_FIELDS + FLAG_FIELDS)
+
+def _name(text):
+    return text.encode()[:16]
+
+def size_for(projectiles, fighters=2):
+    return HEADER.size + RNG.size + fighters * (FIGHTER.size + len(engine.MOVE_NAMES) * MOVE.size) + projectiles * PROJECTILE.size
+
+def pack_into(buffer, game_state):
+    """Write game_state into buffer (at least size_for() bytes); returns the number of bytes used"""
+    pool = game_state.projectiles
+    fighters = game_state.fighters
+    HEADER.pack_into(buffer, 0, MAGIC, VERSION, issubclass(game_state.character_class, fixedpoint.FixedCharacter),
+                     _name(game_state.current_stage_name), _name(game_state.player_character), _name(game_state.ai_character),
+                     game_state.game_timer, game_state.game_over, WINNERS.index(game_state.winner), pool.count)
+    offset = HEADER.size
+    _, words, gauss = game_state.stage.rng.getstate()
+    RNG.pack_into(buffer, offset, *words, gauss is not None, gauss or 0.0)
+    offset += RNG.size
+    for fighter in fighters:
+        flags = 0
+        for bit, name in enumerate(FLAG_FIELDS):
+            flags |= bool(getattr(fighter, name)) << bit
+        move = fighter.current_move
+        last = fighter.last_attacker
+        FIGHTER.pack_into(buffer, offset, *fighter.position, *fighter.velocity, *fighter.di_direction,
+                          *[getattr(fighter, name) for name in FLOAT_FIELDS], *fighter.rect,
+                          *[getattr(fighter, name) for name in INT_FIELDS], flags, fighter.slot,
+                          MOVE_INDEX[move.name] if move else NO_INDEX, last.slot if last else NO_INDEX,
+                          MOVE_INDEX[fighter.last_move] if fighter.last_move else NO_INDEX)
+        offset += FIGHTER.size
+        cache = fighter.move_cache
+        for name in engine.MOVE_NAMES:
+            move = cache.get(name)
+            if move is None:
+                MOVE.pack_into(buffer, offset, 0, 0, 0, 0, 0, 0, 0)
+            else:
+                targets = 0
+                for target in move.hit_targets:
+                    targets |= 1 << target.slot
+                MOVE.pack_into(buffer, offset, move.current_frame, *move.hitbox, move.hitboxes is not engine.NO_HITBOXES, targets)
+            offset += MOVE.size
+    x, y, vx, vy, half_w, half_h = (getattr(pool, name) for name in PROJECTILE_COLUMNS)
+    specs = pool.specs
+    for i in range(pool.count):
+        PROJECTILE.pack_into(buffer, offset, x[i], y[i], vx[i], vy[i], half_w[i], half_h[i], int(pool.life[i]),
+                             int(pool.owner[i]), MOVE_INDEX[specs[pool.spec[i]][0]])
+        offset += PROJECTILE.size
+    return offset
+
+def dumps(game_state):
+    buffer = bytearray(size_for(game_state.projectiles.count, len(game_state.fighters)))
+    pack_into(buffer, game_state)
+    return bytes(buffer)
+
+def read_header(data):
+    """(stage, player character, AI character, fixed point) of a saved state"""
+    magic, version, fixed, stage, player, ai, *_ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} Ultra4k save state")
+    return stage.rstrip(b"\0").decode(), player.rstrip(b"\0").decode(), ai.rstrip(b"\0").decode(), bool(fixed)
+
+def loads(game_state, data):
+    """Put game_state into the saved state, resetting it first only if the stage or characters differ"""
+    view = memoryview(data)
+    stage, player, ai, fixed = read_header(view)
+    character_class = fixedpoint.FixedCharacter if fixed else engine.Character
+    if (stage, player, ai, character_class) != (game_state.current_stage_name, game_state.player_character,
+                                                 game_state.ai_character, game_state.character_class) or not game_state.fighters:
+        game_state.current_stage_name, game_state.player_character, game_state.ai_character = stage, player, ai
+        game_state.character_class = character_class
+        game_state.reset()
+    *_, game_state.game_timer, game_over, winner, count = HEADER.unpack_from(view, 0)
+    game_state.game_over = bool(game_over)
+    game_state.winner = WINNERS[winner]
+    offset = HEADER.size
+    *words, has_gauss, gauss = RNG.unpack_from(view, offset)
+    game_state.stage.rng.setstate((3, tuple(words), gauss if has_gauss else None))
+    offset += RNG.size
+    fighters = game_state.fighters
+    for fighter in fighters:
+        values = FIGHTER.unpack_from(view, offset)
+        offset += FIGHTER.size
+        fighter.position[0], fighter.position[1], fighter.velocity[0], fighter.velocity[1] = values[0:4]
+        fighter.di_direction = [values[4], values[5]]
+        i = 6
+        for name in FLOAT_FIELDS:
+            setattr(fighter, name, values[i])
+            i += 1
+        fighter.rect.update(values[i:i + 4])
+        i += 4
+        for name in INT_FIELDS:
+            setattr(fighter, name, values[i])
+            i += 1
+        flags = values[i]
+        for bit, name in enumerate(FLAG_FIELDS):
+            setattr(fighter, name, bool(flags >> bit & 1))
+        fighter.slot, move, last, last_move = values[i + 1:i + 5]
+        fighter.current_move = fighter.move_cache[engine.MOVE_NAMES[move]] if move != NO_INDEX else None
+        fighter.last_attacker = fighters[last] if last != NO_INDEX else None
+        fighter.last_move = engine.MOVE_NAMES[last_move] if last_move != NO_INDEX else None
+        cache = fighter.move_cache
+        for name in engine.MOVE_NAMES:
+            move = cache.get(name)
+            if move is not None:
+                frame, left, top, width, height, active, targets = MOVE.unpack_from(view, offset)
+                move.current_frame = frame
+                move.hitbox.update(left, top, width, height)
+                move.hitboxes = move.active_hitboxes if active else engine.NO_HITBOXES
+                move.hit_targets.clear()
+                move.hit_targets.update(f for f in fighters if targets >> f.slot & 1)
+            offset += MOVE.size
+        if fixed:
+            fighter.published = None
+            fighter.pull()
+    pool = game_state.projectiles
+    columns = [getattr(pool, name) for name in PROJECTILE_COLUMNS]
+    for i in range(count):
+        *floats, life, owner, move = PROJECTILE.unpack_from(view, offset)
+        offset += PROJECTILE.size
+        for column, value in zip(columns, floats):
+            column[i] = value
+        pool.life[i] = life
+        pool.owner[i] = owner
+        # Spec ids depend on the order projectiles were first fired, so they are looked up again by move
+        shooter = fighters[owner].move_cache[engine.MOVE_NAMES[move]]
+        pool.spec[i] = pool.register((fighters[owner].character, shooter.name), shooter.name, shooter.damage, shooter.knockback,
+                                     shooter.cos_angle, shooter.sin_angle, shooter.projectile['color'])
+        shooter.spec = pool.spec[i]
+    pool.count = count
+    pool.max_half = max([pool.half_w[i] for i in range(count)] + [pool.half_h[i] for i in range(count)] + [0.0])
+
+# Slots
+def slot_path(slot, directory=None):
+    return os.path.join(directory or SAVE_DIR, f"slot-{slot}.u4s")
+
+def save(game_state, slot, directory=None):
+    """Write game_state to a slot; the file is replaced atomically so a crash never leaves half a save"""
+    path = slot_path(slot, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    buffer = bytearray(size_for(game_state.projectiles.count, len(game_state.fighters)))
+    size = pack_into(buffer, game_state)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(memoryview(buffer)[:size])
+    os.replace(temporary, path)
+
+def load(game_state, slot, directory=None):
+    """Restore a slot into game_state; returns False when the slot is empty"""
+    path = slot_path(slot, directory)
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as f:
+        loads(game_state, f.read())
+    return True
+
+def used_slots(directory=None):
+    return [slot for slot in range(SLOTS) if os.path.exists(slot_path(slot, directory))]
+
+def benchmark(rounds=2000, directory="benchmark_savestates"):
+    """Mean and worst save and load time through the slot files"""
+    import shutil
+    from ultra4k import profiling
+    play = profiling.SelfPlay(0)
+    for _ in range(900):
+        play.step()
+    game_state = play.game_state
+    save_times = []
+    load_times = []
+    for i in range(rounds):
+        slot = i % SLOTS
+        start = time.perf_counter()
+        save(game_state, slot, directory)
+        save_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        load(game_state, slot, directory)
+        load_times.append(time.perf_counter() - start)
+    size = os.path.getsize(slot_path(0, directory))
+    shutil.rmtree(directory, ignore_errors=True)
+    return {'bytes': size,
+            'save_ms': (sum(save_times) / rounds * 1000, max(save_times) * 1000),
+            'load_ms': (sum(load_times) / rounds * 1000, max(load_times) * 1000)}
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"{result['bytes']} byte slot file, save mean/max {result['save_ms'][0]:.3f}/{result['save_ms'][1]:.3f} ms, "
+          f"load mean/max {result['load_ms'][0]:.3f}/{result['load_ms'][1]:.3f} ms")
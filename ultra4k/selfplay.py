@@ -0,0 +1,148 @@
+import argparse
+import glob
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from ultra4k.modes import smash4k
+
+DATA_DIR = "selfplay_data"
+CHUNK_SIZE = 65536       # samples per chunk file; every chunk is full, so chunk i holds samples [i * CHUNK_SIZE, ...)
+BATCH_SIZE = 8192        # samples per training mini-batch
+GAME_FRAMES = 1800       # frames per self-play game (30 s at 60 FPS)
+FEATURES = 4             # len(smash4k.state_features(...))
+EXPLORATION = 0.1        # chance the teacher picks a random action, so the data covers its mistakes
+
+def play_game(rng, features, actions, start=0, frames=GAME_FRAMES):
+    """Play one headless smash4k game, writing each frame's (features, action) from row start on
+
+    The player wanders like a human holding a direction for a while; the CPU
+    chases with some exploration. Returns the number of rows written.
+    """
+    player = smash4k.Character({'position': [rng.uniform(0, smash4k.SCREEN_WIDTH - 50), 500], 'velocity': [0, 0], 'health': 100})
+    ai = smash4k.Character({'position': [rng.uniform(0, smash4k.SCREEN_WIDTH - 50), 500], 'velocity': [0, 0], 'health': 100})
+    frames = min(frames, len(actions) - start)
+    direction = hold = 0
+    for row in range(start, start + frames):
+        if hold <= 0:
+            direction = rng.choice((-1, 0, 1))
+            hold = rng.randint(10, 60)
+        hold -= 1
+        if not 0 <= player.position[0] + direction * smash4k.PLAYER_SPEED <= smash4k.SCREEN_WIDTH - 50:
+            direction = -direction
+        player.move(direction * smash4k.PLAYER_SPEED, 0)
+        features[row] = smash4k.state_features(player, ai)
+        action = rng.random() < 0.5 if rng.random() < EXPLORATION else player.position[0] > ai.position[0]
+        actions[row] = action
+        ai.move(smash4k.AI_SPEED if action else -smash4k.AI_SPEED, 0)
+    return frames
+
+def chunk_paths(directory, index):
+    return (os.path.join(directory, f"features_{index:05d}.npy"), os.path.join(directory, f"actions_{index:05d}.npy"))
+
+def generate_chunk(directory, index, chunk_size=CHUNK_SIZE):
+    """Fill chunk index with self-play samples; seeded by index so runs are reproducible"""
+    features_path, actions_path = chunk_paths(directory, index)
+    rng = random.Random(index)
+    features = np.lib.format.open_memmap(features_path + ".tmp", mode='w+', dtype=np.float32, shape=(chunk_size, FEATURES))
+    actions = np.lib.format.open_memmap(actions_path + ".tmp", mode='w+', dtype=np.uint8, shape=(chunk_size,))
+    row = 0
+    while row < chunk_size:
+        row += play_game(rng, features, actions, row)
+    features.flush()
+    actions.flush()
+    del features, actions
+    # Actions land last, so a chunk only counts once both files are complete
+    os.replace(features_path + ".tmp", features_path)
+    os.replace(actions_path + ".tmp", actions_path)
+    return index
+
+def generate(directory=DATA_DIR, samples=10 * CHUNK_SIZE, workers=None, chunk_size=CHUNK_SIZE):
+    """Produce at least samples rows across a worker pool; chunks already on disk are kept"""
+    os.makedirs(directory, exist_ok=True)
+    chunks = -(-samples // chunk_size)
+    todo = [i for i in range(chunks) if not os.path.exists(chunk_paths(directory, i)[1])]
+    with ProcessPoolExecutor(workers) as pool:
+        for _ in pool.map(generate_chunk, [directory] * len(todo), todo, [chunk_size] * len(todo)):
+            pass
+    return chunks
+
+def load_chunks(directory=DATA_DIR):
+    """Memory-map every complete chunk as (features, actions) pairs"""
+    chunks = []
+    for actions_path in sorted(glob.glob(os.path.join(directory, "actions_*.npy"))):
+        features_path = actions_path.replace("actions_", "features_")
+        chunks.append((np.load(features_path, mmap_mode='r'), np.load(actions_path, mmap_mode='r')))
+    return chunks
+
+def iter_batches(chunks, batch_size=BATCH_SIZE):
+    for features, actions in chunks:
+        for start in range(0, len(actions), batch_size):
+            yield features[start:start + batch_size], actions[start:start + batch_size]
+
+def train(directory=DATA_DIR, batch_size=BATCH_SIZE, test_size=0.2):
+    """Fit the 4k1 LinearRegression over every chunk without loading the data set into RAM
+
+    One pass finds the per-feature range for normalize_data. A second pass
+    splits each mini-batch with split_data and accumulates the normal equations
+    for the train part, plus the same sums for the held-out part so its R^2 is
+    exact. The batch sizes only bound memory: the result equals one fit over
+    all training rows. Returns (model, lo, hi, held-out R^2, samples).
+    """
+    chunks = load_chunks(directory)
+    if not chunks:
+        raise FileNotFoundError(f"no self-play chunks in {directory!r}; run generate() first")
+    lo = np.full(FEATURES, np.inf)
+    hi = np.full(FEATURES, -np.inf)
+    for features, _ in iter_batches(chunks, batch_size):
+        lo = np.minimum(lo, features.min(axis=0))
+        hi = np.maximum(hi, features.max(axis=0))
+    hi = np.where(hi > lo, hi, lo + 1)
+    train_sums = np.zeros((FEATURES + 2, FEATURES + 2))
+    test_sums = np.zeros((FEATURES + 2, FEATURES + 2))
+    samples = 0
+    for features, actions in iter_batches(chunks, batch_size):
+        X = smash4k.normalize_data(np.asarray(features, dtype=np.float64), lo, hi)
+        X_train, X_test, y_train, y_test = smash4k.split_data(X, np.asarray(actions, dtype=np.float64), test_size)
+        for sums, X_part, y_part in ((train_sums, X_train, y_train), (test_sums, X_test, y_test)):
+            # Rows are [1, features..., action] so one outer product holds X'X, X'y and y'y
+            rows = np.column_stack((np.ones(len(y_part)), X_part, y_part))
+            sums += rows.T @ rows
+        samples += len(actions)
+    xtx = train_sums[:-1, :-1]
+    xty = train_sums[:-1, -1]
+    weights = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+    model = LinearRegression()
+    model.intercept_ = float(weights[0])
+    model.coef_ = weights[1:]
+    model.n_features_in_ = FEATURES
+    # Held-out error from the sums: SSE = y'y - 2w'X'y + w'X'Xw
+    count = test_sums[0, 0]
+    sse = test_sums[-1, -1] - 2 * weights @ test_sums[:-1, -1] + weights @ test_sums[:-1, :-1] @ weights
+    sst = test_sums[-1, -1] - test_sums[0, -1] ** 2 / count
+    return model, lo, hi, 1 - sse / sst, samples
+
+def save_model(model, lo, hi, path=smash4k.MODEL_PATH):
+    np.savez(path, coef=model.coef_, intercept=model.intercept_, lo=lo, hi=hi)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate self-play data and train the smash4k CPU")
+    parser.add_argument("--samples", type=int, default=10 * CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--data", default=DATA_DIR)
+    parser.add_argument("--model", default=smash4k.MODEL_PATH)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    chunks = generate(args.data, args.samples, args.workers)
+    print(f"{chunks} chunks of {CHUNK_SIZE} samples ready in {time.perf_counter() - start:.1f} s")
+    start = time.perf_counter()
+    model, lo, hi, r2, samples = train(args.data)
+    save_model(model, lo, hi, args.model)
+    print(f"trained on {samples} samples in {time.perf_counter() - start:.1f} s, held-out R^2 {r2:.3f}, saved {args.model}")
+
+if __name__ == "__main__":
+    main()
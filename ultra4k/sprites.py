@@ -0,0 +1,65 @@
+import pygame
+
+CELL_SIZE = (50, 75)
+
+# Stick-figure poses as primitives relative to the character's top-left corner
+POSES = {
+    "stand": (
+        ("rect", (20, 20, 10, 30)),  # Body
+        ("circle", (25, 15), 10),  # Head
+        ("line", (15, 25), (35, 25), 5),  # Arms
+        ("line", (20, 50), (20, 70), 5),  # Legs
+        ("line", (30, 50), (30, 70), 5),
+    ),
+    "walk": (
+        ("rect", (20, 20, 10, 30)),
+        ("circle", (25, 15), 10),
+        ("line", (10, 30), (40, 30), 5),
+        ("line", (15, 50), (15, 70), 5),
+        ("line", (35, 50), (35, 70), 5),
+    ),
+}
+
+class SpriteAtlas:
+    """Stick-figure poses rasterized once per color into a single sheet
+
+    Sheets are built the first time a color is drawn, so new characters and
+    palettes (including hit flashes) are cached without registering them.
+    """
+
+    def __init__(self, poses=POSES, cell_size=CELL_SIZE):
+        self.poses = poses
+        self.cells = {pose: pygame.Rect(i * cell_size[0], 0, cell_size[0], cell_size[1]) for i, pose in enumerate(poses)}
+        self.sheet_size = (cell_size[0] * len(poses), cell_size[1])
+        self.sheets = {}
+
+    def sheet(self, color):
+        sheet = self.sheets.get(color)
+        if sheet is None:
+            sheet = self.sheets[color] = self._render(color)
+        return sheet
+
+    def _render(self, color):
+        key = (0, 255, 0) if tuple(color) == (255, 0, 255) else (255, 0, 255)
+        sheet = pygame.Surface(self.sheet_size)
+        sheet.fill(key)
+        for pose, cell in self.cells.items():
+            x, y = cell.topleft
+            for shape in self.poses[pose]:
+                if shape[0] == "rect":
+                    pygame.draw.rect(sheet, color, pygame.Rect(shape[1]).move(x, y))
+                elif shape[0] == "circle":
+                    pygame.draw.circle(sheet, color, (x + shape[1][0], y + shape[1][1]), shape[2])
+                elif shape[0] == "line":
+                    pygame.draw.line(sheet, color, (x + shape[1][0], y + shape[1][1]), (x + shape[2][0], y + shape[2][1]), shape[3])
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert()
+        sheet.set_colorkey(key, pygame.RLEACCEL)
+        return sheet
+
+    def blit_args(self, color, pose, pos):
+        """Arguments for Surface.blit, or one entry of a Surface.blits batch"""
+        return self.sheet(color), pos, self.cells[pose]
+
+    def draw(self, screen, color, pose, pos):
+        screen.blit(self.sheet(color), pos, self.cells[pose])
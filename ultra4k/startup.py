@@ -0,0 +1,64 @@
+import time
+from contextlib import contextmanager
+
+STARTUP_TARGET_MS = 500
+
+class Timeline:
+    """Named startup phases, timed from when the process started launching"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.origin, time.perf_counter() - self.origin))
+
+    def mark(self, name):
+        now = time.perf_counter() - self.origin
+        self.phases.append((name, now, now))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def report(self, target_ms=STARTUP_TARGET_MS):
+        lines = ["startup timeline (ms since launch):"]
+        for name, start, end in sorted(self.phases, key=lambda p: p[1]):
+            lines.append(f"  {start * 1000:8.1f} - {end * 1000:8.1f}  {(end - start) * 1000:7.1f}  {name}")
+        total = self.phases[-1][2] * 1000 if self.phases else 0.0
+        verdict = "within" if total <= target_ms else "OVER"
+        lines.append(f"  time to first frame: {total:.0f} ms ({verdict} the {target_ms} ms target)")
+        return "\n".join(lines)
+
+timeline = Timeline()
+phase = timeline.phase
+
+def init_pygame():
+    """Start only the subsystems the games use: display (which brings events) and font
+
+    pygame.init() would also open the audio device and scan joysticks, which is
+    slow on kiosk hardware and can block; use mixer() or joystick() for those.
+    """
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+
+def mixer():
+    """Return pygame.mixer, starting the audio device on first use"""
+    import pygame
+    if not pygame.mixer.get_init():
+        with phase("mixer init"):
+            pygame.mixer.init()
+    return pygame.mixer
+
+def joystick():
+    """Return pygame.joystick, starting the subsystem on first use"""
+    import pygame
+    if not pygame.joystick.get_init():
+        with phase("joystick init"):
+            pygame.joystick.init()
+    return pygame.joystick
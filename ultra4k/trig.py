@@ -0,0 +1,55 @@
+# Sine and cosine tables built with integer arithmetic only, so launch angles and DI come out
+# bit-identical on every machine; libm's sin, cos and atan2 may differ in their last bits
+
+STEPS = 3600               # table entries per turn: tenths of a degree
+STEPS_PER_DEGREE = STEPS // 360
+QUARTER = STEPS // 4
+HALF = STEPS // 2
+SCALE = 1 << 16            # table values are sin and cos times SCALE, so value / SCALE is an exact float
+PRECISION = 64             # bits the series is evaluated with before rounding to SCALE
+PI = 0x3243F6A8885A308D3   # pi * 2**64, rounded down
+
+def _quarter_sine(step):
+    """round(sin(step tenths of a degree) * SCALE) for 0 <= step <= QUARTER, by Taylor series in integers"""
+    one = 1 << PRECISION
+    x = PI * step // HALF
+    term = total = x
+    k = 1
+    sign = -1
+    while term:
+        term = term * x // one * x // (one * (k + 1) * (k + 2))
+        total += sign * term
+        sign = -sign
+        k += 2
+    shift = PRECISION - SCALE.bit_length() + 1
+    return (total + (1 << shift - 1)) >> shift
+
+QUARTER_SINE = tuple(_quarter_sine(step) for step in range(QUARTER + 1))
+SINE = tuple(QUARTER_SINE[step] if step <= QUARTER else QUARTER_SINE[HALF - step] if step <= HALF
+             else -QUARTER_SINE[step - HALF] if step <= HALF + QUARTER else -QUARTER_SINE[STEPS - step]
+             for step in range(STEPS))
+COSINE = tuple(SINE[(step + QUARTER) % STEPS] for step in range(STEPS))
+
+def vector(step):
+    """(cos, sin) of an angle in table steps, as exact floats"""
+    step %= STEPS
+    return COSINE[step] / SCALE, SINE[step] / SCALE
+
+def atan2(y, x):
+    """The table step nearest the angle of integer vector (x, y), in (-HALF, HALF]; 0 for the zero vector"""
+    if not x and not y:
+        return 0
+    ax, ay = abs(x), abs(y)
+    # tan(step) <= ay / ax is monotonic over the quarter turn; compared by cross-multiplying, exactly
+    low, high = 0, QUARTER
+    while low < high:
+        middle = (low + high + 1) // 2
+        if QUARTER_SINE[middle] * ax <= ay * QUARTER_SINE[QUARTER - middle]:
+            low = middle
+        else:
+            high = middle - 1
+    if low < QUARTER and abs(ay * QUARTER_SINE[QUARTER - low - 1] - ax * QUARTER_SINE[low + 1]) < \
+            abs(ay * QUARTER_SINE[QUARTER - low] - ax * QUARTER_SINE[low]):
+        low += 1
+    step = low if x >= 0 else HALF - low
+    return -step if y < 0 else step